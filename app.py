@@ -1,14 +1,41 @@
 import streamlit as st
+import importlib
+import os
+import queue
+import tempfile
+import threading
 import time
-from datetime import datetime
-import pandas as pd
 
-# OpenAI (AI Mode)
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except Exception:
-    OPENAI_AVAILABLE = False
+# زمن استيراد الوحدات يُسجل في أول تشغيل فقط (التشغيلات التالية تجدها محملة)؛
+# pandas وopenai لا يُستوردان هنا بل عند أول استخدام أو في الخلفية بعد أول عرض
+import_started = time.perf_counter()
+from guardian import (
+    BACKENDS,
+    FIELD_OPTIONS,
+    RULESET,
+    TRIAGE_POLICY,
+    IncrementalValidator,
+    SessionHistory,
+    analyze_form_demo,
+    analyze_form_realtime,
+    analyze_form_tiered,
+    analyze_form_with_fallback,
+    get_backend,
+    get_circuit_breaker,
+    get_metrics_store,
+    get_rate_limiter,
+    get_result_cache,
+    get_telemetry,
+    get_triage_stats,
+)
+from guardian.config import AI_BATCH_SIZE, AI_CONCURRENCY, PRELOAD_ENABLED, REALTIME_BUDGET_MS
+from guardian.results import get_result_sink
+from guardian.stream import validate_file
+from guardian.telemetry import STAGES
+import_seconds = time.perf_counter() - import_started
+
+# زمن تنفيذ السكربت كاملاً (يُسجل في مرحلة ui_render آخر الملف)
+render_started = time.perf_counter()
 
 
 # ---------------------------
@@ -74,218 +101,37 @@ body {
 # ---------------------------
 # Session State init
 # ---------------------------
-if "total_forms" not in st.session_state:
-    st.session_state.total_forms = 0
-if "errors_found" not in st.session_state:
-    st.session_state.errors_found = 0
-if "clean_forms" not in st.session_state:
-    st.session_state.clean_forms = 0
 if "history" not in st.session_state:
-    st.session_state.history = []
-
-# ---------------------------
-# System Prompt (AI Mode)
-# ---------------------------
-SYSTEM_PROMPT = """You are a smart semantic validator for Arabic statistical survey forms.
-Analyze the form data and detect logical/semantic contradictions between fields.
-
-Look for contradictions like:
-1. Age vs education level (e.g. age 19 with PhD)
-2. Age vs years of experience (e.g. age 22 with 25 years experience)
-3. Employment status vs salary (e.g. unemployed with salary 10000)
-4. Marital status vs number of children (e.g. single with 4 children)
-5. Nationality vs native language contradictions
-6. Job title vs gender contradictions
-7. Any other logical inconsistency
-
-Always respond with JSON only in this exact format:
-{
-  "confidence_score": <number 0-100>,
-  "status": "<clean or warning or error>",
-  "issues": [
-    {
-      "severity": "<high or medium or low>",
-      "field_1": "<field name in Arabic>",
-      "field_2": "<field name in Arabic>",
-      "description": "<description in Arabic>",
-      "suggestion": "<correction suggestion in Arabic>"
-    }
-  ],
-  "summary": "<short summary in Arabic>"
+    st.session_state.history = SessionHistory()
+if "late_results" not in st.session_state:
+    st.session_state.late_results = queue.Queue()
+if "live_validator" not in st.session_state:
+    st.session_state.live_validator = IncrementalValidator()
+
+# Streamlit يحذف حالة عناصر الصفحة غير المعروضة؛ إعادة تعيينها تحفظ قيم الاستمارة عند التنقل بين الصفحات
+# (لذلك القيم الابتدائية هنا وليست value= في العناصر)
+FORM_DEFAULTS = {
+    "form:Age": 30,
+    "form:Years Experience": 5,
+    "form:Monthly Salary": 0,
+    "form:Family Members": 1,
+    "form:Children": 0,
 }
-
-If no issues found, return empty issues array, status: clean, score: 95-100
-"""
-
-# ---------------------------
-# Demo Engine (Fallback)
-# ---------------------------
-def analyze_form_demo(form_data: dict) -> dict:
-    """تحليل تجريبي ذكي بناء على البيانات الفعلية"""
-    time.sleep(1.1)  # محاكاة وقت المعالجة
-
-    issues = []
-    age = int(form_data.get("Age", 30))
-    education = str(form_data.get("Education", ""))
-    years_exp = int(form_data.get("Years Experience", 0))
-    employment = str(form_data.get("Employment Status", ""))
-    salary = int(form_data.get("Monthly Salary", 0))
-    marital = str(form_data.get("Marital Status", ""))
-    children = int(form_data.get("Children", 0))
-    nationality = str(form_data.get("Nationality", ""))
-    language = str(form_data.get("Native Language", ""))
-
-    # قاعدة 1: العمر مقابل المؤهل
-    if ("PhD" in education) or ("دكتوراه" in education):
-        if age < 25:
-            issues.append({
-                "severity": "high",
-                "field_1": "العمر",
-                "field_2": "المؤهل العلمي",
-                "description": f"عمر {age} سنة مع درجة الدكتوراه غير منطقي - الحد الأدنى المعتاد 27 سنة",
-                "suggestion": "راجع تاريخ الميلاد أو المؤهل العلمي"
-            })
-
-    # قاعدة 2: العمر مقابل سنوات الخبرة
-    if years_exp > (age - 18):
-        issues.append({
-            "severity": "high",
-            "field_1": "العمر",
-            "field_2": "سنوات الخبرة",
-            "description": f"سنوات الخبرة {years_exp} أكبر من الفترة الممكنة منذ بلوغ سن العمل (عمر {age} - 18 = {age-18} سنة)",
-            "suggestion": "راجع العمر أو سنوات الخبرة"
-        })
-
-    # قاعدة 3: الحالة الوظيفية مقابل الراتب
-    if ("غير موظف" in employment) or ("Unemployed" in employment):
-        if salary > 0:
-            issues.append({
-                "severity": "medium",
-                "field_1": "الحالة الوظيفية",
-                "field_2": "الراتب الشهري",
-                "description": f"الحالة الوظيفية 'غير موظف' لكن الراتب {salary} ريال",
-                "suggestion": "إما تصحيح الحالة الوظيفية أو تعيين الراتب صفر"
-            })
-
-    # قاعدة 4: الحالة الاجتماعية مقابل الأطفال
-    if ("اعزب" in marital) or ("أعزب" in marital) or ("Single" in marital):
-        if children > 0:
-            issues.append({
-                "severity": "high",
-                "field_1": "الحالة الاجتماعية",
-                "field_2": "عدد الأطفال",
-                "description": f"الحالة الاجتماعية 'أعزب' مع وجود {children} أطفال",
-                "suggestion": "راجع الحالة الاجتماعية أو عدد الأطفال"
-            })
-
-    # قاعدة 5: الجنسية مقابل اللغة الأم
-    if ("سعودي" in nationality) or ("Saudi" in nationality):
-        if ("English" in language) or ("الانجليزية" in language) or ("الإنجليزية" in language):
-            issues.append({
-                "severity": "medium",
-                "field_1": "الجنسية",
-                "field_2": "اللغة الأم",
-                "description": "جنسية سعودي مع لغة أم إنجليزية - غير شائع",
-                "suggestion": "تأكد من اللغة الأم للمستجيب"
-            })
-
-    # قاعدة 6: العمر مقابل الزواج والأطفال
-    if (age < 20) and (marital in ["متزوج", "Married"]) and (children >= 3):
-        issues.append({
-            "severity": "high",
-            "field_1": "العمر",
-            "field_2": "الحالة الاجتماعية والأطفال",
-            "description": f"عمر {age} سنة مع حالة 'متزوج' و{children} أطفال - غير معتاد",
-            "suggestion": "راجع تاريخ الميلاد والحالة الاجتماعية"
-        })
-
-    # حساب درجة الثقة
-    if len(issues) == 0:
-        confidence = 98
-        status = "clean"
-        summary = "لم يتم اكتشاف أي تناقضات منطقية - البيانات متسقة وموثوقة"
-    elif len(issues) == 1:
-        confidence = 65
-        status = "warning"
-        summary = "تم اكتشاف تناقض واحد يحتاج مراجعة"
-    elif len(issues) == 2:
-        confidence = 35
-        status = "error"
-        summary = f"تم اكتشاف {len(issues)} تناقضات منطقية تتطلب تصحيح فوري"
-    else:
-        confidence = 15
-        status = "error"
-        summary = f"تم اكتشاف {len(issues)} تناقضات حرجة - البيانات غير موثوقة"
-
-    return {
-        "confidence_score": confidence,
-        "status": status,
-        "issues": issues,
-        "summary": summary
-    }
-
-# ---------------------------
-# AI Engine
-# ---------------------------
-def analyze_form_ai(api_key: str, form_data: dict) -> dict:
-    if not OPENAI_AVAILABLE:
-        raise RuntimeError("OpenAI library not available in this environment.")
-
-    client = OpenAI(api_key=api_key)
-
-    # Keep zeros; filter only None/empty string
-    form_text = "\n".join([f"- {k}: {v}" for k, v in form_data.items() if v is not None and v != ""])
-    user_message = (
-        "Analyze this Arabic survey form for logical contradictions:\n\n"
-        f"{form_text}\n\n"
-        "Respond with JSON only."
-    )
-
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_message},
-        ],
-        temperature=0.1,
-        max_tokens=900,
-    )
-
-    raw = (response.choices[0].message.content or "").strip()
-    raw = raw.replace("```json", "").replace("```", "").strip()
-
-    import json
-    return json.loads(raw)
-
-# ---------------------------
-# Unified: AI then fallback to Demo
-# ---------------------------
-def analyze_form_with_fallback(api_key: str, form_data: dict):
-    # no key -> demo
-    if not api_key:
-        return analyze_form_demo(form_data), "demo"
-
-    try:
-        result = analyze_form_ai(api_key, form_data)
-        return result, "ai"
-    except Exception as e:
-        msg = str(e).lower()
-
-        quota_signals = [
-            "insufficient_quota",
-            "exceeded your current quota",
-            "billing",
-            "payment",
-            "error code: 429",
-            "429",
-        ]
-
-        # Any quota/billing/429 -> demo
-        if any(s in msg for s in quota_signals):
-            return analyze_form_demo(form_data), "demo"
-
-        # Any other error -> demo (حتى ما يوقف التطبيق)
-        return analyze_form_demo(form_data), "demo"
+for key in [key for key in st.session_state if str(key).startswith("form:")]:
+    st.session_state[key] = st.session_state[key]
+for key, value in FORM_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
+
+# أحكام AI التي وصلت بعد انتهاء ميزانية الوضع اللحظي تُحدّث سجلها في السجل والمقاييس ومخزن النتائج
+while not st.session_state.late_results.empty():
+    seq, future, (form_data, initial, mode, ts) = st.session_state.late_results.get_nowait()
+    if future.cancelled() or future.exception() is not None:
+        continue
+    region = form_data.get("Region")
+    st.session_state.history.update(seq, future.result(), "ai (late)")
+    get_metrics_store().record(initial, mode, region, ts, weight=-1)
+    get_metrics_store().record(future.result(), "ai (late)", region, ts)
+    get_result_sink().supersede(form_data, initial, mode, future.result(), "ai (late)", ts)
 
 # ---------------------------
 # Header
@@ -318,114 +164,253 @@ with st.sidebar:
     api_key_input = st.text_input("OpenAI API Key (اختياري)", type="password", placeholder="sk-...")
 
     api_key = api_key_input.strip() if api_key_input else (secret_key.strip() if secret_key else "")
+    backend = get_backend()
 
     st.markdown("---")
     st.markdown("### وضع التشغيل الحالي")
-    if api_key and OPENAI_AVAILABLE:
+    if backend.name != "openai" and backend.available(api_key):
+        st.success(f"🟢 نموذج محلي متاح ({BACKENDS[backend.name]})")
+        st.caption("البيانات لا تغادر المنشأة؛ عند تعذر النموذج يتم التحويل تلقائياً إلى Demo.")
+    elif backend.available(api_key):
         st.success("🟢 AI متاح (إذا كان الرصيد مفعّل)")
         st.caption("إذا انتهى الرصيد سيتم التحويل تلقائياً إلى Demo.")
+    elif backend.name == "classifier":
+        st.info("🟡 Demo فقط (ملف المصنف غير موجود - GUARDIAN_CLASSIFIER_MODEL)")
     else:
         st.info("🟡 Demo فقط (لا يوجد مفتاح أو مكتبة OpenAI غير متوفرة)")
 
+    breaker = get_circuit_breaker().stats()
+    if breaker["state"] == "open":
+        st.error(
+            f"🔴 قاطع AI مفتوح بسبب أخطاء {breaker['last_failure']} - الاستمارات تُفحص بالقواعد "
+            f"(محاولة تجريبية بعد {breaker['retry_in']:.0f} ث)"
+        )
+    elif breaker["state"] == "half_open":
+        st.warning("🟠 قاطع AI نصف مفتوح - طلب تجريبي جارٍ")
+    limiter = get_rate_limiter().stats()
+    st.caption(
+        f"الحصة المتاحة: {limiter['requests_available']}/{limiter['rpm_limit']} طلب/د | "
+        f"{limiter['tokens_available']:,}/{limiter['tpm_limit']:,} رمز/د"
+        f" | انتظار: {limiter['waited_seconds']:.1f} ث | مرفوض: {limiter['refused'] + breaker['rejected']}"
+    )
+
+    use_realtime = st.checkbox("الوضع اللحظي (ميزانية زمنية لكل فحص)", value=False)
+    realtime_budget_ms = st.slider(
+        "ميزانية الزمن (ملّي ثانية)", min_value=50, max_value=2000, value=REALTIME_BUDGET_MS, step=50,
+        disabled=not use_realtime,
+    )
+    use_triage = st.checkbox("فرز بالقواعد أولاً (AI للحالات الغامضة فقط)", value=True)
+    escalate_medium = st.checkbox("تصعيد التناقضات متوسطة الخطورة إلى AI", value=True, disabled=not use_triage)
+    triage_policy = dict(TRIAGE_POLICY, escalate_medium_only=escalate_medium)
+    live_check = st.checkbox("الفحص الفوري أثناء الإدخال (القواعد)", value=True)
+    if use_triage:
+        triage_stats = get_triage_stats().stats()
+        st.caption(
+            f"نسبة التصعيد إلى AI: {triage_stats['escalation_rate'] * 100:.0f}% "
+            f"({triage_stats['escalated']} من {triage_stats['total']})"
+        )
+
     st.markdown("---")
     st.markdown("### احصائيات الجلسة")
     col1, col2 = st.columns(2)
-    col1.metric("استمارات", st.session_state.total_forms)
-    col2.metric("اخطاء", st.session_state.errors_found)
+    col1.metric("استمارات", st.session_state.history.total_forms)
+    col2.metric("اخطاء", st.session_state.history.errors_found)
+
+    st.markdown("---")
+    st.markdown("### ذاكرة النتائج")
+    cache_stats = get_result_cache().stats()
+    col1, col2 = st.columns(2)
+    col1.metric("نسبة الإصابة", f"{cache_stats['hit_rate'] * 100:.0f}%")
+    col2.metric("مخزنة", cache_stats["entries"])
+    st.caption(
+        f"ذاكرة: {cache_stats['hits_memory']} | قرص: {cache_stats['hits_disk']} | "
+        f"إخفاق: {cache_stats['misses']} | إزاحة: {cache_stats['evictions']}"
+    )
 
     st.markdown("---")
     st.caption("✅ التطبيق يعمل حتى بدون رصيد عبر Fallback تلقائي.")
 
+
+def run_validation(form_data: dict, on_issue=None):
+    """يعيد (result, mode, pending) حيث pending حكم AI متأخر في الوضع اللحظي
+
+    on_issue (اختياري) يستقبل مشكلات AI فور وصولها عند طلب الرد بالتدفق.
+    """
+    if use_realtime:
+        return analyze_form_realtime(
+            api_key,
+            form_data,
+            realtime_budget_ms,
+            get_result_cache(),
+            triage_policy if use_triage else None,
+            get_triage_stats(),
+        )
+    if use_triage:
+        return (
+            *analyze_form_tiered(api_key, form_data, get_result_cache(), triage_policy, get_triage_stats(), on_issue),
+            None,
+        )
+    return (*analyze_form_with_fallback(api_key, form_data, get_result_cache(), on_issue), None)
+
+
+def render_issue(i: int, issue: dict) -> None:
+    severity = issue.get("severity", "medium")
+    card_class = "error-card" if severity == "high" else "warning-card"
+    st.markdown(
+        f'<div class="{card_class}">'
+        f'<strong>المشكلة {i}: {issue.get("field_1","")} vs {issue.get("field_2","")}</strong><br>'
+        f'{issue.get("description","")}<br>'
+        f'<em>💡 {issue.get("suggestion","")}</em>'
+        f'</div>',
+        unsafe_allow_html=True,
+    )
+
+
+def record_validation(form_data: dict, result: dict, mode: str, pending, latency=None) -> None:
+    """تسجيل الفحص في سجل الجلسة وفي المقاييس المشتركة ومخزن النتائج، ومتابعة حكم AI المتأخر إن وجد"""
+    seq = st.session_state.history.record(result, mode)
+    region = form_data.get("Region")
+    ts = time.time()
+    get_metrics_store().record(result, mode, region, ts)
+    get_result_sink().record(form_data, result, mode, latency, ts)
+    if pending is None:
+        return
+    late_results = st.session_state.late_results
+    initial = (form_data, result, mode, ts)
+    pending.add_done_callback(lambda future: late_results.put((seq, future, initial)))
+    st.caption("⏳ حكم AI لم يصل خلال الميزانية الزمنية - سيُحدّث في لوحة التحكم عند وصوله.")
+
 # ---------------------------
-# Tabs
+# Navigation
 # ---------------------------
-tab1, tab2, tab3 = st.tabs(["الاستمارة التفاعلية", "سجلات اختبار", "لوحة التحكم"])
+# تُنفذ الصفحة المختارة فقط في كل تفاعل (st.tabs تنفذ وترسل كل التبويبات في كل تشغيل)
+PAGES = ["الاستمارة التفاعلية", "سجلات اختبار", "لوحة التحكم", "الأداء"]
+page = st.radio("الصفحة", PAGES, horizontal=True, label_visibility="collapsed", key="page")
 
 # ===========================
-# Tab 1: Interactive Form
+# Page 1: Interactive Form
 # ===========================
-with tab1:
+if page == PAGES[0]:
     st.markdown("### استمارة مسح سوق العمل")
 
+    # مكان ملاحظة الفحص الفوري تحت كل عنصر إدخال (تُملأ بعد قراءة كل الحقول)
+    hints = {}
+
+    def hint(field: str) -> None:
+        hints[field] = st.empty()
+
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("#### البيانات الشخصية")
-        age = st.number_input("العمر", min_value=10, max_value=100, value=30)
-        gender = st.selectbox("الجنس", ["ذكر", "انثى"])
-        nationality = st.selectbox("الجنسية", ["سعودي", "مصري", "اردني", "هندي", "باكستاني", "اخرى"])
-        native_language = st.selectbox("اللغة الام", ["العربية", "الانجليزية", "الاردية", "الهندية", "اخرى"])
+        age = st.number_input("العمر", min_value=10, max_value=100, key="form:Age")
+        hint("Age")
+        gender = st.selectbox("الجنس", FIELD_OPTIONS["Gender"], key="form:Gender")
+        hint("Gender")
+        nationality = st.selectbox("الجنسية", FIELD_OPTIONS["Nationality"], key="form:Nationality")
+        hint("Nationality")
+        native_language = st.selectbox("اللغة الام", FIELD_OPTIONS["Native Language"], key="form:Native Language")
+        hint("Native Language")
 
     with col2:
         st.markdown("#### البيانات المهنية")
-        education = st.selectbox("المؤهل العلمي", ["اقل من ثانوي", "ثانوي", "دبلوم", "بكالوريوس", "ماجستير", "دكتوراه"])
-        employment_status = st.selectbox("الحالة الوظيفية", ["موظف حكومي", "موظف قطاع خاص", "اعمال حرة", "غير موظف", "طالب", "متقاعد"])
-        job_title = st.text_input("المسمى الوظيفي", placeholder="مثال: مهندس، طبيب...")
-        years_exp = st.number_input("سنوات الخبرة", min_value=0, max_value=50, value=5)
-        monthly_salary = st.number_input("الراتب الشهري ريال", min_value=0, max_value=100000, value=0, step=500)
+        education = st.selectbox("المؤهل العلمي", FIELD_OPTIONS["Education"], key="form:Education")
+        hint("Education")
+        employment_status = st.selectbox("الحالة الوظيفية", FIELD_OPTIONS["Employment Status"], key="form:Employment Status")
+        hint("Employment Status")
+        job_title = st.text_input("المسمى الوظيفي", placeholder="مثال: مهندس، طبيب...", key="form:Job Title")
+        hint("Job Title")
+        years_exp = st.number_input("سنوات الخبرة", min_value=0, max_value=50, key="form:Years Experience")
+        hint("Years Experience")
+        monthly_salary = st.number_input("الراتب الشهري ريال", min_value=0, max_value=100000, step=500, key="form:Monthly Salary")
+        hint("Monthly Salary")
 
     col3, col4 = st.columns(2)
     with col3:
         st.markdown("#### الحالة الاجتماعية")
-        marital_status = st.selectbox("الحالة الاجتماعية", ["اعزب", "متزوج", "مطلق", "ارمل"])
-        family_members = st.number_input("عدد افراد الاسرة", min_value=1, max_value=20, value=1)
-        children_count = st.number_input("عدد الاطفال", min_value=0, max_value=15, value=0)
+        marital_status = st.selectbox("الحالة الاجتماعية", FIELD_OPTIONS["Marital Status"], key="form:Marital Status")
+        hint("Marital Status")
+        family_members = st.number_input("عدد افراد الاسرة", min_value=1, max_value=20, key="form:Family Members")
+        hint("Family Members")
+        children_count = st.number_input("عدد الاطفال", min_value=0, max_value=15, key="form:Children")
+        hint("Children")
 
     with col4:
         st.markdown("#### بيانات اضافية")
-        region = st.selectbox("المنطقة", ["الرياض", "مكة المكرمة", "المدينة المنورة", "الشرقية", "اخرى"])
-        sector = st.selectbox("القطاع", ["حكومي", "خاص", "غير ربحي", "لا ينطبق"])
-        income_source = st.selectbox("مصدر الدخل", ["راتب", "اعمال حرة", "استثمارات", "لا يوجد"])
+        region = st.selectbox("المنطقة", FIELD_OPTIONS["Region"], key="form:Region")
+        hint("Region")
+        sector = st.selectbox("القطاع", FIELD_OPTIONS["Sector"], key="form:Sector")
+        hint("Sector")
+        income_source = st.selectbox("مصدر الدخل", FIELD_OPTIONS["Income Source"], key="form:Income Source")
+        hint("Income Source")
+
+    form_data = {
+        "Age": age,
+        "Gender": gender,
+        "Nationality": nationality,
+        "Native Language": native_language,
+        "Education": education,
+        "Employment Status": employment_status,
+        "Job Title": job_title,
+        "Years Experience": years_exp,
+        "Monthly Salary": monthly_salary,
+        "Marital Status": marital_status,
+        "Family Members": family_members,
+        "Children": children_count,
+        "Region": region,
+        "Sector": sector,
+        "Income Source": income_source,
+    }
+
+    # الفحص الفوري: كل تغيير في عنصر يعيد تشغيل الصفحة، فتُعاد القواعد المعتمدة على الحقول المتغيرة فقط
+    if live_check:
+        live = st.session_state.live_validator
+        changed = live.update(form_data)
+        for field, slot in hints.items():
+            field_issues = live.field_issues(field)
+            if field_issues:
+                slot.caption("  \n".join(
+                    f"{'🔴' if issue['severity'] == 'high' else '🟠'} {issue['description']}" for issue in field_issues
+                ))
+        st.caption(
+            f"الفحص الفوري: {len(live.issues)} تناقض | أُعيد فحص {live.evaluated} من {len(RULESET.rules)} قاعدة"
+            + (f" بعد تغيير {len(changed)} حقل" if 0 < len(changed) < len(form_data) else "")
+        )
 
     st.markdown("---")
 
     if st.button("فحص الاستمارة (AI مع Fallback)", use_container_width=True):
-        form_data = {
-            "Age": age,
-            "Gender": gender,
-            "Nationality": nationality,
-            "Native Language": native_language,
-            "Education": education,
-            "Employment Status": employment_status,
-            "Job Title": job_title,
-            "Years Experience": years_exp,
-            "Monthly Salary": monthly_salary,
-            "Marital Status": marital_status,
-            "Family Members": family_members,
-            "Children": children_count,
-            "Sector": sector,
-            "Income Source": income_source,
-        }
 
+        # مشكلات AI تظهر أثناء وصول الرد، ثم تُستبدل بالنتيجة الكاملة
+        live = st.empty()
+        streamed = []
+
+        def show_streamed_issue(issue: dict) -> None:
+            streamed.append(issue)
+            with live.container():
+                st.markdown("### المشكلات المكتشفة حتى الآن:")
+                for i, item in enumerate(streamed, 1):
+                    render_issue(i, item)
+
+        started = time.perf_counter()
         with st.spinner("النظام يحلل الاستمارة..."):
-            result, mode = analyze_form_with_fallback(api_key, form_data)
+            result, mode, pending = run_validation(form_data, show_streamed_issue)
+        latency = time.perf_counter() - started
+        live.empty()
 
         # mode banner
         if mode == "ai":
             st.success("✅ تم التحليل بواسطة الذكاء الاصطناعي (AI).")
+        elif mode == "rules":
+            st.info("⚡ تم الحكم محلياً بواسطة القواعد دون الحاجة إلى الذكاء الاصطناعي.")
         else:
             st.warning("⚠️ تم التحويل تلقائياً إلى وضع العرض التوضيحي (Demo) بسبب عدم توفر رصيد/فوترة أو تعذر الاتصال.")
 
-        st.session_state.total_forms += 1
+        record_validation(form_data, result, mode, pending, latency)
 
         score = int(result.get("confidence_score", 0))
         status = result.get("status", "error")
         issues = result.get("issues", [])
 
-        if issues:
-            st.session_state.errors_found += len(issues)
-        else:
-            st.session_state.clean_forms += 1
-
-        st.session_state.history.append(
-            {
-                "time": datetime.now().strftime("%H:%M:%S"),
-                "score": score,
-                "issues": len(issues),
-                "status": status,
-                "mode": mode,
-            }
-        )
-
         st.markdown("---")
         st.markdown("## نتائج الفحص")
 
@@ -466,16 +451,7 @@ with tab1:
         if issues:
             st.markdown("### المشكلات المكتشفة:")
             for i, issue in enumerate(issues, 1):
-                severity = issue.get("severity", "medium")
-                card_class = "error-card" if severity == "high" else "warning-card"
-                st.markdown(
-                    f'<div class="{card_class}">'
-                    f'<strong>المشكلة {i}: {issue.get("field_1","")} vs {issue.get("field_2","")}</strong><br>'
-                    f'{issue.get("description","")}<br>'
-                    f'<em>💡 {issue.get("suggestion","")}</em>'
-                    f'</div>',
-                    unsafe_allow_html=True,
-                )
+                render_issue(i, issue)
         else:
             st.markdown(
                 '<div class="success-card"><strong>✅ لم يتم اكتشاف أي تناقضات - البيانات متسقة ومنطقية</strong></div>',
@@ -483,9 +459,9 @@ with tab1:
             )
 
 # ===========================
-# Tab 2: Test Records
+# Page 2: Test Records
 # ===========================
-with tab2:
+if page == PAGES[1]:
     st.markdown("### سجلات اختبار جاهزة")
 
     test_records = [
@@ -521,34 +497,23 @@ with tab2:
         cols[i % 3].info(f"**{k}:** {v}")
 
     if st.button("🔍 فحص هذا السجل (AI مع Fallback)", use_container_width=True):
+        started = time.perf_counter()
         with st.spinner("🤖 جاري التحليل..."):
-            result, mode = analyze_form_with_fallback(api_key, selected_record)
+            result, mode, pending = run_validation(selected_record)
+        latency = time.perf_counter() - started
 
         if mode == "ai":
             st.success("✅ تم التحليل بواسطة الذكاء الاصطناعي (AI).")
+        elif mode == "rules":
+            st.info("⚡ تم الحكم محلياً بواسطة القواعد دون الحاجة إلى الذكاء الاصطناعي.")
         else:
             st.warning("⚠️ تم التحويل تلقائياً إلى Demo بسبب عدم توفر رصيد/فوترة أو تعذر الاتصال.")
 
-        st.session_state.total_forms += 1
+        record_validation(selected_record, dict(result, status=result.get("status", "clean")), mode, pending, latency)
 
         score = int(result.get("confidence_score", 0))
         issues = result.get("issues", [])
 
-        if issues:
-            st.session_state.errors_found += len(issues)
-        else:
-            st.session_state.clean_forms += 1
-
-        st.session_state.history.append(
-            {
-                "time": datetime.now().strftime("%H:%M:%S"),
-                "score": score,
-                "issues": len(issues),
-                "status": result.get("status", "clean"),
-                "mode": mode,
-            }
-        )
-
         color = "#38a169" if score >= 80 else "#d69e2e" if score >= 60 else "#e53e3e"
         st.markdown(
             f'<div style="background:{color}22;border:3px solid {color};padding:20px;border-radius:15px;text-align:center;margin:20px 0">'
@@ -571,29 +536,213 @@ with tab2:
         else:
             st.success("✅ لا توجد تناقضات في هذا السجل")
 
+    st.markdown("---")
+    st.markdown("### فحص جماعي (محرك الدفعات)")
+    check_households = st.checkbox(
+        "فحص ما بين السجلات (اتساق الأسرة والمستجيبين المكررين)", value=True,
+        help="يتطلب عمود رقم الأسرة وصلة القرابة لفحوص الأسرة؛ التكرار يُفحص دائماً",
+    )
+
+    if st.button("⚡ فحص جميع السجلات دفعة واحدة", use_container_width=True):
+        import pandas as pd
+        from guardian import analyze_forms_batch
+
+        batch = analyze_forms_batch(pd.DataFrame(test_records), households=check_households)
+        st.caption(f"الإنتاجية: {batch.attrs['rows_per_sec']:,.0f} صف/ثانية")
+        st.dataframe(
+            batch[["confidence_score", "status", "issue_count", "summary"]],
+            use_container_width=True,
+        )
+
+    if backend.available(api_key):
+        concurrency = st.slider("عدد الطلبات المتزامنة (AI)", min_value=1, max_value=32, value=AI_CONCURRENCY)
+        batch_size = st.slider("عدد الاستمارات في كل طلب (AI)", min_value=1, max_value=25, value=AI_BATCH_SIZE)
+        if st.button("🤖 فحص جميع السجلات عبر AI بالتوازي", use_container_width=True):
+            import pandas as pd
+
+            progress = st.progress(0.0)
+            table = st.empty()
+            rows = []
+            started = time.perf_counter()
+            usage = {}
+            for index, result in backend.iter_forms(test_records, api_key, concurrency, batch_size, usage):
+                if isinstance(result, Exception):
+                    result, mode = analyze_form_demo(test_records[index]), "demo"
+                else:
+                    mode = "ai"
+                rows.append({
+                    "record": index + 1,
+                    "mode": mode,
+                    "confidence_score": result.get("confidence_score"),
+                    "status": result.get("status"),
+                })
+                progress.progress(len(rows) / len(test_records))
+                table.dataframe(pd.DataFrame(rows), use_container_width=True)
+            elapsed = time.perf_counter() - started
+            st.caption(f"الإنتاجية: {len(rows) / max(elapsed, 1e-9):,.1f} استمارة/ثانية")
+            if usage:
+                st.caption(
+                    f"الطلبات: {usage['requests']} | رموز الإدخال: {usage['prompt_tokens']:,} | "
+                    f"رموز الإخراج: {usage['completion_tokens']:,}"
+                )
+
+    st.markdown("---")
+    st.markdown("### فحص ملف مستخرج (CSV / NDJSON / Parquet)")
+
+    uploaded = st.file_uploader("ارفع ملف السجلات", type=["csv", "ndjson", "jsonl", "parquet", "gz"])
+    if uploaded is not None and st.button("📂 فحص الملف", use_container_width=True):
+        progress_text = st.empty()
+
+        def show_progress(summary: dict) -> None:
+            progress_text.caption(
+                f"{summary['rows']:,} صف | {summary['rows_per_sec']:,.0f} صف/ثانية | "
+                f"{summary['error']:,} اخطاء | {summary['warning']:,} تحذير"
+            )
+
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", encoding="utf-8", delete=False) as output:
+            summary = validate_file(uploaded, output, progress=show_progress, households=check_households)
+        show_progress(summary)
+        with open(output.name, "rb") as results:
+            st.download_button("⬇️ تنزيل النتائج (NDJSON)", results.read(), file_name="results.ndjson")
+        os.unlink(output.name)
+
 # ===========================
-# Tab 3: Dashboard
+# Page 3: Dashboard
 # ===========================
-with tab3:
+if page == PAGES[2]:
+    import pandas as pd
+
     st.markdown("### 📈 لوحة متابعة جودة البيانات")
 
+    # مقاييس مشتركة بين كل الجلسات - تُقرأ من تجميعات زمنية جاهزة
+    metrics = get_metrics_store()
+    periods = {"آخر ساعة": ("minute", 3600), "آخر 24 ساعة": ("hour", 24 * 3600), "الكل": ("hour", None)}
+    period = st.radio("الفترة", list(periods), horizontal=True)
+    granularity, window_seconds = periods[period]
+    since = time.time() - window_seconds if window_seconds else None
+
+    totals = metrics.totals(since)
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("📋 اجمالي الاستمارات", st.session_state.total_forms)
-    col2.metric("🔴 اخطاء مكتشفة", st.session_state.errors_found)
-    col3.metric("✅ استمارات نظيفة", st.session_state.clean_forms)
-    error_rate = round((st.session_state.errors_found / max(st.session_state.total_forms, 1)) * 100, 1)
-    col4.metric("📊 معدل الخطا", f"{error_rate}%")
-
-    if st.session_state.history:
-        df = pd.DataFrame(st.session_state.history)
+    col1.metric("📋 اجمالي الاستمارات", totals["forms"])
+    col2.metric("🔴 اخطاء مكتشفة", totals["issues"])
+    col3.metric("✅ استمارات نظيفة", totals["clean"])
+    col4.metric("📊 معدل الخطا", f"{round(totals['error_rate'] * 100, 1)}%")
+
+    if totals["forms"]:
+        series = pd.DataFrame(metrics.series(granularity, since))
+        series.index = pd.to_datetime(series.pop("bucket"), unit="s")
+        st.markdown("#### الاستمارات والأخطاء عبر الزمن")
+        st.line_chart(series[["forms", "issues"]])
+
+        col_a, col_b = st.columns(2)
+        with col_a:
+            st.markdown("#### حسب المنطقة")
+            regions = pd.DataFrame.from_dict(metrics.by_region(since), orient="index")
+            regions["error_rate"] = (regions["error_rate"] * 100).round(1)
+            st.dataframe(regions[["forms", "issues", "clean", "error", "error_rate"]], use_container_width=True)
+        with col_b:
+            st.markdown("#### تكرار القواعد")
+            rule_hits = metrics.by_rule(since)
+            if rule_hits:
+                st.bar_chart(pd.Series(rule_hits, name="مرات"))
+            else:
+                st.caption("لم تُرصد أي تناقضات بعد")
+    else:
+        st.info("ابدأ بفحص استمارات لعرض الاحصائيات")
+
+    history = st.session_state.history
+    if history.total_forms:
+        st.markdown("---")
+        st.markdown("#### فحوصات هذه الجلسة")
+        # المجاميع محدثة تراكمياً؛ الجدول يعرض آخر الفحوصات فقط
+        visible = st.select_slider("عدد الفحوصات المعروضة", options=[20, 50, 100, 200, 500], value=50)
+        df = pd.DataFrame(history.window(visible))
         st.dataframe(df, use_container_width=True)
-        if "score" in df.columns:
+
+        col_a, col_b = st.columns(2)
+        with col_a:
             st.line_chart(df["score"])
+        with col_b:
+            st.bar_chart(pd.Series(history.histogram(), name="استمارات"))
+
+# ===========================
+# Page 4: Performance
+# ===========================
+if page == PAGES[3]:
+    import pandas as pd
+
+    st.markdown("### ⏱️ أداء مراحل الفحص")
+    telemetry = get_telemetry()
+    # القياس مشترك بين كل الجلسات فيُضبط عند بدء العملية (GUARDIAN_TELEMETRY) لا من جلسة واحدة
+    if not telemetry.enabled:
+        st.warning("القياس متوقف لهذه العملية - شغّل التطبيق مع GUARDIAN_TELEMETRY=1 لتفعيله")
+    st.caption(
+        "أزمنة مشتركة بين كل الجلسات منذ بدء العملية؛ ui_render يشمل تنفيذ الواجهة في التشغيلات السابقة، "
+        "وapp_import وfirst_paint تُقاس مرة واحدة في أول تشغيل للعملية (البدء البارد)."
+    )
+
+    perf = telemetry.stats()
+    counters = perf["counters"]
+    tokens = counters.get("ai_tokens_total", {})
+    fallbacks = counters.get("fallback_total", {})
+    requests = counters.get("ai_requests_total", {})
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("طلبات AI", int(sum(requests.values())))
+    col2.metric("رموز مُرسلة", f"{int(tokens.get('direction=in', 0)):,}")
+    col3.metric("رموز مُستلمة", f"{int(tokens.get('direction=out', 0)):,}")
+    col4.metric("رجوع إلى القواعد", int(sum(fallbacks.values())))
+
+    if perf["stages"]:
+        stages = pd.DataFrame.from_dict(perf["stages"], orient="index")
+        stages.insert(0, "المرحلة", [STAGES.get(stage, stage) for stage in stages.index])
+        st.dataframe(stages.round(3), use_container_width=True)
+        st.bar_chart(stages[["p50_ms", "p95_ms"]])
     else:
-        st.info("ابدأ بفحص استمارات لعرض الاحصائيات")
+        st.info("لا توجد قياسات بعد - افحص استمارة لتظهر أزمنة المراحل")
+
+    col_a, col_b = st.columns(2)
+    with col_a:
+        st.markdown("#### أسباب الرجوع إلى القواعد")
+        if fallbacks:
+            st.bar_chart(pd.Series(fallbacks, name="مرات"))
+        else:
+            st.caption("لا يوجد")
+    with col_b:
+        st.markdown("#### نتائج طلبات AI")
+        if requests:
+            st.bar_chart(pd.Series(requests, name="طلبات"))
+        else:
+            st.caption("لا يوجد")
+
+    # القياسات مشتركة بين كل الجلسات وعداداتها تراكمية لـ Prometheus، فلا تُصفّر من الواجهة
+    st.download_button(
+        "تحميل بصيغة Prometheus", telemetry.render_prometheus(), "guardian-metrics.prom", "text/plain"
+    )
 
 st.markdown("---")
 st.markdown(
     "<div style='text-align:center;color:#999;padding:10px'>🛡️ الحارس الدلالي - Smart Semantic Guardian | هكاثون الابتكار في البيانات 2026</div>",
     unsafe_allow_html=True,
 )
+
+get_telemetry().observe("ui_render", time.perf_counter() - render_started)
+
+
+def preload() -> None:
+    with get_telemetry().timer("preload"):
+        importlib.import_module("guardian.batch")
+        backend.warm_up()
+
+
+@st.cache_resource(show_spinner=False)
+def cold_start() -> bool:
+    """مرة واحدة لكل عملية: تسجيل زمن الاستيراد وأول عرض، ثم تحميل pandas ومكتبة النموذج في الخلفية"""
+    telemetry = get_telemetry()
+    telemetry.observe("app_import", import_seconds)
+    telemetry.observe("first_paint", time.perf_counter() - import_started)
+    if PRELOAD_ENABLED:
+        threading.Thread(target=preload, name="guardian-preload", daemon=True).start()
+    return True
+
+
+cold_start()
@@ -0,0 +1,72 @@
+"""الحارس الدلالي - محركات فحص استمارات المسح الإحصائي
+
+الاستيراد لا يحمّل streamlit ولا pandas؛ محرك الدفعات (analyze_forms_batch)
+يُحمّل عند أول استخدام فقط.
+"""
+from .ai import (
+    OPENAI_AVAILABLE,
+    PROMPT_VERSION,
+    SYSTEM_PROMPT,
+    AIEventLoop,
+    analyze_form_ai,
+    analyze_form_ai_async,
+    analyze_form_ai_stream,
+    analyze_forms_ai_async,
+    analyze_forms_ai_batched_async,
+    get_ai_loop,
+    prompt_version,
+)
+from .backends import BACKENDS, ChatBackend, ClassifierBackend, create_backend, get_backend, get_verdict_log
+from .arabic import PhraseIndex, normalize_arabic
+from .cache import ResultCache, canonical_form, form_cache_key, get_result_cache
+from .history import SessionHistory
+from .household import CROSS_RULES, check_households, evaluate_records, merge_cross_issues, respondent_fingerprint
+from .incremental import IncrementalValidator
+from .metrics import MetricsStore, get_metrics_store
+from .occupations import OCCUPATIONS, Occupation, education_rank, match_job_title
+from .pipeline import (
+    RealtimeVerdict,
+    analyze_form_async,
+    analyze_form_demo_cached,
+    analyze_form_realtime,
+    analyze_form_tiered,
+    analyze_form_with_fallback,
+    fallback_reason,
+)
+from .resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimiter,
+    RateLimitWaitError,
+    classify_failure,
+    get_circuit_breaker,
+    get_rate_limiter,
+)
+from .rules import (
+    FIELD_OPTIONS,
+    RULES,
+    RULESET,
+    RuleSet,
+    analyze_form_demo,
+    evaluate_form,
+    evaluate_rules,
+    merge_issues,
+    register_rule,
+    score_issues,
+)
+from .schema import RESULT_SCHEMA, IssueStreamParser, SchemaError, loads_lenient, validate_result
+from .telemetry import Telemetry, get_telemetry
+from .triage import TRIAGE_POLICY, TriageDecision, TriageStats, get_triage_stats, triage_form
+
+_LAZY = {
+    "analyze_forms_batch": ".batch",
+    "evaluate_frame": ".batch",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
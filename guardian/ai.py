@@ -0,0 +1,563 @@
+"""محرك الذكاء الاصطناعي: فحص فردي، متزامن، وعلى دفعات"""
+import asyncio
+import hashlib
+import importlib.util
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+
+from .config import (
+    AI_BASE_URL,
+    AI_BATCH_SIZE,
+    AI_CONCURRENCY,
+    AI_MODEL,
+    AI_RATE_MAX_WAIT_SECONDS,
+    AI_RESPONSE_FORMAT,
+    AI_TIMEOUT_SECONDS,
+)
+from .resilience import get_circuit_breaker, get_rate_limiter
+from .schema import IssueStreamParser, SchemaError, loads_lenient, response_format, validate_result
+from .telemetry import get_telemetry
+
+# OpenAI (AI Mode): تُستورد عند إنشاء أول عميل فقط (نصف ثانية تقريباً من بدء التشغيل)
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+
+
+# ---------------------------
+# System Prompt (AI Mode)
+# ---------------------------
+SYSTEM_PROMPT = """You are a smart semantic validator for Arabic statistical survey forms.
+Analyze the form data and detect logical/semantic contradictions between fields.
+
+Look for contradictions like:
+1. Age vs education level (e.g. age 19 with PhD)
+2. Age vs years of experience (e.g. age 22 with 25 years experience)
+3. Employment status vs salary (e.g. unemployed with salary 10000)
+4. Marital status vs number of children (e.g. single with 4 children)
+5. Nationality vs native language contradictions
+6. Job title vs gender contradictions
+7. Any other logical inconsistency
+
+Always respond with JSON only in this exact format:
+{
+  "confidence_score": <number 0-100>,
+  "status": "<clean or warning or error>",
+  "issues": [
+    {
+      "severity": "<high or medium or low>",
+      "field_1": "<field name in Arabic>",
+      "field_2": "<field name in Arabic>",
+      "description": "<description in Arabic>",
+      "suggestion": "<correction suggestion in Arabic>"
+    }
+  ],
+  "summary": "<short summary in Arabic>"
+}
+
+If no issues found, return empty issues array, status: clean, score: 95-100
+"""
+
+# ---------------------------
+# AI Engine
+# ---------------------------
+def prompt_version(model: str = AI_MODEL) -> str:
+    """إصدار أحكام النموذج لمفاتيح الذاكرة: اسم النموذج وبصمة التعليمات"""
+    return f"ai:{model}:{hashlib.sha1(SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:10]}"
+
+
+PROMPT_VERSION = prompt_version()
+
+_SYNC_CLIENTS = {}
+
+
+def build_user_message(form_data: dict) -> str:
+    # Keep zeros; filter only None/empty string
+    form_text = "\n".join([f"- {k}: {v}" for k, v in form_data.items() if v is not None and v != ""])
+    return (
+        "Analyze this Arabic survey form for logical contradictions:\n\n"
+        f"{form_text}\n\n"
+        "Respond with JSON only."
+    )
+
+
+def build_messages(form_data: dict) -> list:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_user_message(form_data)},
+    ]
+
+
+def parse_ai_response(content) -> dict:
+    """JSON الرد بعد الإصلاح والتحقق من المخطط؛ SchemaError (ValueError) إن تعذرت الاستعادة"""
+    with get_telemetry().timer("parse"):
+        return validate_result(loads_lenient(content))
+
+
+def completion_options(batch: bool = False, model=None) -> dict:
+    """معاملات الطلب المشتركة، مع وضع JSON/Structured Outputs حسب GUARDIAN_AI_RESPONSE_FORMAT"""
+    options = {"model": model or AI_MODEL, "temperature": 0.1}
+    fmt = response_format(AI_RESPONSE_FORMAT, batch)
+    if fmt is not None:
+        options["response_format"] = fmt
+    return options
+
+
+def _estimate_tokens(request: dict) -> int:
+    # تقدير تقريبي (~3 أحرف لكل رمز للنص العربي المختلط) + الحد الأقصى للإخراج كما تحسبه الحصة
+    prompt = sum(len(message["content"]) for message in request["messages"])
+    return prompt // 3 + request.get("max_tokens", 0)
+
+
+def _error_headers(error):
+    return getattr(getattr(error, "response", None), "headers", None)
+
+
+def _record_call(telemetry, started: float, queued: float, response=None, error=None) -> None:
+    """أزمنة انتظار الحصة والطلب نفسه، ونتيجته، والرموز المستهلكة"""
+    if not telemetry.enabled:
+        return
+    telemetry.observe("queue_wait", queued - started)
+    telemetry.observe("api", time.perf_counter() - queued)
+    if error is not None:
+        telemetry.inc("ai_requests_total", outcome=type(error).__name__)
+        return
+    telemetry.inc("ai_requests_total", outcome="ok")
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        telemetry.inc("ai_tokens_total", usage.prompt_tokens, direction="in")
+        telemetry.inc("ai_tokens_total", usage.completion_tokens, direction="out")
+
+
+def create_completion(client, max_wait=AI_RATE_MAX_WAIT_SECONDS, **request):
+    """طلب chat.completions عبر قاطع الدائرة ومحدد المعدل
+
+    CircuitOpenError فوراً إذا كان القاطع مفتوحاً، وRateLimitWaitError إذا
+    تطلبت الحصة انتظاراً أطول من max_wait (None = انتظار بلا حد).
+    """
+    breaker, limiter, telemetry = get_circuit_breaker(), get_rate_limiter(), get_telemetry()
+    breaker.before()
+    estimate = _estimate_tokens(request)
+    started = time.perf_counter()
+    try:
+        limiter.acquire(estimate, max_wait)
+    except BaseException:
+        breaker.release()
+        raise
+    queued = time.perf_counter()
+    try:
+        raw = client.chat.completions.with_raw_response.create(**request)
+    except Exception as e:
+        _record_call(telemetry, started, queued, error=e)
+        limiter.observe(_error_headers(e))
+        breaker.failure(e)
+        raise
+    except BaseException:
+        # إلغاء المهمة أو مقاطعة العملية ليس حكماً على الخدمة
+        breaker.release()
+        raise
+    limiter.observe(raw.headers)
+    breaker.success()
+    response = raw.parse()
+    # في التدفق يقيس api زمن الوصول إلى الرؤوس فقط؛ الباقي في مرحلة stream
+    _record_call(telemetry, started, queued, response)
+    if not request.get("stream") and response.usage is not None:
+        limiter.settle(estimate, response.usage.total_tokens)
+    return response
+
+
+async def create_completion_async(client, max_wait=AI_RATE_MAX_WAIT_SECONDS, **request):
+    """نسخة غير متزامنة من create_completion"""
+    breaker, limiter, telemetry = get_circuit_breaker(), get_rate_limiter(), get_telemetry()
+    breaker.before()
+    estimate = _estimate_tokens(request)
+    started = time.perf_counter()
+    try:
+        await limiter.acquire_async(estimate, max_wait)
+    except BaseException:
+        breaker.release()
+        raise
+    queued = time.perf_counter()
+    try:
+        raw = await client.chat.completions.with_raw_response.create(**request)
+    except Exception as e:
+        _record_call(telemetry, started, queued, error=e)
+        limiter.observe(_error_headers(e))
+        breaker.failure(e)
+        raise
+    except BaseException:
+        # إلغاء المهمة أو مقاطعة العملية ليس حكماً على الخدمة
+        breaker.release()
+        raise
+    limiter.observe(raw.headers)
+    breaker.success()
+    response = raw.parse()
+    # في التدفق يقيس api زمن الوصول إلى الرؤوس فقط؛ الباقي في مرحلة stream
+    _record_call(telemetry, started, queued, response)
+    if response.usage is not None:
+        limiter.settle(estimate, response.usage.total_tokens)
+    return response
+
+
+def get_openai_client(api_key: str, base_url=None):
+    """عميل OpenAI واحد لكل مفتاح بدلاً من عميل جديد لكل استمارة"""
+    key = (api_key, base_url or AI_BASE_URL)
+    client = _SYNC_CLIENTS.get(key)
+    if client is None:
+        from openai import OpenAI
+
+        # بدون إعادة محاولة داخلية: قاطع الدائرة ومحدد المعدل يقرران متى يُعاد الإرسال
+        client = _SYNC_CLIENTS[key] = OpenAI(
+            api_key=api_key, base_url=key[1], timeout=AI_TIMEOUT_SECONDS, max_retries=0
+        )
+    return client
+
+
+def analyze_form_ai(api_key: str, form_data: dict, base_url=None, model=None) -> dict:
+    if not OPENAI_AVAILABLE:
+        raise RuntimeError("OpenAI library not available in this environment.")
+
+    client = get_openai_client(api_key, base_url)
+
+    response = create_completion(
+        client,
+        messages=build_messages(form_data),
+        max_tokens=900,
+        **completion_options(model=model),
+    )
+
+    return parse_ai_response(response.choices[0].message.content)
+
+
+def analyze_form_ai_stream(api_key: str, form_data: dict, on_issue=None, base_url=None, model=None) -> dict:
+    """مثل analyze_form_ai لكن بالتدفق: on_issue(issue) يُستدعى لكل مشكلة فور اكتمالها"""
+    if not OPENAI_AVAILABLE:
+        raise RuntimeError("OpenAI library not available in this environment.")
+
+    client = get_openai_client(api_key, base_url)
+    parser = IssueStreamParser()
+    telemetry = get_telemetry()
+    started = time.perf_counter()
+    first_issue = True
+
+    stream = create_completion(
+        client,
+        messages=build_messages(form_data),
+        max_tokens=900,
+        stream=True,
+        **completion_options(model=model),
+    )
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        for issue in parser.feed(delta):
+            if first_issue:
+                telemetry.observe("first_issue", time.perf_counter() - started)
+                first_issue = False
+            if on_issue is not None:
+                on_issue(issue)
+
+    telemetry.observe("stream", time.perf_counter() - started)
+    return parser.result()
+
+# ---------------------------
+# Async AI Engine (concurrent)
+# ---------------------------
+# عملاء AsyncOpenAI مرتبطون بحلقة الأحداث التي أنشئوا فيها، لذلك المجمّع لكل حلقة ثم لكل مفتاح
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def get_async_openai_client(api_key: str, base_url=None):
+    if not OPENAI_AVAILABLE:
+        raise RuntimeError("OpenAI library not available in this environment.")
+
+    pool = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    key = (api_key, base_url or AI_BASE_URL)
+    client = pool.get(key)
+    if client is None:
+        from openai import AsyncOpenAI
+
+        client = pool[key] = AsyncOpenAI(
+            api_key=api_key, base_url=key[1], timeout=AI_TIMEOUT_SECONDS, max_retries=0
+        )
+    return client
+
+
+async def analyze_form_ai_async(
+    api_key: str, form_data: dict, base_url=None, max_wait=AI_RATE_MAX_WAIT_SECONDS, model=None
+) -> dict:
+    client = get_async_openai_client(api_key, base_url)
+
+    response = await create_completion_async(
+        client,
+        max_wait,
+        messages=build_messages(form_data),
+        max_tokens=900,
+        **completion_options(model=model),
+    )
+
+    return parse_ai_response(response.choices[0].message.content)
+
+
+async def analyze_forms_ai_async(records, api_key: str, concurrency: int = AI_CONCURRENCY, base_url=None, model=None):
+    """فحص عدة استمارات بالتوازي مع حد أقصى للطلبات الجارية
+
+    يعيد (index, result) لكل سجل فور اكتماله وليس بترتيب الإدخال. عند فشل
+    سجل يكون result هو الاستثناء نفسه حتى لا تتوقف بقية الدفعة.
+    """
+    concurrency = max(1, int(concurrency))
+
+    async def run(index, form_data):
+        try:
+            # الفحص الجماعي ينتظر سعة الحصة بدلاً من التحويل إلى القواعد
+            return index, await analyze_form_ai_async(api_key, form_data, base_url, max_wait=None, model=model)
+        except Exception as e:
+            return index, e
+
+    records = iter(enumerate(records))
+    pending = set()
+    try:
+        while True:
+            # نافذة محدودة: لا تُنشأ مهام جديدة إلا بقدر ما يكتمل
+            for index, form_data in records:
+                pending.add(asyncio.ensure_future(run(index, form_data)))
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # المستهلك توقف مبكراً أو أُلغي: لا تبقى طلبات معلقة بعد انتهاء المولّد
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+# ---------------------------
+# Micro-batched AI Engine (N forms per request)
+# ---------------------------
+AI_MAX_TOKENS_PER_FORM = 900
+AI_MAX_TOKENS = 16000
+
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+BATCH MODE: you will receive several forms in one message, each introduced by its record id in
+square brackets, e.g. [r12]. Analyze every form independently. Instead of a single result,
+respond with a JSON object only whose "results" array holds one object per form, each with an
+extra "id" field:
+{"results": [
+  {"id": "<record id>", "confidence_score": ..., "status": ..., "issues": [...], "summary": ...}
+]}
+Return exactly one object for every record id you received, and nothing else.
+"""
+
+
+def build_batch_message(items) -> str:
+    blocks = []
+    for record_id, form_data in items:
+        form_text = "\n".join([f"- {k}: {v}" for k, v in form_data.items() if v is not None and v != ""])
+        blocks.append(f"[{record_id}]\n{form_text}")
+    return (
+        f"Analyze these {len(blocks)} Arabic survey forms for logical contradictions:\n\n"
+        + "\n\n".join(blocks)
+        + "\n\nRespond with a JSON object only."
+    )
+
+
+def parse_batch_response(content) -> dict:
+    """يعيد {id: نتيجة} للسجلات الصالحة فقط؛ السجلات الناقصة أو المشوهة تُهمل لتُعاد لاحقاً
+
+    الرد المقطوع يُصلح فتُقبل السجلات المكتملة قبل موضع القطع.
+    """
+    with get_telemetry().timer("parse"):
+        return _parse_batch_response(content)
+
+
+def _parse_batch_response(content) -> dict:
+    try:
+        parsed = loads_lenient(content)
+    except ValueError:
+        return {}
+    if isinstance(parsed, dict):
+        parsed = parsed.get("results", [])
+    if not isinstance(parsed, list):
+        return {}
+
+    verdicts = {}
+    for item in parsed:
+        if not isinstance(item, dict) or "id" not in item:
+            continue
+        # سجل قُطع قبل اكتمال درجته وحالته لا يُقبل حتى لا تُخمن من مشكلات ناقصة
+        if not all(k in item for k in ("confidence_score", "status", "issues")):
+            continue
+        try:
+            verdict = validate_result(item)
+        except SchemaError:
+            continue
+        verdicts[str(verdict.pop("id")).strip("[] ")] = verdict
+    return verdicts
+
+
+async def analyze_forms_ai_batched_async(
+    records,
+    api_key: str,
+    batch_size: int = AI_BATCH_SIZE,
+    concurrency: int = AI_CONCURRENCY,
+    base_url=None,
+    usage=None,
+    model=None,
+):
+    """فحص الاستمارات على دفعات (عدة استمارات في طلب واحد) مع طلبات متزامنة
+
+    يعيد (index, result) مثل analyze_forms_ai_async. إذا أغفل النموذج بعض
+    السجلات يُعاد تقسيم الناقص فقط وإرساله، والسجل المنفرد يُرسل بالصيغة العادية.
+    usage (اختياري) قاموس يُجمع فيه عدد الطلبات والرموز المستهلكة.
+    """
+    records = list(records)
+    batch_size = max(1, int(batch_size))
+    work = deque(list(range(i, min(i + batch_size, len(records)))) for i in range(0, len(records), batch_size))
+    out = asyncio.Queue()
+    client = get_async_openai_client(api_key, base_url)
+    if usage is not None:
+        for k in ("requests", "prompt_tokens", "completion_tokens"):
+            usage.setdefault(k, 0)
+
+    async def request(indices):
+        if len(indices) == 1:
+            index = indices[0]
+            response = await create_completion_async(
+                client,
+                None,
+                messages=build_messages(records[index]),
+                max_tokens=AI_MAX_TOKENS_PER_FORM,
+                **completion_options(model=model),
+            )
+            verdicts = {f"r{index}": parse_ai_response(response.choices[0].message.content)}
+        else:
+            items = [(f"r{i}", records[i]) for i in indices]
+            response = await create_completion_async(
+                client,
+                None,
+                messages=[
+                    {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": build_batch_message(items)},
+                ],
+                max_tokens=min(AI_MAX_TOKENS_PER_FORM * len(items), AI_MAX_TOKENS),
+                **completion_options(batch=True, model=model),
+            )
+            verdicts = parse_batch_response(response.choices[0].message.content)
+        if usage is not None:
+            usage["requests"] += 1
+            if response.usage is not None:
+                usage["prompt_tokens"] += response.usage.prompt_tokens
+                usage["completion_tokens"] += response.usage.completion_tokens
+        return verdicts
+
+    async def worker():
+        while work:
+            indices = work.popleft()
+            try:
+                verdicts = await request(indices)
+            except Exception as e:
+                for index in indices:
+                    out.put_nowait((index, e))
+                continue
+
+            missing = []
+            for index in indices:
+                verdict = verdicts.get(f"r{index}")
+                if verdict is None:
+                    missing.append(index)
+                else:
+                    out.put_nowait((index, verdict))
+            if missing:
+                half = (len(missing) + 1) // 2
+                work.append(missing[:half])
+                if missing[half:]:
+                    work.append(missing[half:])
+
+    def stopped(task):
+        # عامل توقف باستثناء غير Exception (إلغاء أو مقاطعة): إيقاظ المستهلك بدل انتظار out للأبد
+        if task.cancelled() or task.exception() is not None:
+            out.put_nowait((None, task))
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, int(concurrency)))]
+    for task in workers:
+        task.add_done_callback(stopped)
+    try:
+        for _ in range(len(records)):
+            index, verdict = await out.get()
+            if index is None:
+                if verdict.cancelled():
+                    raise asyncio.CancelledError()
+                raise verdict.exception()
+            yield index, verdict
+    finally:
+        for task in workers:
+            task.remove_done_callback(stopped)
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+class AIEventLoop:
+    """حلقة أحداث دائمة في خيط خلفي حتى تبقى اتصالات العميل مفتوحة بين الطلبات"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="guardian-ai-loop", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def iter_forms(
+        self, records, api_key: str, concurrency: int = AI_CONCURRENCY, batch_size: int = 1, usage=None, base_url=None,
+        model=None,
+    ):
+        """نسخة متزامنة من analyze_forms_ai_async لاستخدامها من Streamlit"""
+        results = queue.Queue()
+        done = object()
+
+        async def pump():
+            if batch_size > 1:
+                stream = analyze_forms_ai_batched_async(records, api_key, batch_size, concurrency, base_url, usage, model)
+            else:
+                stream = analyze_forms_ai_async(records, api_key, concurrency, base_url, model)
+            try:
+                async for item in stream:
+                    results.put(item)
+            finally:
+                results.put(done)
+
+        future = self.submit(pump())
+        finished = False
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    finished = True
+                    break
+                yield item
+        finally:
+            if not finished:
+                # توقف المستهلك قبل النهاية يلغي pump وطلباته الجارية
+                future.cancel()
+        future.result()
+
+
+_AI_LOOP = None
+_AI_LOOP_LOCK = threading.Lock()
+
+
+def get_ai_loop() -> AIEventLoop:
+    """حلقة AI المشتركة على مستوى العملية"""
+    global _AI_LOOP
+    with _AI_LOOP_LOCK:
+        if _AI_LOOP is None:
+            _AI_LOOP = AIEventLoop()
+        return _AI_LOOP
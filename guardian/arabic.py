@@ -0,0 +1,78 @@
+"""تطبيع النص العربي ومطابقة العبارات لقيم الاستمارات الحرة
+
+    normalize_arabic("الإنجليزيّة") == normalize_arabic("الانجليزية")
+
+التطبيع يوحّد صور الألف والهمزة والتاء المربوطة والألف المقصورة، ويحذف التشكيل
+والتطويل، ويوحّد الأرقام وحالة الأحرف اللاتينية والمسافات، بجدول str.translate
+واحد محسوب مسبقاً. PhraseIndex شجرة كلمات (trie) لأطول مطابقة لعبارة داخل نص.
+"""
+import re
+
+_TABLE = {
+    **dict.fromkeys(range(0x0610, 0x061B)),  # علامات قرآنية
+    **dict.fromkeys(range(0x064B, 0x0660)),  # التشكيل
+    0x0670: None,                            # ألف خنجرية
+    **dict.fromkeys(range(0x06D6, 0x06EE)),  # علامات المصحف
+    0x0640: None,                            # التطويل
+    **{ord(c): "ا" for c in "أإآٱ"},
+    ord("ى"): "ي",
+    ord("ة"): "ه",
+    ord("ؤ"): "و",
+    ord("ئ"): "ي",
+    ord("ی"): "ي",
+    ord("ک"): "ك",
+    **{0x0660 + d: str(d) for d in range(10)},
+    **{0x06F0 + d: str(d) for d in range(10)},
+}
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_arabic(text: str) -> str:
+    """صيغة موحدة للمقارنة (لا للعرض)"""
+    return " ".join(str(text).translate(_TABLE).casefold().split())
+
+
+def _stem(word: str) -> str:
+    # تجريد خفيف: أداة التعريف وتاء التأنيث (بعد التطبيع: ه)، فـ"المهندسة" = "مهندس"
+    if word.startswith("ال") and len(word) > 4:
+        word = word[2:]
+    if word.endswith("ه") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+def phrase_words(text: str) -> tuple:
+    """كلمات النص بعد التطبيع والتجريد الخفيف (بلا علامات ترقيم)"""
+    return tuple(_stem(word) for word in _WORD.findall(normalize_arabic(text)))
+
+
+class PhraseIndex:
+    """شجرة كلمات: عبارة -> قيمة، والبحث يعيد قيمة أطول عبارة داخل النص"""
+
+    _END = ""  # لا توجد كلمة فارغة، فالمفتاح آمن داخل العقد
+
+    def __init__(self, entries=()):
+        self.root = {}
+        for phrase, value in entries:
+            self.add(phrase, value)
+
+    def add(self, phrase: str, value) -> None:
+        node = self.root
+        for word in phrase_words(phrase):
+            node = node.setdefault(word, {})
+        node[self._END] = value
+
+    def match(self, text: str):
+        """قيمة أطول عبارة مطابقة (الأسبق عند التساوي)، أو None"""
+        words = phrase_words(text)
+        best, best_length = None, 0
+        for start in range(len(words)):
+            node = self.root
+            for end in range(start, len(words)):
+                node = node.get(words[end])
+                if node is None:
+                    break
+                if self._END in node and end - start + 1 > best_length:
+                    best, best_length = node[self._END], end - start + 1
+        return best
@@ -0,0 +1,198 @@
+"""واجهات نموذج الفحص القابلة للاختيار لكل نشر (GUARDIAN_AI_BACKEND)
+
+    openai      OpenAI العامة (يتطلب مفتاحاً)
+    local       خادم محلي متوافق مع OpenAI (llama.cpp / vLLM): البيانات لا تغادر المنشأة
+    classifier  مصنف على المعالج مدرب من أحكام القواعد وAI (python -m guardian.classifier)
+
+كل واجهة تعيد نتيجة بنفس مخطط AI، وأي خطأ منها يحوّل الاستمارة إلى القواعد في
+pipeline كما في مسار OpenAI. version يدخل في مفتاح ذاكرة النتائج.
+"""
+import importlib.util
+import json
+import os
+import threading
+import time
+
+from .ai import (
+    OPENAI_AVAILABLE,
+    analyze_form_ai,
+    analyze_form_ai_async,
+    analyze_form_ai_stream,
+    get_ai_loop,
+    prompt_version,
+)
+from .config import (
+    AI_BACKEND,
+    AI_BASE_URL,
+    AI_MODEL,
+    AI_RATE_MAX_WAIT_SECONDS,
+    CLASSIFIER_MODEL_PATH,
+    CLASSIFIER_THRESHOLD,
+    LOCAL_AI_MODEL,
+    LOCAL_AI_URL,
+    VERDICT_LOG_PATH,
+)
+from .telemetry import get_telemetry
+
+# المصنف يحتاج numpy؛ الفحص دون استيرادها حتى لا تُحمّل مع guardian
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+BACKENDS = {
+    "openai": "OpenAI",
+    "local": "خادم محلي متوافق مع OpenAI",
+    "classifier": "مصنف محلي على المعالج",
+}
+
+
+class ChatBackend:
+    """نموذج محادثة عبر chat.completions، عبر قاطع الدائرة ومحدد المعدل نفسيهما"""
+
+    # أحكامه تُسجل في GUARDIAN_VERDICT_LOG لتدريب المصنف
+    teaches = True
+
+    def __init__(self, name: str, base_url=None, model: str = AI_MODEL, require_key: bool = True):
+        self.name = name
+        self.base_url = base_url
+        self.model = model
+        self.require_key = require_key
+        self.version = prompt_version(model)
+
+    def available(self, api_key: str) -> bool:
+        return OPENAI_AVAILABLE and (bool(api_key) or not self.require_key)
+
+    def _key(self, api_key: str) -> str:
+        # مكتبة openai ترفض المفتاح الفارغ، والخوادم المحلية تتجاهله عادة
+        return api_key or "local"
+
+    def analyze(self, api_key: str, form_data: dict, on_issue=None) -> dict:
+        if on_issue is None:
+            return analyze_form_ai(self._key(api_key), form_data, self.base_url, self.model)
+        return analyze_form_ai_stream(self._key(api_key), form_data, on_issue, self.base_url, self.model)
+
+    async def analyze_async(self, api_key: str, form_data: dict, max_wait=AI_RATE_MAX_WAIT_SECONDS) -> dict:
+        return await analyze_form_ai_async(self._key(api_key), form_data, self.base_url, max_wait, self.model)
+
+    def warm_up(self) -> None:
+        """استيراد مكتبة openai مسبقاً (نصف ثانية تقريباً) بدلاً من أول فحص"""
+        if OPENAI_AVAILABLE:
+            importlib.import_module("openai")
+
+    def iter_forms(self, records, api_key: str, concurrency: int, batch_size: int = 1, usage=None):
+        """(index, result أو استثناء) لكل سجل فور اكتماله"""
+        return get_ai_loop().iter_forms(
+            records, self._key(api_key), concurrency, batch_size, usage, self.base_url, self.model
+        )
+
+
+class ClassifierBackend:
+    """المصنف المحلي: بضع ميكروثوانٍ لكل استمارة دون شبكة ولا حصة"""
+
+    name = "classifier"
+    teaches = False
+
+    def __init__(self, path=CLASSIFIER_MODEL_PATH, threshold: float = CLASSIFIER_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        # ((المسار، العتبة)، المصنف، الإصدار): version يُقرأ مع كل مفتاح ذاكرة
+        self._loaded = None
+
+    def _load(self):
+        key = (self.path, self.threshold)
+        loaded = self._loaded
+        if loaded is None or loaded[0] != key:
+            if self.path is None:
+                raise RuntimeError("GUARDIAN_CLASSIFIER_MODEL is not set.")
+            if not NUMPY_AVAILABLE:
+                raise RuntimeError("numpy is required for the classifier backend.")
+            from .classifier import load_classifier
+
+            model = load_classifier(self.path)
+            loaded = self._loaded = (key, model, f"clf:{model.version}:{self.threshold}")
+        return loaded
+
+    @property
+    def model(self):
+        return self._load()[1]
+
+    @property
+    def version(self) -> str:
+        return self._load()[2]
+
+    def available(self, api_key: str) -> bool:
+        return NUMPY_AVAILABLE and self.path is not None and os.path.exists(self.path)
+
+    def analyze(self, api_key: str, form_data: dict, on_issue=None) -> dict:
+        with get_telemetry().timer("classifier"):
+            result = self.model.predict(form_data, self.threshold)
+        if on_issue is not None:
+            for issue in result["issues"]:
+                on_issue(issue)
+        return result
+
+    async def analyze_async(self, api_key: str, form_data: dict, max_wait=None) -> dict:
+        return self.analyze(api_key, form_data)
+
+    def warm_up(self) -> None:
+        """تحميل numpy وملف المصنف مسبقاً"""
+        if self.available(""):
+            self.model
+
+    def iter_forms(self, records, api_key: str, concurrency: int = 1, batch_size: int = 1, usage=None):
+        for index, form_data in enumerate(records):
+            try:
+                yield index, self.analyze(api_key, form_data)
+            except Exception as e:
+                yield index, e
+
+
+def create_backend(name: str = AI_BACKEND):
+    if name == "openai":
+        return ChatBackend("openai", AI_BASE_URL, AI_MODEL)
+    if name == "local":
+        return ChatBackend("local", LOCAL_AI_URL, LOCAL_AI_MODEL, require_key=False)
+    if name == "classifier":
+        return ClassifierBackend()
+    raise ValueError(f"unknown AI backend {name!r} (expected one of: {', '.join(BACKENDS)})")
+
+
+_BACKEND = None
+_BACKEND_LOCK = threading.Lock()
+
+
+def get_backend():
+    """الواجهة المختارة في GUARDIAN_AI_BACKEND على مستوى العملية"""
+    global _BACKEND
+    with _BACKEND_LOCK:
+        if _BACKEND is None:
+            _BACKEND = create_backend()
+        return _BACKEND
+
+# ---------------------------
+# Verdict Log (classifier training data)
+# ---------------------------
+class VerdictLog:
+    """سطر JSON لكل حكم نموذج: {"form", "result", "source", "ts"}"""
+
+    def __init__(self, path=VERDICT_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, form_data: dict, result: dict, source: str) -> None:
+        if self.path is None:
+            return
+        line = json.dumps(
+            {"form": form_data, "result": result, "source": source, "ts": time.time()}, ensure_ascii=False, default=str
+        )
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+        except OSError:
+            pass
+
+
+_VERDICT_LOG = VerdictLog()
+
+
+def get_verdict_log() -> VerdictLog:
+    """سجل الأحكام المشترك على مستوى العملية"""
+    return _VERDICT_LOG
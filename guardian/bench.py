@@ -0,0 +1,312 @@
+"""قياس أداء المحركات على بيانات اصطناعية، بمخرجات JSON لتتبع التراجعات
+
+    python -m guardian.bench --records 50000 -o bench.json
+    python -m guardian.bench --suites rules_single,cache --records 100000
+
+لكل مجموعة: عدد السجلات، الزمن، السجلات/ثانية، زمن الاستجابة p50/p95/p99 (لكل
+سجل أو لكل دفعة حسب latency_unit)، وذروة الذاكرة RSS حتى نهاية المجموعة.
+مسار AI يُقاس على خادم محاكاة محلي (guardian.mockserver) دون أي رصيد.
+cold_start يقيس في عمليات Python جديدة زمن استيراد guardian وأول تشغيل لـ app.py.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from .cache import ResultCache, form_cache_key
+from .config import AI_BATCH_SIZE, AI_CONCURRENCY
+from .rules import RULESET, evaluate_rules
+from .synthetic import generate_forms
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SUITES = ("rules_single", "rules_batch", "rules_parallel", "cache", "ai", "cold_start")
+
+
+def _peak_rss_mb(children: bool = False):
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux بالكيلوبايت، macOS بالبايت
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(records: int, elapsed: float, latencies=None, unit: str = "record") -> dict:
+    """latencies بالثواني"""
+    summary = {
+        "records": records,
+        "elapsed_s": round(elapsed, 4),
+        "records_per_sec": round(records / elapsed, 1) if elapsed > 0 else None,
+    }
+    if latencies:
+        ordered = sorted(latencies)
+        summary["latency_unit"] = unit
+        for q in (50, 95, 99):
+            summary[f"p{q}_ms"] = round(_percentile(ordered, q) * 1000, 4)
+    summary["peak_rss_mb"] = _peak_rss_mb()
+    return summary
+
+# ---------------------------
+# Suites
+# ---------------------------
+def bench_rules_single(forms, **_) -> dict:
+    latencies = []
+    clock = time.perf_counter
+    started = clock()
+    for form_data in forms:
+        t = clock()
+        evaluate_rules(form_data)
+        latencies.append(clock() - t)
+    return summarize(len(forms), clock() - started, latencies)
+
+
+def bench_rules_batch(forms, chunk_size: int = 10000, **_) -> dict:
+    try:
+        import pandas as pd
+
+        from .batch import analyze_forms_batch
+    except ImportError as e:
+        return {"skipped": f"pandas/numpy not available: {e}"}
+
+    frames = [pd.DataFrame(forms[i:i + chunk_size]) for i in range(0, len(forms), chunk_size)]
+    latencies = []
+    started = time.perf_counter()
+    for frame in frames:
+        t = time.perf_counter()
+        analyze_forms_batch(frame)
+        latencies.append(time.perf_counter() - t)
+    return summarize(len(forms), time.perf_counter() - started, latencies, unit=f"chunk of {chunk_size}")
+
+
+def bench_rules_parallel(forms, workers=None, **_) -> dict:
+    from .parallel import ParallelExecutor, default_workers
+    from .stream import process_chunk
+
+    workers = workers or default_workers()
+    latencies = []
+    with ParallelExecutor(workers) as executor:
+        started = last = time.perf_counter()
+        # زمن وصول كل دفعة بعد سابقتها (بما فيه التحليل والتنسيق في العامل والنقل)
+        for _ in executor.map_chunks(process_chunk, forms, "ndjson"):
+            now = time.perf_counter()
+            latencies.append(now - last)
+            last = now
+        elapsed = time.perf_counter() - started
+    summary = summarize(len(forms), elapsed, latencies, unit="chunk")
+    summary["workers"] = workers
+    summary["peak_rss_children_mb"] = _peak_rss_mb(children=True)
+    return summary
+
+
+def _bench_cache_lookups(cache, keys) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for key in keys:
+        t = time.perf_counter()
+        cache.get(key)
+        latencies.append(time.perf_counter() - t)
+    return summarize(len(keys), time.perf_counter() - started, latencies)
+
+
+def bench_cache(forms, **_) -> dict:
+    started = time.perf_counter()
+    keys = [form_cache_key(form_data, RULESET.version) for form_data in forms]
+    hashing = summarize(len(forms), time.perf_counter() - started)
+    verdicts = [evaluate_rules(form_data) for form_data in forms]
+
+    memory = ResultCache(max_entries=len(keys))
+    for key, verdict in zip(keys, verdicts):
+        memory.set(key, verdict)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench-cache.db")
+        disk = ResultCache(max_entries=len(keys), db_path=path)
+        started = time.perf_counter()
+        for key, verdict in zip(keys, verdicts):
+            disk.set(key, verdict)
+        disk_write = summarize(len(keys), time.perf_counter() - started)
+        # نسخة جديدة بذاكرة فارغة: كل قراءة تأتي من SQLite
+        disk_read = _bench_cache_lookups(ResultCache(max_entries=len(keys), db_path=path), keys)
+
+    return {
+        "key_hashing": hashing,
+        "memory_hit": _bench_cache_lookups(memory, keys),
+        "disk_write": disk_write,
+        "disk_hit": disk_read,
+    }
+
+
+def bench_ai(forms, ai_records: int = 200, ai_latency_ms: float = 50, ai_concurrency: int = AI_CONCURRENCY,
+             ai_batch_size: int = AI_BATCH_SIZE, **_) -> dict:
+    from .ai import OPENAI_AVAILABLE, AIEventLoop, analyze_form_ai_async
+    from .mockserver import start_mock_server
+
+    if not OPENAI_AVAILABLE:
+        return {"skipped": "openai library not available"}
+
+    server = start_mock_server(latency_ms=ai_latency_ms)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    forms = forms[:ai_records]
+    loop = AIEventLoop()
+    try:
+        single_count = min(len(forms), 50)
+        latencies = []
+        started = time.perf_counter()
+        for form_data in forms[:single_count]:
+            t = time.perf_counter()
+            loop.submit(analyze_form_ai_async("mock", form_data, base_url)).result()
+            latencies.append(time.perf_counter() - t)
+        results = {"single": summarize(single_count, time.perf_counter() - started, latencies)}
+
+        for name, batch_size in (("concurrent", 1), ("batched", ai_batch_size)):
+            usage = {}
+            started = time.perf_counter()
+            failures = sum(
+                isinstance(result, Exception)
+                for _, result in loop.iter_forms(forms, "mock", ai_concurrency, batch_size, usage, base_url)
+            )
+            results[name] = summarize(len(forms), time.perf_counter() - started)
+            results[name].update({
+                "concurrency": ai_concurrency, "batch_size": batch_size, "failures": failures, **usage,
+            })
+        results["mock_latency_ms"] = ai_latency_ms
+        return results
+    finally:
+        loop.loop.call_soon_threadsafe(loop.loop.stop)
+        server.shutdown()
+
+
+# كل قياس في عملية جديدة تطبع JSON: {"seconds", "loaded"} حيث loaded المكتبات الثقيلة المحملة
+_HEAVY_MODULES = ("pandas", "numpy", "openai", "pyarrow")
+_COLD_IMPORT = """
+import json, sys, time
+started = time.perf_counter()
+import guardian
+print(json.dumps({"seconds": time.perf_counter() - started, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (_HEAVY_MODULES,)
+_COLD_PAINT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+app = AppTest.from_file(%r, default_timeout=120).run()
+seconds = time.perf_counter() - started
+if app.exception:
+    raise SystemExit(app.exception[0].value)
+print(json.dumps({"seconds": seconds, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def _cold_runs(code: str, repeats: int) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.environ.get("PYTHONPATH")))))
+    latencies, loaded = [], set()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        done = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=root)
+        if done.returncode != 0:
+            return {"failed": (done.stderr or done.stdout).strip().splitlines()[-1:]}
+        run = json.loads(done.stdout.strip().splitlines()[-1])
+        latencies.append(run["seconds"])
+        loaded.update(run["loaded"])
+    summary = summarize(repeats, time.perf_counter() - started, latencies, "process")
+    summary["peak_rss_mb"] = _peak_rss_mb(children=True)
+    summary["heavy_modules_loaded"] = sorted(loaded)
+    return summary
+
+
+def bench_cold_start(forms, cold_repeats: int = 5, **_) -> dict:
+    """زمن البدء البارد الذي يحسبه مُوسِّع الحاويات: استيراد المكتبة وأول عرض للواجهة"""
+    results = {"import_guardian": _cold_runs(_COLD_IMPORT, cold_repeats)}
+    app = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+    if importlib.util.find_spec("streamlit") is None:
+        results["first_paint"] = {"skipped": "streamlit not available"}
+    elif os.path.exists(app):
+        results["first_paint"] = _cold_runs(_COLD_PAINT % (app, _HEAVY_MODULES), cold_repeats)
+    return results
+
+
+BENCHMARKS = {
+    "rules_single": bench_rules_single,
+    "rules_batch": bench_rules_batch,
+    "rules_parallel": bench_rules_parallel,
+    "cache": bench_cache,
+    "ai": bench_ai,
+    "cold_start": bench_cold_start,
+}
+
+
+def run_benchmarks(suites=SUITES, records: int = 20000, seed: int = 0, contradiction_rate: float = 0.2, **options) -> dict:
+    started = time.perf_counter()
+    forms = list(generate_forms(records, seed, contradiction_rate))
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ruleset_version": RULESET.version,
+            "records": records,
+            "seed": seed,
+            "contradiction_rate": contradiction_rate,
+            "generate_s": round(time.perf_counter() - started, 3),
+        },
+        "results": {},
+    }
+    for name in suites:
+        report["results"][name] = BENCHMARKS[name](forms, **options)
+    report["meta"]["peak_rss_mb"] = _peak_rss_mb()
+    return report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Smart Semantic Guardian engines on synthetic forms")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"comma-separated subset of {', '.join(SUITES)}")
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--contradiction-rate", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=None, help="processes for rules_parallel (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows per DataFrame in rules_batch")
+    parser.add_argument("--ai-records", type=int, default=200)
+    parser.add_argument("--ai-latency-ms", type=float, default=50)
+    parser.add_argument("--ai-concurrency", type=int, default=AI_CONCURRENCY)
+    parser.add_argument("--ai-batch-size", type=int, default=AI_BATCH_SIZE)
+    parser.add_argument("--cold-repeats", type=int, default=5, help="fresh interpreters per cold_start measurement")
+    parser.add_argument("-o", "--output", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    suites = [name.strip() for name in args.suites.split(",") if name.strip()]
+    unknown = [name for name in suites if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    report = run_benchmarks(
+        suites, args.records, args.seed, args.contradiction_rate,
+        workers=args.workers, chunk_size=args.chunk_size, ai_records=args.ai_records,
+        ai_latency_ms=args.ai_latency_ms, ai_concurrency=args.ai_concurrency, ai_batch_size=args.ai_batch_size,
+        cold_repeats=args.cold_repeats,
+    )
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""ذاكرة نتائج الفحص مفهرسة بمحتوى الاستمارة"""
+import hashlib
+import json
+import numbers
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .arabic import normalize_arabic
+from .config import CACHE_DB_PATH, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS
+
+
+def _normalize_value(value):
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            number = float(value)
+        except ValueError:
+            # صيغ الكتابة المتكافئة ("أعزب" و"اعزب") لها حكم واحد
+            return normalize_arabic(value)
+        return int(number) if number.is_integer() else number
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, numbers.Real):
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    return str(value)
+
+
+def canonical_form(form_data: dict) -> dict:
+    """نفس ما يُرسل للنموذج: بدون القيم الفارغة، والأرقام بصيغة موحدة، والنصوص مطبّعة"""
+    return {
+        str(k): _normalize_value(v)
+        for k, v in sorted(form_data.items(), key=lambda kv: str(kv[0]))
+        if v is not None and v != ""
+    }
+
+
+def form_cache_key(form_data: dict, version: str) -> str:
+    payload = json.dumps(
+        {"v": version, "form": canonical_form(form_data)},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """ذاكرة نتائج بطبقتين: LRU في الذاكرة مع TTL، وطبقة SQLite اختيارية تبقى بعد إعادة التشغيل
+
+    القيم المعادة مشتركة بين الطلبات ويجب عدم تعديلها.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: float = CACHE_TTL_SECONDS, db_path=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits_memory += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM results WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self.hits_disk += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at),
+                )
+
+    def _store(self, key: str, value, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                del self._entries[key]
+            if self._db is not None:
+                self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+
+    def stats(self) -> dict:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+        }
+
+
+_RESULT_CACHE = None
+_RESULT_CACHE_LOCK = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """ذاكرة النتائج المشتركة على مستوى العملية"""
+    global _RESULT_CACHE
+    with _RESULT_CACHE_LOCK:
+        if _RESULT_CACHE is None:
+            _RESULT_CACHE = ResultCache(db_path=CACHE_DB_PATH)
+        return _RESULT_CACHE
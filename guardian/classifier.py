@@ -0,0 +1,323 @@
+"""مصنف محلي على المعالج يتنبأ بمجموعة المشكلات مباشرة (GUARDIAN_AI_BACKEND=classifier)
+
+    python -m guardian.classifier train --synthetic 50000 --extracts wave1.csv.gz --verdicts verdicts.ndjson -o model.json
+    python -m guardian.classifier eval model.json --synthetic 10000 --seed 99
+
+انحدار لوجستي متعدد التسميات (تسمية لكل نوع مشكلة: معرف القاعدة، أو حقلا مشكلة AI)
+على سمات ثنائية: قيم الحقول بعد التطبيع، وفئات القيم الرقمية والفروق بينها. أحكام
+القواعد تُحسب على المستخرجات والبيانات الاصطناعية مباشرة، وأحكام AI من سجل
+GUARDIAN_VERDICT_LOG. التنبؤ جمع أوزان السمات الموجودة في الاستمارة.
+
+هذه الوحدة تعتمد على numpy، ولا تُستورد إلا عند اختيار المصنف أو تدريبه.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from .arabic import normalize_arabic
+from .occupations import education_rank, match_job_title
+from .rules import FIELD_OPTIONS, RULESET, evaluate_form, score_issues
+
+FORMAT = "guardian-classifier-1"
+
+# ---------------------------
+# Features
+# ---------------------------
+CATEGORICAL_FIELDS = tuple(FIELD_OPTIONS)
+
+NUMERIC_BINS = {
+    "Age": (*range(16, 31), 35, 40, 45, 50, 55, 60, 65, 70),
+    "Years Experience": (1, 2, 3, 5, 8, 10, 15, 20, 25, 30, 40),
+    "Monthly Salary": (1, 3000, 5000, 7500, 10000, 15000, 20000, 30000, 50000),
+    "Children": (1, 2, 3, 4, 5, 6),
+    "Family Members": (2, 3, 4, 5, 6, 8, 10),
+}
+
+# فروق بين الحقول: الخبرة مقابل سنوات العمل، والعمر والمؤهل مقابل متطلبات المهنة
+DIFFERENCE_BINS = (-10, -5, -2, -1, 0, 1, 2, 5, 10)
+
+
+def _number(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=16384)
+def _category_token(field: str, value) -> str:
+    return f"{field}={normalize_arabic(value)}"
+
+
+def featurize(form_data: dict) -> list:
+    """أسماء السمات الثنائية الموجودة في الاستمارة"""
+    tokens = []
+    for field in CATEGORICAL_FIELDS:
+        value = form_data.get(field)
+        if value not in (None, ""):
+            tokens.append(_category_token(field, value))
+
+    numbers = {}
+    for field, bins in NUMERIC_BINS.items():
+        value = numbers[field] = _number(form_data.get(field))
+        if value is not None:
+            tokens.append(f"{field}#{bisect_right(bins, value)}")
+
+    age, years = numbers["Age"], numbers["Years Experience"]
+    if age is not None and years is not None:
+        tokens.append(f"experience_margin#{bisect_right(DIFFERENCE_BINS, years - (age - 18))}")
+
+    occupation = match_job_title(str(form_data.get("Job Title") or ""))
+    if occupation is not None:
+        tokens.append(f"job={occupation.code}")
+        if age is not None:
+            tokens.append(f"job_age_margin#{bisect_right(DIFFERENCE_BINS, age - occupation.min_age)}")
+        rank = education_rank(str(form_data.get("Education") or ""))
+        if rank is not None:
+            tokens.append(f"job_education_gap#{bisect_right(DIFFERENCE_BINS, rank - occupation.education_rank)}")
+    return tokens
+
+# ---------------------------
+# Labels
+# ---------------------------
+def _field_pair(field_1, field_2) -> tuple:
+    return tuple(sorted((normalize_arabic(field_1 or ""), normalize_arabic(field_2 or ""))))
+
+
+# مشكلة AI على حقلي قاعدة معروفة تُعد نفس التسمية حتى لا تتكرر المشكلة مرتين
+_RULE_PAIRS = Counter(_field_pair(rule.issue["field_1"], rule.issue["field_2"]) for rule in RULESET.rules)
+_RULE_BY_PAIR = {
+    _field_pair(rule.issue["field_1"], rule.issue["field_2"]): rule.id
+    for rule in RULESET.rules
+    if _RULE_PAIRS[_field_pair(rule.issue["field_1"], rule.issue["field_2"])] == 1
+}
+
+
+def issue_label(issue: dict) -> str:
+    if issue.get("rule"):
+        return issue["rule"]
+    pair = _field_pair(issue.get("field_1"), issue.get("field_2"))
+    return _RULE_BY_PAIR.get(pair) or "ai:" + "|".join(pair)
+
+# ---------------------------
+# Model
+# ---------------------------
+class IssueClassifier:
+    def __init__(self, vocabulary, labels, weights, bias, exemplars, meta=None):
+        self.vocabulary = list(vocabulary)
+        self.labels = list(labels)
+        self.index = {token: i for i, token in enumerate(self.vocabulary)}
+        # بدقة الملف المحفوظ حتى يتطابق version بعد التدريب وبعد التحميل
+        self.weights = np.asarray(weights, dtype=np.float64).reshape(len(self.vocabulary), len(self.labels)).round(5)
+        self.bias = np.asarray(bias, dtype=np.float64).round(5)
+        self.exemplars = dict(exemplars)
+        self.meta = dict(meta or {})
+        digest = hashlib.sha1(json.dumps([self.vocabulary, self.labels], ensure_ascii=False).encode("utf-8"))
+        digest.update(self.weights.tobytes())
+        digest.update(self.bias.tobytes())
+        self.version = digest.hexdigest()[:8]
+        self._rules = {rule.id: rule for rule in RULESET.rules}
+
+    @classmethod
+    def train(cls, pairs, epochs: int = 300, learning_rate: float = 0.1, l2: float = 1e-4, min_count: int = 3):
+        """pairs: (form_data, verdict) من أحكام القواعد أو AI؛ Adam على الخسارة اللوجستية"""
+        rows, row_labels = [], []
+        counts, exemplars = Counter(), {}
+        for form_data, verdict in pairs:
+            tokens = featurize(form_data)
+            labels = set()
+            for issue in verdict.get("issues", []):
+                label = issue_label(issue)
+                labels.add(label)
+                exemplars.setdefault(label, issue)
+            rows.append(tokens)
+            row_labels.append(labels)
+            counts.update(set(tokens))
+        if not rows:
+            raise ValueError("no training records")
+
+        vocabulary = sorted(token for token, n in counts.items() if n >= min_count)
+        labels = sorted(exemplars)
+        index = {token: i for i, token in enumerate(vocabulary)}
+        label_index = {label: j for j, label in enumerate(labels)}
+        x = np.zeros((len(rows), len(vocabulary)), dtype=np.float32)
+        y = np.zeros((len(rows), len(labels)), dtype=np.float32)
+        for i, (tokens, found) in enumerate(zip(rows, row_labels)):
+            x[i, [index[t] for t in tokens if t in index]] = 1
+            y[i, [label_index[label] for label in found]] = 1
+
+        n = len(rows)
+        prior = np.clip(y.mean(axis=0), 1e-4, 1 - 1e-4)
+        weights = np.zeros((len(vocabulary), len(labels)), dtype=np.float32)
+        bias = np.log(prior / (1 - prior)).astype(np.float32)
+        params = [weights, bias]
+        moments = [(np.zeros_like(p), np.zeros_like(p)) for p in params]
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        for step in range(1, epochs + 1):
+            error = 1 / (1 + np.exp(-(x @ weights + bias))) - y
+            grads = [x.T @ error / n + l2 * weights, error.mean(axis=0)]
+            for p, g, (m, v) in zip(params, grads, moments):
+                m *= beta1
+                m += (1 - beta1) * g
+                v *= beta2
+                v += (1 - beta2) * g * g
+                p -= learning_rate * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + eps)
+
+        meta = {"rows": n, "epochs": epochs, "ruleset_version": RULESET.version, "trained_at": time.time()}
+        return cls(vocabulary, labels, weights, bias, exemplars, meta)
+
+    def logits(self, form_data: dict):
+        indexes = [i for token in featurize(form_data) if (i := self.index.get(token)) is not None]
+        return self.bias + self.weights.take(indexes, axis=0).sum(axis=0)
+
+    def probabilities(self, form_data: dict) -> dict:
+        return dict(zip(self.labels, (1 / (1 + np.exp(-self.logits(form_data)))).tolist()))
+
+    def predict(self, form_data: dict, threshold: float = 0.5) -> dict:
+        """نتيجة بنفس مخطط evaluate_rules؛ مشكلات القواعد بنصوصها الفعلية، ومشكلات AI بمثال من التدريب"""
+        values = None
+        issues = []
+        # مقارنة اللوجيت بلوجيت الحد تغني عن حساب الاحتمالات
+        cutoff = np.log(threshold / (1 - threshold))
+        for j in np.flatnonzero(self.logits(form_data) >= cutoff).tolist():
+            label = self.labels[j]
+            rule = self._rules.get(label)
+            if rule is not None:
+                if values is None:
+                    values, _ = RULESET.extract(form_data)
+                issues.append(rule.build_issue(values))
+            else:
+                issues.append(dict(self.exemplars[label]))
+        confidence, status, summary = score_issues(len(issues))
+        return {"confidence_score": confidence, "status": status, "issues": issues, "summary": summary}
+
+    def to_dict(self) -> dict:
+        return {
+            "format": FORMAT,
+            "version": self.version,
+            "vocabulary": self.vocabulary,
+            "labels": self.labels,
+            "weights": self.weights.round(5).tolist(),
+            "bias": self.bias.round(5).tolist(),
+            "exemplars": self.exemplars,
+            "meta": self.meta,
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+        if data.get("format") != FORMAT:
+            raise ValueError(f"{path}: not a guardian classifier model")
+        return cls(data["vocabulary"], data["labels"], data["weights"], data["bias"], data["exemplars"], data["meta"])
+
+
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def load_classifier(path: str) -> IssueClassifier:
+    """تحميل مرة واحدة لكل مسار في العملية"""
+    model = _MODELS.get(path)
+    if model is None:
+        with _MODELS_LOCK:
+            model = _MODELS.get(path)
+            if model is None:
+                model = _MODELS[path] = IssueClassifier.load(path)
+    return model
+
+# ---------------------------
+# Training data
+# ---------------------------
+def read_verdicts(path: str):
+    """(form, result) من سجل GUARDIAN_VERDICT_LOG (سطر JSON لكل حكم)"""
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                yield entry["form"], entry["result"]
+
+
+def training_pairs(synthetic: int = 0, seed: int = 0, extracts=(), verdicts=()):
+    """أحكام القواعد على البيانات الاصطناعية والمستخرجات، ثم أحكام AI المسجلة"""
+    from .stream import read_records
+    from .synthetic import generate_forms
+
+    for form_data in generate_forms(synthetic, seed, contradiction_rate=0.4):
+        yield form_data, evaluate_form(form_data)
+    for path in extracts:
+        for form_data in read_records(path):
+            yield form_data, evaluate_form(form_data)
+    for path in verdicts:
+        yield from read_verdicts(path)
+
+
+def evaluate_model(model: IssueClassifier, pairs, threshold: float = 0.5) -> dict:
+    """دقة واستدعاء كل تسمية، ونسبة الاستمارات التي طابقت مجموعة مشكلاتها تماماً"""
+    stats = {label: Counter() for label in model.labels}
+    exact = total = 0
+    for form_data, verdict in pairs:
+        expected = {issue_label(issue) for issue in verdict.get("issues", [])}
+        predicted = {issue_label(issue) for issue in model.predict(form_data, threshold)["issues"]}
+        exact += expected == predicted
+        total += 1
+        for label in expected | predicted:
+            counter = stats.setdefault(label, Counter())
+            counter["tp" if label in expected and label in predicted else "fn" if label in expected else "fp"] += 1
+    labels = {}
+    for label, c in sorted(stats.items()):
+        labels[label] = {
+            "support": c["tp"] + c["fn"],
+            "precision": round(c["tp"] / (c["tp"] + c["fp"]), 4) if c["tp"] + c["fp"] else None,
+            "recall": round(c["tp"] / (c["tp"] + c["fn"]), 4) if c["tp"] + c["fn"] else None,
+        }
+    return {"records": total, "exact_match": round(exact / total, 4) if total else None, "labels": labels}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Train and evaluate the on-CPU issue classifier backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("train", "eval"):
+        command = commands.add_parser(name)
+        if name == "eval":
+            command.add_argument("model")
+        command.add_argument("--synthetic", type=int, default=0, help="synthetic forms labelled by the rules")
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--extracts", nargs="*", default=[], help="extract files labelled by the rules")
+        command.add_argument("--verdicts", nargs="*", default=[], help="NDJSON verdict logs (GUARDIAN_VERDICT_LOG)")
+        command.add_argument("--threshold", type=float, default=0.5)
+    train = commands.choices["train"]
+    train.add_argument("-o", "--output", required=True)
+    train.add_argument("--epochs", type=int, default=300)
+    train.add_argument("--min-count", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    pairs = training_pairs(args.synthetic, args.seed, args.extracts, args.verdicts)
+    started = time.perf_counter()
+    if args.command == "train":
+        pairs = list(pairs)
+        model = IssueClassifier.train(pairs, args.epochs, min_count=args.min_count)
+        model.save(args.output)
+        report = {"output": args.output, "version": model.version, "features": len(model.vocabulary)}
+        report["train_s"] = round(time.perf_counter() - started, 2)
+        report["training_set"] = evaluate_model(model, pairs, args.threshold)
+    else:
+        report = evaluate_model(IssueClassifier.load(args.model), pairs, args.threshold)
+        report["elapsed_s"] = round(time.perf_counter() - started, 2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
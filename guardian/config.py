@@ -0,0 +1,94 @@
+"""إعدادات الحارس الدلالي من متغيرات البيئة"""
+import os
+
+# ---------------------------
+# AI
+# ---------------------------
+AI_MODEL = os.environ.get("GUARDIAN_AI_MODEL", "gpt-4o")
+AI_BASE_URL = os.environ.get("OPENAI_BASE_URL") or None
+AI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
+AI_CONCURRENCY = int(os.environ.get("GUARDIAN_AI_CONCURRENCY", "8"))
+AI_TIMEOUT_SECONDS = float(os.environ.get("GUARDIAN_AI_TIMEOUT", "30"))
+AI_BATCH_SIZE = int(os.environ.get("GUARDIAN_AI_BATCH_SIZE", "10"))
+# json_schema (Structured Outputs) أو json_object (وضع JSON) أو none للخوادم التي لا تدعمهما
+AI_RESPONSE_FORMAT = os.environ.get("GUARDIAN_AI_RESPONSE_FORMAT", "json_object")
+
+# ---------------------------
+# AI Backend
+# ---------------------------
+# openai (الافتراضي) أو local (خادم متوافق مع OpenAI مثل llama.cpp/vLLM) أو classifier (مصنف على المعالج)
+AI_BACKEND = os.environ.get("GUARDIAN_AI_BACKEND", "openai").strip().lower()
+LOCAL_AI_URL = os.environ.get("GUARDIAN_LOCAL_AI_URL", "http://127.0.0.1:8000/v1")
+LOCAL_AI_MODEL = os.environ.get("GUARDIAN_LOCAL_AI_MODEL", "local-model")
+CLASSIFIER_MODEL_PATH = os.environ.get("GUARDIAN_CLASSIFIER_MODEL") or None
+CLASSIFIER_THRESHOLD = float(os.environ.get("GUARDIAN_CLASSIFIER_THRESHOLD", "0.5"))
+# ملف NDJSON تُضاف إليه أحكام النموذج (الاستمارة والنتيجة) لتدريب المصنف
+VERDICT_LOG_PATH = os.environ.get("GUARDIAN_VERDICT_LOG") or None
+
+# ---------------------------
+# AI Rate Limit & Circuit Breaker
+# ---------------------------
+# الحدود الأولية فقط؛ تُصحح تلقائياً من رؤوس x-ratelimit-* في ردود الخادم
+AI_REQUESTS_PER_MINUTE = int(os.environ.get("GUARDIAN_AI_RPM", "500"))
+AI_TOKENS_PER_MINUTE = int(os.environ.get("GUARDIAN_AI_TPM", "30000"))
+AI_RATE_MAX_WAIT_SECONDS = float(os.environ.get("GUARDIAN_AI_RATE_WAIT", "2"))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("GUARDIAN_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN_SECONDS = float(os.environ.get("GUARDIAN_BREAKER_COOLDOWN", "30"))
+
+# ---------------------------
+# Result Cache
+# ---------------------------
+CACHE_DB_PATH = os.environ.get("GUARDIAN_CACHE_DB") or None
+CACHE_TTL_SECONDS = float(os.environ.get("GUARDIAN_CACHE_TTL", str(24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.environ.get("GUARDIAN_CACHE_SIZE", "10000"))
+
+# ---------------------------
+# Real-time Mode
+# ---------------------------
+REALTIME_BUDGET_MS = int(os.environ.get("GUARDIAN_REALTIME_BUDGET_MS", "200"))
+
+# ---------------------------
+# Session History
+# ---------------------------
+HISTORY_CAPACITY = int(os.environ.get("GUARDIAN_HISTORY_SIZE", "500"))
+
+# ---------------------------
+# Shared Metrics
+# ---------------------------
+METRICS_DB_PATH = os.environ.get("GUARDIAN_METRICS_DB") or None
+METRICS_FLUSH_SECONDS = float(os.environ.get("GUARDIAN_METRICS_FLUSH", "1"))
+
+# ---------------------------
+# Result Store (Parquet)
+# ---------------------------
+# مجلد الأحكام المقسّمة حسب التاريخ والمنطقة؛ بدونه لا تُحفظ (يتطلب pyarrow)
+RESULTS_DIR = os.environ.get("GUARDIAN_RESULTS_DIR") or None
+RESULTS_FLUSH_SECONDS = float(os.environ.get("GUARDIAN_RESULTS_FLUSH", "5"))
+# كتابة مبكرة عندما يبلغ الطابور هذا العدد قبل الفاصل الزمني
+RESULTS_BUFFER_ROWS = int(os.environ.get("GUARDIAN_RESULTS_BUFFER", "50000"))
+
+# ---------------------------
+# Outlier Reference
+# ---------------------------
+OUTLIER_REFERENCE_PATH = os.environ.get("GUARDIAN_OUTLIER_REFERENCE") or None
+OUTLIER_Z_THRESHOLD = float(os.environ.get("GUARDIAN_OUTLIER_Z", "3.5"))
+OUTLIER_MIN_SEGMENT = int(os.environ.get("GUARDIAN_OUTLIER_MIN_SEGMENT", "30"))
+
+# ---------------------------
+# Telemetry
+# ---------------------------
+TELEMETRY_ENABLED = os.environ.get("GUARDIAN_TELEMETRY", "1").lower() not in ("0", "false", "off", "no")
+TELEMETRY_FILE = os.environ.get("GUARDIAN_TELEMETRY_FILE") or None
+TELEMETRY_FILE_INTERVAL_SECONDS = float(os.environ.get("GUARDIAN_TELEMETRY_INTERVAL", "15"))
+
+# ---------------------------
+# Cold Start
+# ---------------------------
+# تحميل pandas ومكتبة النموذج في الخلفية بعد أول عرض للواجهة، فلا يدفع أول فحص زمن استيرادها
+PRELOAD_ENABLED = os.environ.get("GUARDIAN_PRELOAD", "1").lower() not in ("0", "false", "off", "no")
+
+# ---------------------------
+# HTTP Service
+# ---------------------------
+SERVICE_HOST = os.environ.get("GUARDIAN_HOST", "0.0.0.0")
+SERVICE_PORT = int(os.environ.get("GUARDIAN_PORT", "8080"))
@@ -0,0 +1,114 @@
+"""سجل الجلسة: مخزن دائري محدود بأعمدة مضغوطة ومجاميع تراكمية تُحدّث في O(1)
+
+يحتفظ بآخر capacity فحصاً فقط للعرض، بينما المجاميع (الإجمالي، الأخطاء،
+التكرار لكل قاعدة، توزيع درجات الثقة) تغطي الجلسة كاملة دون إعادة حساب.
+"""
+import time
+from array import array
+from collections import Counter
+from datetime import datetime
+
+from .config import HISTORY_CAPACITY
+
+STATUSES = ("clean", "warning", "error")
+SCORE_BINS = 10
+
+
+def _score_bin(score: int) -> int:
+    return min(max(int(score), 0) * SCORE_BINS // 100, SCORE_BINS - 1)
+
+
+class SessionHistory:
+    def __init__(self, capacity: int = HISTORY_CAPACITY):
+        self.capacity = max(1, int(capacity))
+        self.score = array("B", bytes(self.capacity))
+        self.issues = array("H", [0]) * self.capacity
+        self.status = array("B", bytes(self.capacity))
+        self.mode = array("B", bytes(self.capacity))
+        self.timestamp = array("d", [0.0]) * self.capacity
+        self._rules = [()] * self.capacity
+        self._modes = []
+        self._mode_codes = {}
+        self._next = 0  # رقم تسلسلي للفحص التالي؛ الخانة = الرقم % capacity
+
+        self.total_forms = 0
+        self.errors_found = 0
+        self.clean_forms = 0
+        self.status_counts = [0] * len(STATUSES)
+        self.mode_counts = Counter()
+        self.rule_counts = Counter()
+        self.score_histogram = [0] * SCORE_BINS
+
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+
+    def _mode_code(self, mode: str) -> int:
+        code = self._mode_codes.get(mode)
+        if code is None:
+            code = self._mode_codes[mode] = len(self._modes)
+            self._modes.append(mode)
+        return code
+
+    def _apply(self, slot: int, sign: int) -> None:
+        issues = self.issues[slot]
+        self.errors_found += sign * issues
+        self.clean_forms += sign * (issues == 0)
+        self.status_counts[self.status[slot]] += sign
+        self.mode_counts[self._modes[self.mode[slot]]] += sign
+        self.score_histogram[_score_bin(self.score[slot])] += sign
+        for rule in self._rules[slot]:
+            self.rule_counts[rule] += sign
+
+    def _store(self, slot: int, result: dict, mode: str) -> None:
+        issues = result.get("issues", [])
+        status = result.get("status", "error")
+        self.score[slot] = min(max(int(result.get("confidence_score", 0)), 0), 100)
+        self.issues[slot] = min(len(issues), 0xFFFF)
+        self.status[slot] = STATUSES.index(status) if status in STATUSES else STATUSES.index("error")
+        self.mode[slot] = self._mode_code(mode)
+        self._rules[slot] = tuple(issue.get("rule", "ai") for issue in issues)
+
+    def record(self, result: dict, mode: str) -> int:
+        """إضافة نتيجة فحص؛ يعيد رقمها التسلسلي (لتحديثها لاحقاً عبر update)"""
+        seq = self._next
+        slot = seq % self.capacity
+        self._store(slot, result, mode)
+        self.timestamp[slot] = time.time()
+        self._apply(slot, +1)
+        self.total_forms += 1
+        self._next += 1
+        return seq
+
+    def update(self, seq: int, result: dict, mode: str) -> bool:
+        """استبدال نتيجة فحص سابق (حكم AI متأخر)؛ False إن خرج من المخزن"""
+        if not self._next - len(self) <= seq < self._next:
+            return False
+        slot = seq % self.capacity
+        self._apply(slot, -1)
+        self._store(slot, result, mode)
+        self._apply(slot, +1)
+        return True
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors_found / self.total_forms if self.total_forms else 0.0
+
+    def window(self, size=None) -> dict:
+        """أعمدة آخر size فحصاً (الأقدم أولاً) - هذا فقط ما يُعرض"""
+        count = len(self) if size is None else min(int(size), len(self))
+        seqs = range(self._next - count, self._next)
+        slots = [seq % self.capacity for seq in seqs]
+        return {
+            "time": [datetime.fromtimestamp(self.timestamp[s]).strftime("%H:%M:%S") for s in slots],
+            "score": [self.score[s] for s in slots],
+            "issues": [self.issues[s] for s in slots],
+            "status": [STATUSES[self.status[s]] for s in slots],
+            "mode": [self._modes[self.mode[s]] for s in slots],
+        }
+
+    def histogram(self) -> dict:
+        """{"0-9": n, ..., "90-100": n}"""
+        width = 100 // SCORE_BINS
+        labels = [f"{i * width}-{i * width + width - 1}" for i in range(SCORE_BINS - 1)]
+        labels.append(f"{(SCORE_BINS - 1) * width}-100")
+        return dict(zip(labels, self.score_histogram))
@@ -0,0 +1,198 @@
+"""فحوص ما بين السجلات: اتساق الأسرة والمستجيبين المكررين
+
+القواعد في rules.py تفحص كل استمارة منفردة. هنا تُبنى فهارس (حسب رقم الأسرة
+وحسب بصمة المستجيب) بمرور واحد على الدفعة، ثم يُفحص كل فهرس مرة واحدة، فيكون
+الفحص O(n) بدلاً من مقارنة كل سجلين. المشكلات بنفس مخطط analyze_form_demo.
+"""
+import itertools
+
+from .rules import CategoryLookup, evaluate_rules, merge_issues
+
+HOUSEHOLD_ID = "Household ID"
+RELATIONSHIP = "Relationship"
+RECORD_ID = "Record ID"
+
+RELATIONSHIP_OPTIONS = ["رب الاسرة", "زوج/زوجة", "ابن/ابنة", "اب/ام", "اخرى"]
+
+# صلة القرابة برب الأسرة (مطابقة جزئية مثل قواعد contains)
+_HEAD = CategoryLookup(("رب الاسرة", "Head"), vocabulary=RELATIONSHIP_OPTIONS)
+_SPOUSE = CategoryLookup(("زوج", "Spouse", "Wife", "Husband"), vocabulary=RELATIONSHIP_OPTIONS)
+_CHILD = CategoryLookup(("ابن", "بنت", "Son", "Daughter", "Child"), vocabulary=RELATIONSHIP_OPTIONS)
+
+# أقل فرق عمر معقول بين الوالد والابن
+MIN_PARENT_AGE_GAP = 12
+
+CROSS_RULES = ("household_size_mismatch", "household_head_count", "child_older_than_parent", "duplicate_respondent")
+
+
+def _blank(value) -> bool:
+    # NaN من أعمدة DataFrame الناقصة يُعامل كقيمة فارغة
+    return value is None or value == "" or value != value
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _label(form_data: dict, index: int) -> str:
+    return str(form_data.get(RECORD_ID) or f"#{index + 1}")
+
+
+def respondent_fingerprint(form_data: dict) -> tuple:
+    """بصمة محتوى الاستمارة دون رقمها: استمارتان بالبصمة نفسها لمستجيب واحد مكرر
+
+    مفتاح مطابقة تامة (بلا تجزئة ولا تصادمات)؛ 30 و30.0 متساويان، أما "30" النصية فلا.
+    """
+    return tuple(sorted(
+        (key, value.strip() if isinstance(value, str) else value)
+        for key, value in form_data.items()
+        if key != RECORD_ID and not _blank(value)
+    ))
+
+
+def _issue(rule: str, severity: str, field_1: str, field_2: str, description: str, suggestion: str) -> dict:
+    return {
+        "severity": severity,
+        "field_1": field_1,
+        "field_2": field_2,
+        "description": description,
+        "suggestion": suggestion,
+        "rule": rule,
+    }
+
+# ---------------------------
+# Checks
+# ---------------------------
+def _check_household(household_id, members, records, issues) -> None:
+    """members: مواقع سجلات الأسرة الواحدة في records"""
+    size = len(members)
+    for i in members:
+        declared = _int(records[i].get("Family Members"))
+        if declared is not None and declared != size:
+            issues[i].append(_issue(
+                "household_size_mismatch", "medium", "عدد أفراد الأسرة", "سجلات الأسرة",
+                f"عدد أفراد الأسرة المسجل {declared} بينما للأسرة {household_id} {size} سجلات",
+                "تأكد من تسجيل جميع أفراد الأسرة أو صحح عدد الأفراد",
+            ))
+
+    heads, parents, children = [], [], []
+    for i in members:
+        relation = records[i].get(RELATIONSHIP)
+        if _blank(relation):
+            continue
+        relation = str(relation)
+        if _HEAD[relation]:
+            heads.append(i)
+            parents.append(i)
+        elif _SPOUSE[relation]:
+            parents.append(i)
+        elif _CHILD[relation]:
+            children.append(i)
+    if not (heads or parents or children):
+        return
+
+    if len(heads) != 1:
+        description = (
+            f"لا يوجد رب أسرة بين {size} سجلات للأسرة {household_id}" if not heads
+            else f"{len(heads)} سجلات بصفة رب الأسرة في الأسرة {household_id}"
+        )
+        for i in heads or members:
+            issues[i].append(_issue(
+                "household_head_count", "medium", "صلة القرابة", "سجلات الأسرة",
+                description, "يجب أن يكون لكل أسرة رب أسرة واحد",
+            ))
+
+    # مقارنة بأكبر الوالدين سناً: الابن قد يكون من زواج سابق لرب الأسرة
+    parent_ages = [(age, i) for i in parents if (age := _int(records[i].get("Age"))) is not None]
+    if not parent_ages or not children:
+        return
+    parent_age, parent = max(parent_ages)
+    for i in children:
+        age = _int(records[i].get("Age"))
+        if age is not None and age > parent_age - MIN_PARENT_AGE_GAP:
+            issues[i].append(_issue(
+                "child_older_than_parent", "high", "العمر", "صلة القرابة",
+                f"عمر الابن {age} سنة وعمر الوالد ({_label(records[parent], parent)}) {parent_age} سنة"
+                f" - الفرق أقل من {MIN_PARENT_AGE_GAP} سنة",
+                "راجع أعمار أفراد الأسرة أو صلة القرابة",
+            ))
+
+
+def check_households(records) -> list:
+    """قائمة مشكلات ما بين السجلات لكل سجل، بترتيب records
+
+    السجلات بدون رقم أسرة لا تدخل فحوص الأسرة لكنها تدخل فحص التكرار.
+    """
+    records = records if isinstance(records, list) else list(records)
+    households = {}
+    first_seen = {}
+    issues = [[] for _ in records]
+
+    for i, form_data in enumerate(records):
+        household_id = form_data.get(HOUSEHOLD_ID)
+        if not _blank(household_id):
+            households.setdefault(str(household_id), []).append(i)
+
+        fingerprint = respondent_fingerprint(form_data)
+        original = first_seen.setdefault(fingerprint, i)
+        if original != i:
+            issues[i].append(_issue(
+                "duplicate_respondent", "high", "رقم الاستمارة", "بيانات المستجيب",
+                f"بيانات مطابقة تماماً للاستمارة {_label(records[original], original)}",
+                "تأكد من عدم إدخال المستجيب نفسه مرتين",
+            ))
+
+    for household_id, members in households.items():
+        _check_household(household_id, members, records, issues)
+    return issues
+
+
+def merge_cross_issues(results, cross) -> list:
+    """نتائج جديدة بعد إضافة مشكلات ما بين السجلات وإعادة حساب الدرجة والحالة"""
+    return [merge_issues(result, extra) for result, extra in zip(results, cross)]
+
+
+def evaluate_records(records, evaluate=None) -> list:
+    """قواعد الاستمارة الواحدة ثم فحوص ما بين السجلات لدفعة كاملة"""
+    records = records if isinstance(records, list) else list(records)
+    evaluate = evaluate_rules if evaluate is None else evaluate
+    return merge_cross_issues([evaluate(form_data) for form_data in records], check_households(records))
+
+# ---------------------------
+# Household-aligned chunks
+# ---------------------------
+class HouseholdChunker:
+    """يقتطع دفعات من مكرر دون تقسيم سجلات أسرة متتالية بين دفعتين
+
+    enabled=False يعني دفعات بالحجم المطلوب تماماً.
+    """
+
+    def __init__(self, records, enabled: bool = True):
+        self._iterator = iter(records)
+        self.enabled = enabled
+        self._carry = []
+
+    def take(self, size: int) -> list:
+        chunk = self._carry + list(itertools.islice(self._iterator, max(0, size - len(self._carry))))
+        self._carry = []
+        if not self.enabled or not chunk:
+            return chunk
+        last = chunk[-1].get(HOUSEHOLD_ID)
+        if _blank(last):
+            return chunk
+        for form_data in self._iterator:
+            if form_data.get(HOUSEHOLD_ID) != last:
+                self._carry = [form_data]
+                break
+            chunk.append(form_data)
+        return chunk
+
+    def chunks(self, size: int):
+        while True:
+            chunk = self.take(size)
+            if not chunk:
+                return
+            yield chunk
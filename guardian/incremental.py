@@ -0,0 +1,64 @@
+"""الفحص التزايدي أثناء الإدخال: إعادة القواعد المتأثرة بالحقول المتغيرة فقط
+
+    validator = IncrementalValidator()
+    validator.update(form_data)           # الحقول التي تغيرت منذ آخر حكم
+    validator.field_issues("Age")         # المشكلات التي تخص حقل العمر
+    validator.result()                    # بنفس مخطط evaluate_rules
+
+نتائج القواعد الأخرى تبقى من الحكم السابق عبر فهرس RuleSet.dependents (حقل -> قواعد).
+"""
+from .rules import RULESET, score_issues
+from .telemetry import get_telemetry
+
+_MISSING = object()
+
+
+class IncrementalValidator:
+    def __init__(self, ruleset=None):
+        self.ruleset = RULESET if ruleset is None else ruleset
+        self.reset()
+
+    def reset(self) -> None:
+        self.form = None
+        self.version = None
+        self._outcomes = {}
+        self.changed = []
+        self.evaluated = 0
+
+    def update(self, form_data: dict) -> list:
+        """إعادة فحص القواعد المتأثرة بما تغير منذ آخر استدعاء؛ يعيد الحقول المتغيرة"""
+        with get_telemetry().timer("live_rules"):
+            if self.form is None or self.version != self.ruleset.version:
+                # أول حكم أو تغيرت القواعد (register_rule): فحص كامل
+                changed = list(form_data)
+                indexes = range(len(self.ruleset.rules))
+                self._outcomes = {}
+            else:
+                changed = [
+                    field for field in {*self.form, *form_data}
+                    if self.form.get(field, _MISSING) != form_data.get(field, _MISSING)
+                ]
+                indexes = self.ruleset.affected(changed) if changed else ()
+            if indexes:
+                self._outcomes.update(self.ruleset.check_rules(form_data, indexes))
+        self.form = dict(form_data)
+        self.version = self.ruleset.version
+        self.changed = changed
+        self.evaluated = len(indexes)
+        return changed
+
+    @property
+    def issues(self) -> list:
+        return [issue for _, issue in sorted(self._outcomes.items()) if issue is not None]
+
+    def field_issues(self, field: str) -> list:
+        """مشكلات القواعد المعتمدة على هذا الحقل (للعرض بجوار عنصر الإدخال)"""
+        return [
+            issue for index in self.ruleset.dependents.get(field, ())
+            if (issue := self._outcomes.get(index)) is not None
+        ]
+
+    def result(self) -> dict:
+        issues = self.issues
+        confidence, status, summary = score_issues(len(issues))
+        return {"confidence_score": confidence, "status": status, "issues": issues, "summary": summary}
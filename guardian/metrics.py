@@ -0,0 +1,213 @@
+"""مقاييس الجودة المشتركة بين كل الجلسات (لوحة تحكم واحدة لكل الباحثين والمشرفين)
+
+كل فحص يُضاف إلى طابور في الذاكرة (بدون قفل)، وخيط خلفي يجمع الطابور دورياً في
+تجميعات زمنية جاهزة (لكل دقيقة وساعة × منطقة × وضع، ولكل قاعدة) ويكتبها دفعة
+واحدة. القراءة من التجميعات فقط وليس من السجل الخام. مع GUARDIAN_METRICS_DB
+تُحفظ في SQLite (WAL) فتتشاركها العمليات (Streamlit وخدمة HTTP) وتبقى بعد إعادة التشغيل.
+"""
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+
+from .config import METRICS_DB_PATH, METRICS_FLUSH_SECONDS
+
+GRANULARITIES = {"minute": 60, "hour": 3600}
+
+# تجميعات الدقائق تكفي للمتابعة اللحظية؛ الساعات تبقى للإجماليات
+MINUTE_RETENTION_SECONDS = 2 * 24 * 3600
+
+UNKNOWN_REGION = "غير محدد"
+
+_COUNTERS = ("forms", "clean", "warning", "error", "issues", "score_sum")
+
+
+def _bucket(ts: float, seconds: int) -> int:
+    return int(ts // seconds) * seconds
+
+
+class MetricsStore:
+    def __init__(self, db_path=None, flush_seconds: float = METRICS_FLUSH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = None
+
+        self._db = sqlite3.connect(db_path or ":memory:", check_same_thread=False, isolation_level=None)
+        if db_path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS metrics_forms ("
+            "granularity TEXT, bucket INTEGER, region TEXT, mode TEXT, "
+            + ", ".join(f"{name} REAL NOT NULL DEFAULT 0" for name in _COUNTERS)
+            + ", PRIMARY KEY (granularity, bucket, region, mode))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS metrics_rules ("
+            "granularity TEXT, bucket INTEGER, region TEXT, rule TEXT, hits INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (granularity, bucket, region, rule))"
+        )
+
+    # ---------------------------
+    # Write path
+    # ---------------------------
+    def record(self, result: dict, mode: str, region=None, ts=None, weight: int = 1) -> None:
+        """إضافة فحص (weight=-1 لسحب حكم سابق عند وصول حكم AI متأخر)"""
+        # deque.append آمن بين الخيوط ولا يحتاج قفلاً
+        self._pending.append((ts or time.time(), region or UNKNOWN_REGION, mode, result, weight))
+        if self._flusher is None:
+            self._start_flusher()
+
+    def _start_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="guardian-metrics", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass
+
+    def flush(self) -> int:
+        """تجميع الطابور وكتابته في معاملة واحدة؛ يعيد عدد الفحوصات المكتوبة"""
+        forms = {}
+        rules = Counter()
+        drained = 0
+        while True:
+            try:
+                ts, region, mode, result, weight = self._pending.popleft()
+            except IndexError:
+                break
+            drained += 1
+            issues = result.get("issues", [])
+            status = result.get("status", "error")
+            deltas = (
+                1,
+                not issues,
+                status == "warning",
+                status == "error",
+                len(issues),
+                float(result.get("confidence_score", 0)),
+            )
+            for granularity, seconds in GRANULARITIES.items():
+                key = (granularity, _bucket(ts, seconds), region, mode)
+                totals = forms.setdefault(key, [0.0] * len(_COUNTERS))
+                for i, delta in enumerate(deltas):
+                    totals[i] += weight * delta
+                for issue in issues:
+                    rules[(granularity, key[1], region, issue.get("rule", "ai"))] += weight
+        if not drained:
+            return 0
+
+        assignments = ", ".join(f"{name} = {name} + excluded.{name}" for name in _COUNTERS)
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    f"INSERT INTO metrics_forms (granularity, bucket, region, mode, {', '.join(_COUNTERS)}) "
+                    f"VALUES (?, ?, ?, ?{', ?' * len(_COUNTERS)}) "
+                    f"ON CONFLICT (granularity, bucket, region, mode) DO UPDATE SET {assignments}",
+                    [key + tuple(totals) for key, totals in forms.items()],
+                )
+                self._db.executemany(
+                    "INSERT INTO metrics_rules (granularity, bucket, region, rule, hits) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (granularity, bucket, region, rule) DO UPDATE SET hits = hits + excluded.hits",
+                    [key + (hits,) for key, hits in rules.items() if hits],
+                )
+                cutoff = _bucket(time.time() - MINUTE_RETENTION_SECONDS, 60)
+                self._db.execute("DELETE FROM metrics_forms WHERE granularity = 'minute' AND bucket < ?", (cutoff,))
+                self._db.execute("DELETE FROM metrics_rules WHERE granularity = 'minute' AND bucket < ?", (cutoff,))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return drained
+
+    # ---------------------------
+    # Read path (rollups)
+    # ---------------------------
+    def _query(self, sql: str, params=()) -> list:
+        self.flush()
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _where(granularity: str, since, region):
+        clauses, params = ["granularity = ?"], [granularity]
+        if since is not None:
+            clauses.append("bucket >= ?")
+            params.append(_bucket(since, GRANULARITIES[granularity]))
+        if region is not None:
+            clauses.append("region = ?")
+            params.append(region)
+        return " AND ".join(clauses), params
+
+    @staticmethod
+    def _row(values) -> dict:
+        forms, clean, warning, error, issues, score_sum = (value or 0 for value in values)
+        return {
+            "forms": int(forms),
+            "clean": int(clean),
+            "warning": int(warning),
+            "error": int(error),
+            "issues": int(issues),
+            "avg_score": score_sum / forms if forms else 0.0,
+            "error_rate": issues / forms if forms else 0.0,
+        }
+
+    def totals(self, since=None, region=None) -> dict:
+        where, params = self._where("hour", since, region)
+        sums = ", ".join(f"SUM({name})" for name in _COUNTERS)
+        (values,) = self._query(f"SELECT {sums} FROM metrics_forms WHERE {where}", params)
+        return self._row(values)
+
+    def series(self, granularity: str = "minute", since=None, region=None) -> list:
+        """[{"bucket": بداية الفترة (epoch), "forms": ..., ...}] مرتبة زمنياً"""
+        where, params = self._where(granularity, since, region)
+        sums = ", ".join(f"SUM({name})" for name in _COUNTERS)
+        rows = self._query(
+            f"SELECT bucket, {sums} FROM metrics_forms WHERE {where} GROUP BY bucket ORDER BY bucket", params
+        )
+        return [{"bucket": row[0], **self._row(row[1:])} for row in rows]
+
+    def by_region(self, since=None) -> dict:
+        where, params = self._where("hour", since, None)
+        sums = ", ".join(f"SUM({name})" for name in _COUNTERS)
+        rows = self._query(f"SELECT region, {sums} FROM metrics_forms WHERE {where} GROUP BY region", params)
+        return {row[0]: self._row(row[1:]) for row in rows}
+
+    def by_mode(self, since=None) -> dict:
+        where, params = self._where("hour", since, None)
+        rows = self._query(f"SELECT mode, SUM(forms) FROM metrics_forms WHERE {where} GROUP BY mode", params)
+        return {mode: int(forms) for mode, forms in rows if forms}
+
+    def by_rule(self, since=None, region=None) -> dict:
+        """{قاعدة: عدد مرات رصدها} مرتبة تنازلياً"""
+        where, params = self._where("hour", since, region)
+        rows = self._query(
+            f"SELECT rule, SUM(hits) AS total FROM metrics_rules WHERE {where} "
+            "GROUP BY rule HAVING total > 0 ORDER BY total DESC",
+            params,
+        )
+        return {rule: int(hits) for rule, hits in rows}
+
+
+_METRICS_STORE = None
+_METRICS_STORE_LOCK = threading.Lock()
+
+
+def get_metrics_store() -> MetricsStore:
+    """مخزن المقاييس المشترك على مستوى العملية"""
+    global _METRICS_STORE
+    with _METRICS_STORE_LOCK:
+        if _METRICS_STORE is None:
+            _METRICS_STORE = MetricsStore(db_path=METRICS_DB_PATH)
+        return _METRICS_STORE
@@ -0,0 +1,147 @@
+"""خادم محاكاة متوافق مع OpenAI (chat.completions) للاختبار وقياس الأداء دون رصيد
+
+    python -m guardian.mockserver --port 8081 --latency-ms 300
+    OPENAI_BASE_URL=http://127.0.0.1:8081/v1 streamlit run app.py
+
+يجيب بحكم محرك القواعد على الاستمارة المرسلة بعد زمن استجابة محدد، ويدعم
+الدفعات (BATCH MODE) والتدفق (stream) ورؤوس x-ratelimit-*.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .rules import evaluate_rules
+
+_RECORD_ID = re.compile(r"^\[(r\d+)\]\s*$")
+
+
+def _parse_fields(lines) -> dict:
+    form_data = {}
+    for line in lines:
+        if not line.startswith("- ") or ": " not in line:
+            continue
+        key, value = line[2:].split(": ", 1)
+        try:
+            form_data[key] = int(value)
+        except ValueError:
+            form_data[key] = value
+    return form_data
+
+
+def mock_verdict(messages) -> str:
+    """نص رد النموذج: حكم القواعد لكل استمارة في الرسالة"""
+    system, user = messages[0]["content"], messages[-1]["content"]
+    if "BATCH MODE" not in system:
+        return json.dumps(evaluate_rules(_parse_fields(user.splitlines())), ensure_ascii=False)
+
+    blocks = []
+    for line in user.splitlines():
+        match = _RECORD_ID.match(line)
+        if match is not None:
+            blocks.append((match.group(1), []))
+        elif blocks:
+            blocks[-1][1].append(line)
+    results = [{"id": record_id, **evaluate_rules(_parse_fields(lines))} for record_id, lines in blocks]
+    return json.dumps({"results": results}, ensure_ascii=False)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # الرأس والجسم يُكتبان منفصلين؛ بدون هذا يضيف Nagle مع ACK المؤجل ~40ms لكل رد
+    disable_nagle_algorithm = True
+    latency = 0.2
+    requests_per_minute = 1_000_000
+    tokens_per_minute = 100_000_000
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _headers(self, status: int, content_type: str, length=None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if length is None:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(length))
+        self.send_header("x-ratelimit-limit-requests", str(self.requests_per_minute))
+        self.send_header("x-ratelimit-remaining-requests", str(self.requests_per_minute))
+        self.send_header("x-ratelimit-limit-tokens", str(self.tokens_per_minute))
+        self.send_header("x-ratelimit-remaining-tokens", str(self.tokens_per_minute))
+        self.end_headers()
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            payload = json.dumps({"error": {"message": f"unknown path {self.path}"}}).encode("utf-8")
+            self._headers(404, "application/json", len(payload))
+            self.wfile.write(payload)
+            return
+
+        time.sleep(self.latency)
+        content = mock_verdict(body["messages"])
+        prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 3
+        completion_tokens = len(content) // 3
+
+        if body.get("stream"):
+            self._headers(200, "text/event-stream")
+            for i in range(0, len(content), 24):
+                chunk = {
+                    "id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": body["model"],
+                    "choices": [{"index": 0, "delta": {"content": content[i:i + 24]}, "finish_reason": None}],
+                }
+                self._chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+            return
+
+        payload = json.dumps({
+            "id": "mock", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }, ensure_ascii=False).encode("utf-8")
+        self._headers(200, "application/json", len(payload))
+        self.wfile.write(payload)
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # طابور اتصالات كافٍ لاختبارات التزامن العالي
+    request_queue_size = 1024
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, latency_ms: float = 200) -> MockServer:
+    """تشغيل الخادم في خيط خلفي؛ العنوان في server.server_address"""
+    handler = type("Handler", (MockHandler,), {"latency": latency_ms / 1000})
+    server = MockServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="guardian-mock-ai", daemon=True).start()
+    return server
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible server answering with the rule engine")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    args = parser.parse_args(argv)
+
+    server = start_mock_server(args.host, args.port, args.latency_ms)
+    print(f"mock OpenAI server on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""فهرس المسميات الوظيفية: مسمى حر -> رمز مهنة موحد مع المؤهل والعمر الأدنيين
+
+    match_job_title("مهندسة برمجيات أولى")  # Occupation(code="2512", ...)
+
+المسميات وصيغها (عربية وإنجليزية) تُطبّع وتُبنى منها شجرة كلمات مرة واحدة عند
+الاستيراد؛ أطول مطابقة تفوز، فـ"مهندس برمجيات" لا يُطابق "مهندس" العامة.
+النتائج مخزنة لكل نص، فالمسميات المتكررة تكلف بحثاً في قاموس فقط.
+الرموز من التصنيف الدولي الموحد للمهن (ISCO-08).
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+from .arabic import PhraseIndex
+
+# ---------------------------
+# Education levels
+# ---------------------------
+# بترتيب FIELD_OPTIONS["Education"]؛ الرتبة هي الموقع في القائمة
+EDUCATION_LEVELS = ["اقل من ثانوي", "ثانوي", "دبلوم", "بكالوريوس", "ماجستير", "دكتوراه"]
+
+EDUCATION_ALIASES = {
+    "اقل من ثانوي": ("ابتدائي", "متوسط", "امي", "Primary", "Below Secondary"),
+    "ثانوي": ("ثانويه عامه", "High School", "Secondary"),
+    "دبلوم": ("Diploma",),
+    "بكالوريوس": ("ليسانس", "Bachelor", "BSc", "BA"),
+    "ماجستير": ("Master", "Masters", "MSc", "MBA"),
+    "دكتوراه": ("PhD", "Doctorate"),
+}
+
+# رتبة المؤهل غير المعروف: أعلى من كل المتطلبات، فلا يُطلق قاعدة بلا دليل
+UNKNOWN_EDUCATION_RANK = len(EDUCATION_LEVELS)
+
+# ---------------------------
+# Occupations
+# ---------------------------
+# (رمز، الاسم الموحد، أقل مؤهل معتاد، أقل عمر معتاد، صيغ أخرى)
+OCCUPATIONS = [
+    ("1120", "مدير تنفيذي", "اقل من ثانوي", 25, ("رئيس تنفيذي", "CEO", "Managing Director")),
+    ("2120", "محلل بيانات", "بكالوريوس", 21, ("عالم بيانات", "احصائي", "Data Analyst", "Data Scientist", "Statistician")),
+    ("2142", "مهندس مدني", "بكالوريوس", 22, ("Civil Engineer",)),
+    ("2144", "مهندس ميكانيكي", "بكالوريوس", 22, ("Mechanical Engineer",)),
+    ("2151", "مهندس كهربائي", "بكالوريوس", 22, ("مهندس كهرباء", "Electrical Engineer")),
+    ("2149", "مهندس", "بكالوريوس", 22, ("Engineer",)),
+    ("2166", "مصمم", "اقل من ثانوي", 16, ("مصمم جرافيك", "Designer", "Graphic Designer")),
+    ("2211", "طبيب عام", "بكالوريوس", 24, ("طبيب", "Doctor", "Physician", "General Practitioner")),
+    ("2212", "طبيب متخصص", "بكالوريوس", 28, ("طبيب استشاري", "جراح", "Surgeon", "Specialist Physician")),
+    ("2221", "ممرض", "دبلوم", 20, ("Nurse",)),
+    ("2250", "طبيب بيطري", "بكالوريوس", 24, ("Veterinarian",)),
+    ("2261", "طبيب اسنان", "بكالوريوس", 24, ("Dentist",)),
+    ("2262", "صيدلي", "بكالوريوس", 23, ("Pharmacist",)),
+    ("2310", "استاذ جامعي", "ماجستير", 26, ("محاضر", "عضو هيئه تدريس", "Professor", "Lecturer")),
+    ("2341", "معلم", "بكالوريوس", 22, ("مدرس", "Teacher")),
+    ("2411", "محاسب", "دبلوم", 20, ("Accountant",)),
+    ("2421", "مستشار", "بكالوريوس", 23, ("Consultant",)),
+    ("2512", "مهندس برمجيات", "دبلوم", 20, ("مطور برمجيات", "مبرمج", "Software Engineer", "Software Developer", "Programmer")),
+    ("2611", "محامي", "بكالوريوس", 23, ("محام", "Lawyer", "Attorney")),
+    ("2634", "اخصائي نفسي", "بكالوريوس", 22, ("Psychologist",)),
+    ("3153", "طيار", "دبلوم", 21, ("Pilot",)),
+    ("3256", "مساعد طبيب", "دبلوم", 20, ("Medical Assistant",)),
+    ("3322", "مندوب مبيعات", "اقل من ثانوي", 18, ("Sales Representative",)),
+    ("4110", "موظف اداري", "ثانوي", 18, ("اداري", "سكرتير", "Clerk", "Secretary", "Administrative Officer")),
+    ("5120", "طباخ", "اقل من ثانوي", 16, ("Cook", "Chef")),
+    ("5221", "تاجر", "اقل من ثانوي", 18, ("صاحب محل", "Merchant", "Shopkeeper")),
+    ("5223", "بائع", "اقل من ثانوي", 16, ("Salesperson", "Sales Assistant")),
+    ("5414", "حارس امن", "اقل من ثانوي", 18, ("Security Guard",)),
+    ("7126", "سباك", "اقل من ثانوي", 18, ("Plumber",)),
+    ("7233", "فني صيانة", "اقل من ثانوي", 18, ("فني", "Technician", "Maintenance Technician")),
+    ("7411", "كهربائي", "اقل من ثانوي", 18, ("Electrician",)),
+    ("8322", "سائق", "اقل من ثانوي", 18, ("Driver",)),
+    ("8332", "سائق شاحنة", "اقل من ثانوي", 20, ("Truck Driver",)),
+    ("9112", "عامل نظافة", "اقل من ثانوي", 16, ("Cleaner",)),
+]
+
+Occupation = namedtuple("Occupation", "code name education education_rank min_age")
+
+
+def _education_entries():
+    for rank, level in enumerate(EDUCATION_LEVELS):
+        yield level, rank
+        for alias in EDUCATION_ALIASES.get(level, ()):
+            yield alias, rank
+
+
+def _occupation_entries():
+    for code, name, education, min_age, aliases in OCCUPATIONS:
+        occupation = Occupation(code, name, education, EDUCATION_LEVELS.index(education), min_age)
+        for phrase in (name, *aliases):
+            yield phrase, occupation
+
+
+EDUCATION_INDEX = PhraseIndex(_education_entries())
+OCCUPATION_INDEX = PhraseIndex(_occupation_entries())
+
+
+@lru_cache(maxsize=16384)
+def education_rank(text: str):
+    """رتبة المؤهل في EDUCATION_LEVELS ("بكالوريوس هندسة" -> 3)، أو None إن لم يُعرف"""
+    return EDUCATION_INDEX.match(text)
+
+
+@lru_cache(maxsize=16384)
+def match_job_title(text: str):
+    """Occupation لأطول مسمى معروف داخل النص، أو None"""
+    return OCCUPATION_INDEX.match(text)
+
+# ---------------------------
+# Rule values
+# ---------------------------
+# قيم رقمية ونصية لقواعد rules.py (نفس المفاتيح دائماً، والقيم الافتراضية لا تُطلق قاعدة)
+_NO_OCCUPATION = {"job_code": "", "job_name": "", "job_education": "", "job_education_rank": 0, "job_min_age": 0}
+
+
+@lru_cache(maxsize=16384)
+def education_values(text: str) -> dict:
+    rank = education_rank(text)
+    return {"education_rank": UNKNOWN_EDUCATION_RANK if rank is None else rank}
+
+
+@lru_cache(maxsize=16384)
+def job_title_values(text: str) -> dict:
+    occupation = match_job_title(text)
+    if occupation is None:
+        return _NO_OCCUPATION
+    return {
+        "job_code": occupation.code,
+        "job_name": occupation.name,
+        "job_education": occupation.education,
+        "job_education_rank": occupation.education_rank,
+        "job_min_age": occupation.min_age,
+    }
@@ -0,0 +1,412 @@
+"""القيم الشاذة إحصائياً: توزيعات مرجعية لكل شريحة محسوبة مسبقاً من المستخرجات السابقة
+
+    python -m guardian.outliers build wave1.csv.gz wave2.csv.gz -o reference.gor
+    python -m guardian.outliers update reference.gor wave3.csv.gz
+    python -m guardian.outliers show reference.gor
+    GUARDIAN_OUTLIER_REFERENCE=reference.gor streamlit run app.py
+
+لكل مقياس (الراتب، سنوات الخبرة) ولكل شريحة (المؤهل × القطاع × المنطقة × فئة العمر،
+ثم شرائح أعم عند قلة البيانات) مدرج تكراري بحدود ثابتة يُحدَّث تراكمياً من كل موجة.
+الوسيط والمدى الربيعي يُحسبان عند البناء ويُخزنان في رأس الملف: التحميل قراءة JSON
+صغير، والفحص بضع عمليات بحث في جدول لكل استمارة. المدرجات نفسها لا تُفك إلا عند التحديث.
+"""
+import argparse
+import array
+import hashlib
+import json
+import math
+import struct
+import sys
+import threading
+import time
+import zlib
+
+from .arabic import normalize_arabic
+from .config import OUTLIER_MIN_SEGMENT, OUTLIER_REFERENCE_PATH, OUTLIER_Z_THRESHOLD
+
+MAGIC = b"GOUTREF1"
+# 2: قيم الشرائح مطبّعة بـ normalize_arabic؛ ملفات الإصدار 1 تُرحّل عند التحميل
+FORMAT_VERSION = 2
+
+# field: الحقل في form_data؛ log: المدرج على لوغاريتم القيمة (للرواتب)؛ positive: تجاهل الأصفار
+METRICS = {
+    "salary": {"field": "Monthly Salary", "log": True, "positive": True, "low": 500, "high": 500000, "bins": 96},
+    "experience": {"field": "Years Experience", "log": False, "positive": False, "low": 0, "high": 60, "bins": 60},
+}
+
+# من الأدق إلى الأعم؛ الفحص يستخدم أول شريحة فيها OUTLIER_MIN_SEGMENT استمارة على الأقل
+LEVELS = (
+    ("Education", "Sector", "Region", "age_band"),
+    ("Education", "Sector", "age_band"),
+    ("Education", "age_band"),
+    ("Education",),
+    (),
+)
+
+FIELD_LABELS = {"Education": "المؤهل العلمي", "Sector": "القطاع", "Region": "المنطقة", "age_band": "الفئة العمرية"}
+
+AGE_BANDS = ((25, "<25"), (35, "25-34"), (45, "35-44"), (55, "45-54"), (65, "55-64"))
+
+# المدى الربيعي / 1.349 تقدير للانحراف المعياري لا يتأثر بالقيم الشاذة نفسها
+IQR_TO_SIGMA = 1.349
+
+
+def age_band(age) -> str:
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        return ""
+    for upper, label in AGE_BANDS:
+        if age < upper:
+            return label
+    return "65+"
+
+
+def segment_keys(form_data: dict) -> list:
+    """مفتاح الشريحة لكل مستوى في LEVELS (بعد التطبيع: "مكة المكرمة" = "مكه المكرمه")"""
+    values = {}
+    for field in ("Education", "Sector", "Region"):
+        value = form_data.get(field)
+        values[field] = normalize_arabic(value) if isinstance(value, str) else ""
+    values["age_band"] = age_band(form_data.get("Age"))
+    return [f"{level}|" + "|".join(values[field] for field in fields) for level, fields in enumerate(LEVELS)]
+
+
+def _transform(metric: dict, value: float) -> float:
+    return math.log(value) if metric["log"] else float(value)
+
+
+def _inverse(metric: dict, t: float) -> float:
+    return math.exp(t) if metric["log"] else t
+
+
+def _edges(metric: dict):
+    low, high = _transform(metric, metric["low"]), _transform(metric, metric["high"])
+    return low, (high - low) / metric["bins"]
+
+
+def _metric_value(metric: dict, form_data: dict):
+    value = form_data.get(metric["field"])
+    if value is None or value == "":
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if value != value or value < 0 or (metric["positive"] and value <= 0):
+        return None
+    return value
+
+
+def _quantile(counts, total: int, q: float, low: float, width: float) -> float:
+    rank = q * total
+    seen = 0
+    for i, n in enumerate(counts):
+        if n and seen + n >= rank:
+            return low + width * (i + (rank - seen) / n)
+        seen += n
+    return low + width * len(counts)
+
+
+class ReferenceDistributions:
+    """مدرجات مرجعية لكل شريحة، وجدول (الوسيط، المقياس) المشتق منها للفحص"""
+
+    def __init__(self, min_count: int = OUTLIER_MIN_SEGMENT, metrics=None):
+        self.metrics = dict(METRICS if metrics is None else metrics)
+        self.min_count = max(1, int(min_count))
+        self.histograms = {}
+        self.table = {}
+        self.forms = 0
+        self.waves = 0
+        self.updated = None
+        self.version = "empty"
+        self._packed = None
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Building
+    # ---------------------------
+    def _unpack(self) -> None:
+        if self._packed is None:
+            return
+        keys, blob = self._packed
+        counts = array.array("I")
+        counts.frombytes(zlib.decompress(blob))
+        if sys.byteorder == "big":
+            counts.byteswap()
+        offset = 0
+        for key in keys:
+            size = self.metrics[key.split("|", 1)[0]]["bins"]
+            self.histograms[key] = counts[offset:offset + size]
+            offset += size
+        self._packed = None
+
+    def _normalize_keys(self) -> None:
+        """دمج مدرجات الشرائح التي تتطابق قيمها بعد التطبيع (ترحيل ملفات الإصدار 1)"""
+        self._unpack()
+        merged = {}
+        for key, counts in self.histograms.items():
+            name, level, *values = key.split("|")
+            key = "|".join([name, level] + [normalize_arabic(value) for value in values])
+            target = merged.get(key)
+            if target is None:
+                merged[key] = counts
+            else:
+                for i, n in enumerate(counts):
+                    target[i] += n
+        self.histograms = merged
+
+    def add(self, form_data: dict) -> None:
+        """إضافة استمارة إلى المدرجات (الجدول لا يتغير حتى rebuild)"""
+        self._unpack()
+        segments = None
+        for name, metric in self.metrics.items():
+            value = _metric_value(metric, form_data)
+            if value is None:
+                continue
+            low, width = _edges(metric)
+            index = min(metric["bins"] - 1, max(0, int((_transform(metric, value) - low) / width)))
+            if segments is None:
+                segments = segment_keys(form_data)
+            for segment in segments:
+                key = f"{name}|{segment}"
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = array.array("I", bytes(4 * metric["bins"]))
+                histogram[index] += 1
+        self.forms += 1
+
+    def update(self, records) -> int:
+        """إضافة موجة جديدة ثم إعادة حساب الجدول؛ يعيد عدد الاستمارات المضافة"""
+        with self._lock:
+            count = 0
+            for form_data in records:
+                self.add(form_data)
+                count += 1
+            self.waves += 1
+            self.rebuild()
+        return count
+
+    def rebuild(self) -> None:
+        """حساب (العدد، الوسيط، المقياس، الربيع الأول، الربيع الثالث) للشرائح الكافية"""
+        self._unpack()
+        table = {}
+        for key, counts in self.histograms.items():
+            total = sum(counts)
+            if total < self.min_count:
+                continue
+            metric = self.metrics[key.split("|", 1)[0]]
+            low, width = _edges(metric)
+            q1, median, q3 = (_quantile(counts, total, q, low, width) for q in (0.25, 0.5, 0.75))
+            scale = max((q3 - q1) / IQR_TO_SIGMA, width)
+            table[key] = (total, round(median, 4), round(scale, 4), round(q1, 4), round(q3, 4))
+        self.table = table
+        self.updated = time.time()
+        digest = hashlib.sha1(json.dumps(table, sort_keys=True).encode("utf-8")).hexdigest()
+        self.version = digest[:8]
+
+    # ---------------------------
+    # Scoring
+    # ---------------------------
+    def lookup(self, name: str, segments):
+        """(مستوى الشريحة، المدخل) لأول شريحة في الجدول من الأدق إلى الأعم"""
+        for level, segment in enumerate(segments):
+            entry = self.table.get(f"{name}|{segment}")
+            if entry is not None:
+                return level, entry
+        return None, None
+
+    def scores(self, form_data: dict) -> dict:
+        """{مقياس: (القيمة، z، المستوى، المدخل)} للمقاييس الموجودة في الاستمارة"""
+        out = {}
+        segments = None
+        for name, metric in self.metrics.items():
+            value = _metric_value(metric, form_data)
+            if value is None:
+                continue
+            if segments is None:
+                segments = segment_keys(form_data)
+            level, entry = self.lookup(name, segments)
+            if entry is None:
+                continue
+            _, median, scale, _, _ = entry
+            out[name] = (value, (_transform(metric, value) - median) / scale, level, entry)
+        return out
+
+    def check(self, form_data: dict, threshold: float = OUTLIER_Z_THRESHOLD) -> list:
+        """مشكلات القيم الشاذة بنفس مخطط analyze_form_demo"""
+        if not self.table:
+            return []
+        issues = []
+        for name, (value, z, level, entry) in self.scores(form_data).items():
+            if abs(z) < threshold:
+                continue
+            metric = self.metrics[name]
+            _, median, _, q1, q3 = entry
+            fields = LEVELS[level]
+            segment = "، ".join(
+                str(form_data.get(field) or "-") if field != "age_band" else age_band(form_data.get("Age"))
+                for field in fields
+            ) or "جميع الاستمارات"
+            direction = "أعلى" if z > 0 else "أقل"
+            typical = f"{_inverse(metric, q1):,.0f}-{_inverse(metric, q3):,.0f}"
+            if name == "salary":
+                field_1 = "الراتب الشهري"
+                description = (
+                    f"راتب {value:,.0f} ريال {direction} بكثير من المعتاد لشريحة ({segment}): "
+                    f"الوسيط {_inverse(metric, median):,.0f} والمدى المعتاد {typical}"
+                )
+                suggestion = "تأكد من الراتب (خانة زائدة أو ناقصة؟) أو من المؤهل والقطاع"
+            else:
+                field_1 = "سنوات الخبرة"
+                description = (
+                    f"سنوات خبرة {value:,.0f} {direction} بكثير من المعتاد لشريحة ({segment}): "
+                    f"الوسيط {_inverse(metric, median):,.0f} والمدى المعتاد {typical}"
+                )
+                suggestion = "راجع سنوات الخبرة والعمر"
+            issues.append({
+                "severity": "medium",
+                "field_1": field_1,
+                "field_2": " و".join(FIELD_LABELS[field] for field in fields) or "جميع الاستمارات",
+                "description": description,
+                "suggestion": suggestion,
+                "rule": f"{name}_outlier",
+            })
+        return issues
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self, path: str) -> None:
+        """رأس JSON (الجدول والبيانات الوصفية) ثم المدرجات مضغوطة"""
+        self._unpack()
+        keys = sorted(self.histograms)
+        counts = array.array("I")
+        for key in keys:
+            counts.extend(self.histograms[key])
+        if sys.byteorder == "big":
+            counts.byteswap()
+        header = json.dumps({
+            "format": FORMAT_VERSION,
+            "metrics": self.metrics,
+            "min_count": self.min_count,
+            "forms": self.forms,
+            "waves": self.waves,
+            "updated": self.updated,
+            "version": self.version,
+            "table": self.table,
+            "histograms": keys,
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with open(path, "wb") as handle:
+            handle.write(MAGIC + struct.pack("<I", len(header)) + header)
+            handle.write(zlib.compress(counts.tobytes(), 6))
+
+    @classmethod
+    def load(cls, path: str) -> "ReferenceDistributions":
+        with open(path, "rb") as handle:
+            data = handle.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{path} is not an outlier reference file")
+        (size,) = struct.unpack_from("<I", data, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(data[start:start + size].decode("utf-8"))
+        if header.get("format") not in (1, FORMAT_VERSION):
+            raise ValueError(f"unsupported outlier reference format {header.get('format')}")
+
+        reference = cls(header["min_count"], header["metrics"])
+        reference.forms = header["forms"]
+        reference.waves = header["waves"]
+        reference.updated = header["updated"]
+        reference.version = header["version"]
+        reference.table = {key: tuple(entry) for key, entry in header["table"].items()}
+        reference._packed = (header["histograms"], data[start + size:])
+        if header["format"] < FORMAT_VERSION:
+            reference._normalize_keys()
+            reference.rebuild()
+        return reference
+
+    def describe(self) -> dict:
+        overall = {}
+        for name, metric in self.metrics.items():
+            entry = self.table.get(f"{name}|{len(LEVELS) - 1}|")
+            if entry is not None:
+                total, median, _, q1, q3 = entry
+                overall[name] = {
+                    "forms": total,
+                    "median": round(_inverse(metric, median), 1),
+                    "q1": round(_inverse(metric, q1), 1),
+                    "q3": round(_inverse(metric, q3), 1),
+                }
+        return {
+            "version": self.version,
+            "forms": self.forms,
+            "waves": self.waves,
+            "updated": self.updated,
+            "min_count": self.min_count,
+            "segments": len(self.table),
+            "overall": overall,
+        }
+
+
+_REFERENCES = {}
+_REFERENCES_LOCK = threading.Lock()
+
+
+def load_reference(path: str) -> ReferenceDistributions:
+    """تحميل مرة واحدة لكل مسار في العملية (وفي كل عامل من عمال ParallelExecutor)"""
+    reference = _REFERENCES.get(path)
+    if reference is None:
+        with _REFERENCES_LOCK:
+            reference = _REFERENCES.get(path)
+            if reference is None:
+                reference = _REFERENCES[path] = ReferenceDistributions.load(path)
+    return reference
+
+
+def get_outlier_reference():
+    """المرجع المحدد في GUARDIAN_OUTLIER_REFERENCE، أو None إن لم يُحدد أو لم يُبن بعد"""
+    if OUTLIER_REFERENCE_PATH is None:
+        return None
+    try:
+        return load_reference(OUTLIER_REFERENCE_PATH)
+    except FileNotFoundError:
+        return None
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Build and update per-segment reference distributions for outlier checks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a reference from one or more extracts (each one a wave)")
+    build.add_argument("inputs", nargs="+")
+    build.add_argument("-o", "--output", required=True)
+    build.add_argument("--min-count", type=int, default=OUTLIER_MIN_SEGMENT, help="smallest segment used for scoring")
+    update = commands.add_parser("update", help="add new waves to an existing reference")
+    update.add_argument("reference")
+    update.add_argument("inputs", nargs="+")
+    update.add_argument("-o", "--output", help="write here instead of updating in place")
+    show = commands.add_parser("show", help="print a summary of a reference")
+    show.add_argument("reference")
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        print(json.dumps(ReferenceDistributions.load(args.reference).describe(), ensure_ascii=False, indent=2))
+        return
+
+    from .stream import read_records
+
+    if args.command == "build":
+        reference, output = ReferenceDistributions(args.min_count), args.output
+    else:
+        reference, output = ReferenceDistributions.load(args.reference), args.output or args.reference
+    started = time.perf_counter()
+    for path in args.inputs:
+        reference.update(read_records(path))
+    reference.save(output)
+    summary = reference.describe()
+    summary["elapsed_s"] = round(time.perf_counter() - started, 2)
+    summary["output"] = output
+    print(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""تنفيذ القواعد على عدة أنوية (ProcessPoolExecutor) للمستخرجات الكبيرة
+
+كل عامل يترجم مجموعة القواعد مرة واحدة عند بدئه (وليس مع كل مهمة)، وحجم
+الدفعة يتكيف مع زمن التنفيذ الفعلي، والنتائج تُعاد بترتيب الإدخال نفسه فتكون
+مطابقة للتنفيذ المتسلسل.
+"""
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .household import HouseholdChunker
+from .rules import RULESET, evaluate_rules
+
+TARGET_TASK_SECONDS = 0.2
+INITIAL_CHUNK_SIZE = 2000
+MIN_CHUNK_SIZE = 256
+MAX_CHUNK_SIZE = 50000
+
+
+def _init_worker() -> None:
+    # fork يرث RULESET مترجمة (بما فيها قواعد register_rule)، وspawn يترجمها عند الاستيراد؛
+    # في الحالتين يحدث ذلك هنا مرة واحدة لكل عامل قبل أول مهمة
+    RULESET.evaluate({})
+
+
+def _run_task(fn, start: int, chunk: list, args: tuple):
+    started = time.perf_counter()
+    payload = fn(start, chunk, *args)
+    return time.perf_counter() - started, payload
+
+
+def _mp_context():
+    # fork ينسخ القواعد المسجلة وقت التشغيل كما هي؛ spawn لا يرى إلا القواعد المعرفة عند الاستيراد
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+class ParallelExecutor:
+    """يوزع دفعات السجلات على عمليات متعددة ويعيدها بترتيب الإدخال
+
+    chunk_size=None يعني حجم دفعة متكيف يستهدف target_seconds لكل مهمة.
+    """
+
+    def __init__(self, workers=None, chunk_size=None, target_seconds: float = TARGET_TASK_SECONDS):
+        self.workers = max(1, int(workers or default_workers()))
+        self.fixed_chunk_size = chunk_size
+        self.chunk_size = int(chunk_size or INITIAL_CHUNK_SIZE)
+        self.target_seconds = target_seconds
+        self._pool = None
+
+    def __enter__(self):
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=_mp_context(),
+            initializer=_init_worker,
+        )
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+
+    def _adapt(self, size: int, elapsed: float) -> None:
+        if self.fixed_chunk_size or elapsed <= 0 or size <= 0:
+            return
+        ideal = int(self.target_seconds * size / elapsed)
+        # متوسط مع الحجم الحالي لتجنب التذبذب
+        self.chunk_size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, (self.chunk_size + ideal) // 2))
+
+    def map_chunks(self, fn, items, *args, households: bool = False):
+        """يولّد (start, size, payload) لكل دفعة بالترتيب، حيث payload = fn(start, chunk, *args)
+
+        fn يجب أن تكون دالة على مستوى وحدة حتى يمكن إرسالها للعمال.
+        households=True لا يقسم سجلات الأسرة المتتالية بين دفعتين.
+        """
+        reader = HouseholdChunker(items, households)
+        inflight = deque()
+        max_inflight = self.workers * 2
+        start = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(inflight) < max_inflight:
+                chunk = reader.take(self.chunk_size)
+                if not chunk:
+                    exhausted = True
+                    break
+                inflight.append((start, len(chunk), self._pool.submit(_run_task, fn, start, chunk, args)))
+                start += len(chunk)
+            if not inflight:
+                return
+            chunk_start, size, future = inflight.popleft()
+            elapsed, payload = future.result()
+            self._adapt(size, elapsed)
+            yield chunk_start, size, payload
+
+
+def _evaluate_chunk(start: int, chunk: list) -> list:
+    return [evaluate_rules(form_data) for form_data in chunk]
+
+
+def validate_records_parallel(records, workers=None, chunk_size=None):
+    """نفس نتائج evaluate_rules لكل سجل وبنفس الترتيب، موزعة على عدة أنوية"""
+    with ParallelExecutor(workers, chunk_size) as executor:
+        for _, _, results in executor.map_chunks(_evaluate_chunk, records):
+            yield from results
@@ -0,0 +1,219 @@
+"""مسارات الفحص الموحدة: AI مع Fallback، الفرز بالقواعد، والوضع اللحظي"""
+import asyncio
+import concurrent.futures
+import time
+from collections import namedtuple
+
+from .ai import get_ai_loop
+from .backends import get_backend, get_verdict_log
+from .cache import form_cache_key
+from .config import REALTIME_BUDGET_MS
+from .resilience import CircuitOpenError, RateLimitWaitError, classify_failure
+from .rules import analyze_form_demo, demo_version, evaluate_form
+from .schema import SchemaError
+from .telemetry import get_telemetry
+from .triage import triage_form
+
+
+def fallback_reason(error: BaseException) -> str:
+    """سبب الرجوع إلى القواعد: circuit_open أو rate_wait أو schema أو أحد أنواع classify_failure"""
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, RateLimitWaitError):
+        return "rate_wait"
+    if isinstance(error, SchemaError):
+        return "schema"
+    return classify_failure(error)
+
+
+def _record_fallback(error: BaseException, path: str) -> None:
+    telemetry = get_telemetry()
+    if telemetry.enabled:
+        telemetry.inc("fallback_total", reason=fallback_reason(error), path=path)
+
+
+def _store(cache, key, backend, form_data: dict, result: dict) -> None:
+    """حفظ حكم النموذج في الذاكرة، وفي سجل الأحكام لتدريب المصنف"""
+    if cache is not None:
+        cache.set(key, result)
+    if backend.teaches:
+        get_verdict_log().record(form_data, result, backend.name)
+
+
+# ---------------------------
+# Cached Demo
+# ---------------------------
+def analyze_form_demo_cached(form_data: dict, cache=None) -> dict:
+    if cache is None:
+        return analyze_form_demo(form_data)
+
+    key = form_cache_key(form_data, demo_version())
+    result = cache.get(key)
+    if result is None:
+        result = analyze_form_demo(form_data)
+        cache.set(key, result)
+    return result
+
+# ---------------------------
+# Unified: AI then fallback to Demo
+# ---------------------------
+def analyze_form_with_fallback(api_key: str, form_data: dict, cache=None, on_issue=None):
+    """on_issue (اختياري): يُطلب الرد بالتدفق وتُمرر كل مشكلة فور اكتمالها"""
+    telemetry = get_telemetry()
+    if not telemetry.enabled:
+        return _analyze_form_with_fallback(api_key, form_data, cache, on_issue)
+    started = time.perf_counter()
+    result, mode = _analyze_form_with_fallback(api_key, form_data, cache, on_issue)
+    telemetry.observe("pipeline", time.perf_counter() - started)
+    telemetry.inc("checks_total", mode=mode)
+    return result, mode
+
+
+def _analyze_form_with_fallback(api_key: str, form_data: dict, cache=None, on_issue=None):
+    backend = get_backend()
+    # no key (or no local model) -> demo
+    if not backend.available(api_key):
+        return analyze_form_demo_cached(form_data, cache), "demo"
+
+    key = None
+    try:
+        if cache is not None:
+            key = form_cache_key(form_data, backend.version)
+            result = cache.get(key)
+            if result is not None:
+                return result, "ai"
+
+        result = backend.analyze(api_key, form_data, on_issue)
+        _store(cache, key, backend, form_data, result)
+        return result, "ai"
+    except Exception as e:
+        # أخطاء الحصة/429/المهلة يسجلها قاطع الدائرة فتذهب الاستمارات التالية إلى
+        # القواعد مباشرة (CircuitOpenError) دون انتظار طلب فاشل.
+        # Any error -> demo (حتى ما يوقف التطبيق)، مع تسجيل السبب في fallback_total
+        _record_fallback(e, "sync")
+        return analyze_form_demo_cached(form_data, cache), "demo"
+
+
+def analyze_form_tiered(api_key: str, form_data: dict, cache=None, policy=None, stats=None, on_issue=None):
+    """القواعد أولاً، ثم analyze_form_with_fallback للاستمارات غير المحسومة فقط"""
+    with get_telemetry().timer("triage"):
+        decision = triage_form(form_data, policy)
+    if stats is not None:
+        stats.record(decision)
+
+    if not decision.escalate or not get_backend().available(api_key):
+        return decision.result, "rules"
+    return analyze_form_with_fallback(api_key, form_data, cache, on_issue)
+
+# ---------------------------
+# Real-time Mode (latency budget)
+# ---------------------------
+RealtimeVerdict = namedtuple("RealtimeVerdict", "result mode pending")
+
+
+def analyze_form_realtime(
+    api_key: str,
+    form_data: dict,
+    budget_ms: int = REALTIME_BUDGET_MS,
+    cache=None,
+    policy=None,
+    stats=None,
+    ai_loop=None,
+) -> RealtimeVerdict:
+    """حكم القواعد فوراً، وترقيته إلى حكم AI إذا وصل خلال ميزانية الزمن
+
+    إذا لم يصل حكم AI خلال budget_ms تُعاد نتيجة القواعد مع pending (Future)
+    يكتمل بحكم AI لاحقاً ويُخزن في cache عند وصوله. policy=None يعني عدم
+    الفرز: كل استمارة تُرسل إلى AI.
+    """
+    if policy is None:
+        local, escalate = evaluate_form(form_data), True
+    else:
+        decision = triage_form(form_data, policy)
+        if stats is not None:
+            stats.record(decision)
+        local, escalate = decision.result, decision.escalate
+
+    backend = get_backend()
+    if not escalate or not backend.available(api_key):
+        return RealtimeVerdict(local, "rules", None)
+
+    key = None
+    if cache is not None:
+        key = form_cache_key(form_data, backend.version)
+        cached = cache.get(key)
+        if cached is not None:
+            return RealtimeVerdict(cached, "ai", None)
+
+    ai_loop = get_ai_loop() if ai_loop is None else ai_loop
+    pending = ai_loop.submit(backend.analyze_async(api_key, form_data))
+
+    def store(future):
+        if not future.cancelled() and future.exception() is None:
+            _store(cache, key, backend, form_data, future.result())
+    pending.add_done_callback(store)
+
+    try:
+        return RealtimeVerdict(pending.result(timeout=budget_ms / 1000), "ai", None)
+    except concurrent.futures.TimeoutError:
+        return RealtimeVerdict(local, "rules", pending)
+    except Exception as e:
+        _record_fallback(e, "realtime")
+        return RealtimeVerdict(local, "demo", None)
+
+# ---------------------------
+# Async pipeline (HTTP service)
+# ---------------------------
+PIPELINE_MODES = ("rules", "tiered", "ai")
+
+
+async def analyze_form_async(
+    api_key: str,
+    form_data: dict,
+    mode: str = "tiered",
+    cache=None,
+    policy=None,
+    stats=None,
+    budget_ms=None,
+):
+    """نسخة غير متزامنة من مسارات الفحص لا تحجز حلقة الأحداث
+
+    mode: rules (القواعد فقط) أو tiered (الفرز أولاً) أو ai (AI ثم القواعد عند الفشل).
+    budget_ms (اختياري): بعد انقضائه تُعاد نتيجة القواعد ويُكمل طلب AI في
+    الخلفية ليُخزن في cache.
+    """
+    if mode == "ai":
+        local, escalate = evaluate_form(form_data), True
+    else:
+        decision = triage_form(form_data, policy)
+        if stats is not None:
+            stats.record(decision)
+        local, escalate = decision.result, decision.escalate
+
+    backend = get_backend()
+    if mode == "rules" or not escalate or not backend.available(api_key):
+        return local, "rules"
+
+    key = None
+    if cache is not None:
+        key = form_cache_key(form_data, backend.version)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached, "ai"
+
+    task = asyncio.ensure_future(backend.analyze_async(api_key, form_data))
+
+    def store(done):
+        if not done.cancelled() and done.exception() is None:
+            _store(cache, key, backend, form_data, done.result())
+    task.add_done_callback(store)
+
+    try:
+        if budget_ms is None:
+            return await task, "ai"
+        return await asyncio.wait_for(asyncio.shield(task), budget_ms / 1000), "ai"
+    except asyncio.TimeoutError:
+        return local, "rules"
+    except Exception as e:
+        _record_fallback(e, "async")
+        return local, "demo"
@@ -0,0 +1,271 @@
+"""حماية مسار OpenAI: قاطع دائرة ومحدد معدل بدلو رموز
+
+- CircuitBreaker يُفتح بعد تكرار أخطاء الحصة/429/المهلة فتذهب الاستمارات مباشرة
+  إلى القواعد دون انتظار طلب فاشل، ثم يسمح بطلب تجريبي واحد بعد فترة التهدئة.
+- RateLimiter يبقي الطلبات والرموز تحت الحد الدقيقي، ويصحح حدوده من رؤوس
+  x-ratelimit-* التي يعيدها الخادم.
+"""
+import asyncio
+import concurrent.futures
+import sys
+import threading
+import time
+
+from .config import (
+    AI_RATE_MAX_WAIT_SECONDS,
+    AI_REQUESTS_PER_MINUTE,
+    AI_TOKENS_PER_MINUTE,
+    BREAKER_COOLDOWN_SECONDS,
+    BREAKER_FAILURE_THRESHOLD,
+)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class RateLimitWaitError(RuntimeError):
+    pass
+
+
+# ---------------------------
+# Failure classification
+# ---------------------------
+QUOTA_SIGNALS = ("insufficient_quota", "exceeded your current quota", "billing", "payment")
+
+# أنواع الفشل التي تعني أن الطلبات التالية ستفشل غالباً بنفس الطريقة
+TRIP_KINDS = ("quota", "rate_limit", "timeout", "connection")
+
+
+def classify_failure(error: BaseException) -> str:
+    """quota أو rate_limit أو timeout أو connection أو other"""
+    if isinstance(error, (asyncio.TimeoutError, concurrent.futures.TimeoutError, TimeoutError)):
+        return "timeout"
+    message = str(error).lower()
+    # أخطاء openai لا تنشأ قبل استيرادها، فلا داعي لاستيرادها هنا
+    openai = sys.modules.get("openai")
+    if openai is not None:
+        if isinstance(error, openai.APITimeoutError):
+            return "timeout"
+        if isinstance(error, openai.APIConnectionError):
+            return "connection"
+        if isinstance(error, openai.RateLimitError):
+            code = getattr(error, "code", None) or ""
+            return "quota" if code == "insufficient_quota" or any(s in message for s in QUOTA_SIGNALS) else "rate_limit"
+        if isinstance(error, openai.APIStatusError):
+            return "quota" if error.status_code == 402 else "other"
+    if any(s in message for s in QUOTA_SIGNALS):
+        return "quota"
+    if "429" in message:
+        return "rate_limit"
+    return "other"
+
+# ---------------------------
+# Circuit Breaker
+# ---------------------------
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, cooldown_seconds: float = BREAKER_COOLDOWN_SECONDS):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+        self.rejected = 0
+        self.last_failure = None
+
+    def before(self) -> None:
+        """يُستدعى قبل كل طلب؛ CircuitOpenError إذا كان القاطع مفتوحاً"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"AI circuit open after {self.last_failure} failures")
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def failure(self, error: BaseException) -> str:
+        kind = classify_failure(error) if isinstance(error, Exception) else "other"
+        with self._lock:
+            probing, self._probing = self._probing, False
+            if kind not in TRIP_KINDS:
+                if probing:
+                    # الطلب التجريبي وصل إلى الخدمة وفشل لسبب لا يخص توفرها
+                    self.state = self.CLOSED
+                    self.failures = 0
+                return kind
+            self.last_failure = kind
+            self.failures += 1
+            if probing or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+        return kind
+
+    def release(self) -> None:
+        """الطلب لم يُرسل (مثلاً انتظار المعدل) - لا يُحسب نجاحاً ولا فشلاً"""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> dict:
+        retry_in = 0.0
+        if self.state == self.OPEN:
+            retry_in = max(0.0, self.cooldown_seconds - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "last_failure": self.last_failure,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_in": retry_in,
+        }
+
+# ---------------------------
+# Token-bucket Rate Limiter
+# ---------------------------
+class _Bucket:
+    __slots__ = ("capacity", "level", "updated")
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.capacity
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: int = AI_REQUESTS_PER_MINUTE, tokens_per_minute: int = AI_TOKENS_PER_MINUTE):
+        self._lock = threading.Lock()
+        self.requests = _Bucket(requests_per_minute)
+        self.tokens = _Bucket(tokens_per_minute)
+        self._paused_until = 0.0
+        self.granted = 0
+        self.waited_seconds = 0.0
+        self.refused = 0
+        self.limits_source = "config"
+
+    def _reserve(self, tokens: int) -> float:
+        """يحجز طلباً وtokens رمزاً ويعيد 0، أو يعيد زمن الانتظار اللازم دون حجز"""
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            wait = max(self._paused_until - now, self.requests.wait_for(1), self.tokens.wait_for(tokens))
+            if wait > 0:
+                return wait
+            self.requests.level -= 1
+            self.tokens.level -= min(tokens, self.tokens.capacity)
+            self.granted += 1
+            return 0.0
+
+    def acquire(self, tokens: int, max_wait=AI_RATE_MAX_WAIT_SECONDS) -> None:
+        """ينتظر حتى تتوفر السعة؛ RateLimitWaitError إذا تجاوز الانتظار max_wait (None = بلا حد)"""
+        waited = 0.0
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                break
+            if max_wait is not None and waited + wait > max_wait:
+                self.refused += 1
+                raise RateLimitWaitError(f"AI rate limit: next slot in {wait:.1f}s")
+            time.sleep(wait)
+            waited += wait
+        self.waited_seconds += waited
+
+    async def acquire_async(self, tokens: int, max_wait=AI_RATE_MAX_WAIT_SECONDS) -> None:
+        waited = 0.0
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                break
+            if max_wait is not None and waited + wait > max_wait:
+                self.refused += 1
+                raise RateLimitWaitError(f"AI rate limit: next slot in {wait:.1f}s")
+            await asyncio.sleep(wait)
+            waited += wait
+        self.waited_seconds += waited
+
+    def settle(self, reserved: int, used: int) -> None:
+        """إعادة الفرق بين الرموز المحجوزة تقديرياً والمستهلكة فعلاً"""
+        with self._lock:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + reserved - used)
+
+    def observe(self, headers) -> None:
+        """تحديث الحدود والمتبقي من رؤوس الرد (x-ratelimit-* و retry-after)"""
+        if not headers:
+            return
+        with self._lock:
+            for name, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                limit = headers.get(f"x-ratelimit-limit-{name}")
+                remaining = headers.get(f"x-ratelimit-remaining-{name}")
+                try:
+                    if limit is not None and float(limit) > 0:
+                        bucket.capacity = float(limit)
+                        self.limits_source = "headers"
+                    if remaining is not None:
+                        # الحصة مشتركة مع عمليات أخرى: رقم الخادم هو المرجع إن كان أقل
+                        bucket.level = min(bucket.level, float(remaining))
+                except ValueError:
+                    continue
+            try:
+                if headers.get("retry-after-ms"):
+                    pause = float(headers["retry-after-ms"]) / 1000
+                else:
+                    pause = float(headers.get("retry-after") or 0)
+            except ValueError:
+                pause = 0.0
+            if pause > 0:
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "rpm_limit": int(self.requests.capacity),
+                "tpm_limit": int(self.tokens.capacity),
+                "requests_available": int(self.requests.level),
+                "tokens_available": int(self.tokens.level),
+                "granted": self.granted,
+                "refused": self.refused,
+                "waited_seconds": self.waited_seconds,
+                "limits_source": self.limits_source,
+            }
+
+
+_CIRCUIT_BREAKER = CircuitBreaker()
+_RATE_LIMITER = RateLimiter()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """قاطع دائرة AI المشترك على مستوى العملية"""
+    return _CIRCUIT_BREAKER
+
+
+def get_rate_limiter() -> RateLimiter:
+    """محدد معدل AI المشترك على مستوى العملية"""
+    return _RATE_LIMITER
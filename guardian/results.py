@@ -0,0 +1,484 @@
+"""مخزن نتائج الفحص العمودي: ملفات Parquet للإضافة فقط، مقسّمة حسب التاريخ والمنطقة
+
+    sink = get_result_sink()                       # GUARDIAN_RESULTS_DIR
+    sink.record(form_data, result, mode, latency)  # إضافة إلى طابور في الذاكرة فقط
+    rule_rates("results/", since="2026-10-01")     # نسبة كل قاعدة لكل منطقة
+
+التخطيط (Hive): <root>/date=YYYY-MM-DD/region=<المنطقة>/part-*.parquet، والتاريخ بتوقيت UTC.
+خيط خلفي يكتب الطابور دورياً ملفاً واحداً لكل قسم في كل دفعة، فلا يمس زمن الفحص.
+الملفات الصغيرة تُدمج بـ python -m guardian.results compact. الاستعلامات تقرأ
+الأعمدة المطلوبة فقط، وتستبعد الأقسام من المسار، وتجمع دفعة بعد دفعة فلا تحمّل
+المخزن كاملاً في الذاكرة. pyarrow اختياري ولا يُستورد إلا عند الكتابة أو القراءة.
+"""
+import argparse
+import atexit
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from urllib.parse import quote
+
+from .config import RESULTS_BUFFER_ROWS, RESULTS_DIR, RESULTS_FLUSH_SECONDS
+from .household import RECORD_ID
+from .metrics import UNKNOWN_REGION
+from .rules import RULESET
+from .telemetry import get_telemetry
+
+PARTITIONS = ("date", "region")
+
+# الأعمدة داخل الملفات؛ date وregion من مسار القسم
+COLUMNS = (
+    "ts", "record_id", "mode", "status", "confidence_score", "issue_count", "rules", "severities", "latency_ms",
+    "ruleset", "weight",
+)
+
+ROW_GROUP_SIZE = 128 * 1024
+
+# محاولات كتابة دفعة القسم عند خطأ القرص قبل إسقاطها (تُعاد مع الدفعة التالية)
+WRITE_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("pyarrow is required for the Parquet result store.")
+    return pa, pq
+
+
+def _schema(pa):
+    return pa.schema([
+        ("ts", pa.timestamp("ms", tz="UTC")),
+        ("record_id", pa.string()),
+        ("mode", pa.string()),
+        ("status", pa.string()),
+        ("confidence_score", pa.int16()),
+        ("issue_count", pa.int16()),
+        ("rules", pa.list_(pa.string())),
+        ("severities", pa.list_(pa.string())),
+        ("latency_ms", pa.float32()),
+        ("ruleset", pa.string()),
+        # -1 يسحب حكماً سابقاً (حكم AI متأخر) كما في guardian.metrics؛ الملفات الأقدم بلا العمود = 1
+        ("weight", pa.int8()),
+    ])
+
+
+def _partition_dir(root: str, date: str, region: str) -> str:
+    # قيم الأقسام مرمّزة URI كما يتوقع تقسيم Hive في pyarrow (أسماء المناطق عربية)
+    return os.path.join(root, f"date={date}", f"region={quote(region, safe='')}")
+
+
+def _write_atomic(pq, table, directory: str, name: str) -> str:
+    """كتابة باسم مؤقت يبدأ بنقطة (تتجاهله القراءة) ثم إعادة تسمية، فلا يُقرأ ملف ناقص"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    temp = os.path.join(directory, f".{name}.tmp")
+    pq.write_table(table, temp, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+    os.replace(temp, path)
+    return path
+
+
+def _file_name(kind: str = "part") -> str:
+    return f"{kind}-{int(time.time() * 1000)}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+
+# ---------------------------
+# Write path
+# ---------------------------
+class ResultSink:
+    """حكم لكل سطر؛ record يضيف إلى طابور (بدون قفل) وflush يكتب الطابور دفعة واحدة"""
+
+    def __init__(self, root=None, flush_seconds: float = RESULTS_FLUSH_SECONDS, buffer_rows: int = RESULTS_BUFFER_ROWS):
+        self.root = root
+        self.flush_seconds = flush_seconds
+        self.buffer_rows = max(1, int(buffer_rows))
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = None
+        if root is not None:
+            if importlib.util.find_spec("pyarrow") is None:
+                raise RuntimeError("pyarrow is required for the Parquet result store.")
+            # pyarrow يستورد pandas كسولاً عند أول تحويل، وpandas يستورد concurrent.futures.thread الذي
+            # يرفض الاستيراد بعد بدء إيقاف المفسر؛ تحميله الآن يُبقي flush الأخيرة (atexit) ممكنة
+            importlib.import_module("concurrent.futures.thread")
+
+    def record(self, form_data: dict, result: dict, mode: str, latency=None, ts=None, weight: int = 1) -> None:
+        """latency بالثواني (زمن الفحص كما رآه المستخدم)، ts افتراضياً الآن
+
+        weight=-1 يسحب حكماً سابقاً بنفس ts ورقم السجل والمنطقة (انظر supersede).
+        """
+        if self.root is None:
+            return
+        # إصدار القواعد وقت الحكم لا وقت الكتابة، فلا يُنسب حكم قديم إلى قواعد أُضيفت بعده
+        self._pending.append((
+            ts or time.time(), form_data.get(RECORD_ID), form_data.get("Region"), mode, result, latency, weight,
+            RULESET.version, 0,
+        ))
+        if self._flusher is None:
+            self._start_flusher()
+        if len(self._pending) >= self.buffer_rows:
+            self._wakeup.set()
+
+    def supersede(self, form_data: dict, initial: dict, mode: str, result: dict, new_mode: str, ts) -> None:
+        """استبدال حكم مسجل (initial بالوضع mode في ts) بحكم وصل لاحقاً
+
+        المخزن للإضافة فقط: صف يسحب الحكم الأصلي وصف بالحكم الجديد، كلاهما بـ ts الأصلي
+        فيقعان في قسم التاريخ نفسه وتبقى الاستمارة محسوبة مرة واحدة في الاستعلامات.
+        زمن الفحص الذي رآه المستخدم يبقى في الصف الأصلي، فالصفان بلا latency.
+        """
+        self.record(form_data, initial, mode, ts=ts, weight=-1)
+        self.record(form_data, result, new_mode, ts=ts)
+
+    def _start_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="guardian-results", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """كتابة ملف لكل قسم (تاريخ × منطقة) من الطابور؛ يعيد عدد الأحكام المكتوبة
+
+        الكتابة كلها تحت القفل، فـ close() ينتظر دفعة الخيط الخلفي الجارية بدلاً من
+        إنهاء العملية قبل اكتمالها. record لا يأخذ القفل.
+        """
+        with self._flush_lock:
+            return self._flush_locked()
+
+    def _flush_locked(self) -> int:
+        partitions = {}
+        # ما في الطابور الآن فقط، فلا تطول الدفعة بلا حد تحت ضغط الإضافة
+        for _ in range(len(self._pending)):
+            entry = self._pending.popleft()
+            ts, record_id, region, mode, result, latency, weight, ruleset, _ = entry
+            issues = result.get("issues", [])
+            date = time.strftime("%Y-%m-%d", time.gmtime(ts))
+            entries, rows = partitions.setdefault(
+                (date, str(region or UNKNOWN_REGION)), ([], {name: [] for name in COLUMNS})
+            )
+            entries.append(entry)
+            rows["ts"].append(int(ts * 1000))
+            rows["record_id"].append(None if record_id in (None, "") else str(record_id))
+            rows["mode"].append(mode)
+            rows["status"].append(result.get("status"))
+            rows["confidence_score"].append(result.get("confidence_score"))
+            rows["issue_count"].append(len(issues))
+            rows["rules"].append([issue.get("rule", "ai") for issue in issues])
+            rows["severities"].append([issue.get("severity", "medium") for issue in issues])
+            rows["latency_ms"].append(None if latency is None else latency * 1000)
+            rows["ruleset"].append(ruleset)
+            rows["weight"].append(weight)
+        if not partitions:
+            return 0
+
+        pa, pq = _arrow()
+        schema = _schema(pa)
+        telemetry = get_telemetry()
+        written = 0
+        with telemetry.timer("results_write"):
+            for (date, region), (entries, rows) in partitions.items():
+                count = len(entries)
+                try:
+                    table = pa.Table.from_pydict(rows, schema=schema)
+                except Exception as e:
+                    # قيم لا تطابق المخطط لن تُكتب في أي محاولة
+                    logger.error("dropped %d result rows for %s/%s: %s", count, date, region, e)
+                    telemetry.inc("results_rows_total", count, outcome="dropped")
+                    continue
+                try:
+                    _write_atomic(pq, table, _partition_dir(self.root, date, region), _file_name())
+                except OSError as e:
+                    # القرص: تعود الصفوف إلى الطابور للدفعة التالية، وتُسقط بعد WRITE_ATTEMPTS
+                    # محاولات بدلاً من تراكمها في الذاكرة
+                    retry = [entry[:-1] + (entry[-1] + 1,) for entry in entries if entry[-1] + 1 < WRITE_ATTEMPTS]
+                    self._pending.extend(retry)
+                    if retry:
+                        telemetry.inc("results_rows_total", len(retry), outcome="retried")
+                    if len(retry) < count:
+                        logger.error("dropped %d result rows for %s/%s: %s", count - len(retry), date, region, e)
+                        telemetry.inc("results_rows_total", count - len(retry), outcome="dropped")
+                    continue
+                telemetry.inc("results_rows_total", count, outcome="written")
+                written += count
+        return written
+
+    def close(self) -> None:
+        self.flush()
+
+
+_RESULT_SINK = None
+_RESULT_SINK_LOCK = threading.Lock()
+
+
+def get_result_sink() -> ResultSink:
+    """مخزن النتائج المشترك على مستوى العملية (لا يكتب شيئاً بدون GUARDIAN_RESULTS_DIR)"""
+    global _RESULT_SINK
+    with _RESULT_SINK_LOCK:
+        if _RESULT_SINK is None:
+            _RESULT_SINK = ResultSink(RESULTS_DIR)
+            if RESULTS_DIR is not None:
+                # ما بقي في الطابور عند إنهاء العملية
+                atexit.register(_RESULT_SINK.close)
+        return _RESULT_SINK
+
+# ---------------------------
+# Compaction
+# ---------------------------
+def _partition_files(root: str):
+    """(date, directory, [ملفات parquet]) لكل قسم"""
+    for date_dir in sorted(os.listdir(root)):
+        if not date_dir.startswith("date="):
+            continue
+        for region_dir in sorted(os.listdir(os.path.join(root, date_dir))):
+            directory = os.path.join(root, date_dir, region_dir)
+            if not region_dir.startswith("region=") or not os.path.isdir(directory):
+                continue
+            files = sorted(
+                name for name in os.listdir(directory) if name.endswith(".parquet") and not name.startswith((".", "_"))
+            )
+            yield date_dir[len("date="):], directory, files
+
+
+def _read_batches(pa, parquet_file, schema):
+    """دفعات الملف بأعمدة schema؛ الأعمدة الأحدث من الملف (مثل weight) قيمها فارغة"""
+    present = set(parquet_file.schema_arrow.names)
+    for batch in parquet_file.iter_batches(columns=[name for name in COLUMNS if name in present]):
+        yield pa.RecordBatch.from_arrays(
+            [batch.column(f.name) if f.name in present else pa.nulls(batch.num_rows, f.type) for f in schema],
+            schema=schema,
+        )
+
+
+def compact_results(root: str, before=None, min_files: int = 2) -> dict:
+    """دمج ملفات كل قسم في ملف واحد بمجموعات صفوف كبيرة
+
+    before (YYYY-MM-DD، افتراضياً اليوم بتوقيت UTC) يترك أقسام اليوم الجاري التي
+    ما زالت تُكتب. الدمج يقرأ دفعة بعد دفعة ولا يحمّل القسم كاملاً، والملفات
+    الأصلية تُحذف بعد ظهور الملف المدمج فقط.
+    """
+    pa, pq = _arrow()
+    schema = _schema(pa)
+    before = before or time.strftime("%Y-%m-%d", time.gmtime())
+    stats = {"partitions": 0, "files_in": 0, "rows": 0}
+    for date, directory, files in _partition_files(root):
+        if date >= before or len(files) < min_files:
+            continue
+        name = _file_name("compact")
+        temp = os.path.join(directory, f".{name}.tmp")
+        rows = 0
+        with pq.ParquetWriter(temp, schema, compression="zstd") as writer:
+            buffered, buffered_rows = [], 0
+            for file_name in files:
+                for batch in _read_batches(pa, pq.ParquetFile(os.path.join(directory, file_name)), schema):
+                    buffered.append(batch)
+                    buffered_rows += batch.num_rows
+                    if buffered_rows >= ROW_GROUP_SIZE:
+                        writer.write_table(pa.Table.from_batches(buffered).cast(schema), row_group_size=ROW_GROUP_SIZE)
+                        rows += buffered_rows
+                        buffered, buffered_rows = [], 0
+            if buffered:
+                writer.write_table(pa.Table.from_batches(buffered).cast(schema), row_group_size=ROW_GROUP_SIZE)
+                rows += buffered_rows
+        os.replace(temp, os.path.join(directory, name))
+        for file_name in files:
+            os.remove(os.path.join(directory, file_name))
+        stats["partitions"] += 1
+        stats["files_in"] += len(files)
+        stats["rows"] += rows
+    return stats
+
+# ---------------------------
+# Query API
+# ---------------------------
+def open_results(root: str):
+    """pyarrow.dataset للمخزن، مع date وregion كعمودين نصيين من مسار القسم"""
+    pa, _ = _arrow()
+    import pyarrow.dataset as ds
+
+    partitions = pa.schema([(name, pa.string()) for name in PARTITIONS])
+    return ds.dataset(
+        root,
+        format="parquet",
+        partitioning=ds.partitioning(partitions, flavor="hive"),
+        schema=pa.unify_schemas([_schema(pa), partitions]),
+    )
+
+
+def _filter(since=None, until=None, regions=None):
+    import pyarrow.dataset as ds
+
+    expression = None
+    for clause in (
+        ds.field("date") >= since if since else None,
+        ds.field("date") <= until if until else None,
+        ds.field("region").isin(list(regions)) if regions else None,
+    ):
+        if clause is not None:
+            expression = clause if expression is None else expression & clause
+    return expression
+
+
+def scan_results(root: str, columns=None, since=None, until=None, regions=None):
+    """RecordBatch بعد الآخر بالأعمدة المطلوبة فقط؛ since/until تواريخ YYYY-MM-DD شاملة"""
+    dataset = open_results(root)
+    yield from dataset.to_batches(columns=list(columns) if columns else None, filter=_filter(since, until, regions))
+
+
+def _key(row: dict, by) -> tuple:
+    return tuple(row[name] for name in by)
+
+
+def _weights(pa, pc, table):
+    # الصفوف بلا weight (ملفات أقدم) وزنها 1
+    return pc.cast(pc.fill_null(table["weight"], 1), pa.int64())
+
+
+def summarize_results(root: str, by=("region",), since=None, until=None, regions=None) -> list:
+    """لكل مجموعة: forms, clean, warning, error, issues, avg_score, avg_latency_ms, error_rate
+
+    error_rate = issues / forms كما في لوحة التحكم (guardian.metrics).
+    """
+    pa, _ = _arrow()
+    import pyarrow.compute as pc
+
+    by = list(by)
+    totals = {}
+    columns = {*by, "status", "confidence_score", "issue_count", "latency_ms", "weight"}
+    for batch in scan_results(root, columns, since, until, regions):
+        if not batch.num_rows:
+            continue
+        table = pa.Table.from_batches([batch])
+        weight = _weights(pa, pc, table)
+        # الأحكام المسحوبة (weight=-1) تطرح نفسها من العدادات؛ صف السحب بلا زمن فحص
+        table = table.append_column("forms", weight)
+        for status in ("clean", "warning", "error"):
+            table = table.append_column(status, pc.multiply(pc.cast(pc.equal(table["status"], status), pa.int64()), weight))
+        for name in ("issue_count", "confidence_score"):
+            table = table.set_column(
+                table.schema.get_field_index(name), name, pc.multiply(pc.cast(table[name], pa.int64()), weight)
+            )
+        grouped = table.group_by(by).aggregate([
+            ("forms", "sum"),
+            ("clean", "sum"), ("warning", "sum"), ("error", "sum"),
+            ("issue_count", "sum"), ("confidence_score", "sum"),
+            ("latency_ms", "sum"), ("latency_ms", "count"),
+        ])
+        for row in grouped.to_pylist():
+            acc = totals.setdefault(_key(row, by), dict.fromkeys(
+                ("forms", "clean", "warning", "error", "issues", "score_sum", "latency_sum", "latency_count"), 0
+            ))
+            acc["forms"] += row["forms_sum"] or 0
+            acc["clean"] += row["clean_sum"] or 0
+            acc["warning"] += row["warning_sum"] or 0
+            acc["error"] += row["error_sum"] or 0
+            acc["issues"] += row["issue_count_sum"] or 0
+            acc["score_sum"] += row["confidence_score_sum"] or 0
+            acc["latency_sum"] += row["latency_ms_sum"] or 0
+            acc["latency_count"] += row["latency_ms_count"]
+
+    summary = []
+    for key, acc in sorted(totals.items(), key=lambda item: tuple(str(value) for value in item[0])):
+        forms = acc["forms"]
+        summary.append({
+            **dict(zip(by, key)),
+            "forms": forms,
+            "clean": acc["clean"],
+            "warning": acc["warning"],
+            "error": acc["error"],
+            "issues": acc["issues"],
+            "avg_score": acc["score_sum"] / forms if forms else 0.0,
+            "avg_latency_ms": acc["latency_sum"] / acc["latency_count"] if acc["latency_count"] else None,
+            "error_rate": acc["issues"] / forms if forms else 0.0,
+        })
+    return summary
+
+
+def rule_rates(root: str, by=("region",), since=None, until=None, regions=None) -> list:
+    """لكل مجموعة وقاعدة: hits (مرات رصد القاعدة)، forms (استمارات المجموعة)، rate = hits / forms
+
+    مرتبة حسب المجموعة ثم تنازلياً حسب rate.
+    """
+    pa, _ = _arrow()
+    import pyarrow.compute as pc
+
+    by = list(by)
+    forms, hits = {}, {}
+    for batch in scan_results(root, {*by, "rules", "weight"}, since, until, regions):
+        if not batch.num_rows:
+            continue
+        table = pa.Table.from_batches([batch])
+        weight = _weights(pa, pc, table)
+        table = table.append_column("forms", weight)
+        for row in table.group_by(by).aggregate([("forms", "sum")]).to_pylist():
+            key = _key(row, by)
+            forms[key] = forms.get(key, 0) + (row["forms_sum"] or 0)
+        # قاعدة لكل صف: list_flatten مع فهرس الاستمارة الأصلية (ووزنها) لكل قاعدة
+        parents = pc.list_parent_indices(table["rules"])
+        flat = pa.table({
+            **{name: pc.take(table[name], parents) for name in by},
+            "rule": pc.list_flatten(table["rules"]),
+            "weight": pc.take(weight, parents),
+        })
+        if not flat.num_rows:
+            continue
+        for row in flat.group_by([*by, "rule"]).aggregate([("weight", "sum")]).to_pylist():
+            key = (_key(row, by), row["rule"])
+            hits[key] = hits.get(key, 0) + row["weight_sum"]
+
+    rates = [
+        {**dict(zip(by, key)), "rule": rule, "hits": count, "forms": forms[key], "rate": count / forms[key]}
+        for (key, rule), count in hits.items()
+        if count and forms[key]
+    ]
+    rates.sort(key=lambda row: (tuple(str(row[name]) for name in by), -row["rate"], row["rule"]))
+    return rates
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compact and query the partitioned Parquet result store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compact_parser = commands.add_parser("compact", help="merge each partition's small files into one")
+    compact_parser.add_argument("root", nargs="?", default=RESULTS_DIR)
+    compact_parser.add_argument("--before", help="only partitions dated before YYYY-MM-DD (default: today, UTC)")
+    compact_parser.add_argument("--min-files", type=int, default=2)
+    for name, help_text in (("summary", "verdict counts, scores and latency per group"), ("rules", "hit rate of each rule per group")):
+        query = commands.add_parser(name, help=help_text)
+        query.add_argument("root", nargs="?", default=RESULTS_DIR)
+        query.add_argument("--by", default="region", help="comma-separated grouping columns (date, region, mode, status, ruleset)")
+        query.add_argument("--since", help="first date YYYY-MM-DD")
+        query.add_argument("--until", help="last date YYYY-MM-DD")
+        query.add_argument("--region", action="append", help="restrict to a region (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.root is None:
+        parser.error("result store directory is required (argument or GUARDIAN_RESULTS_DIR)")
+    if not os.path.isdir(args.root):
+        parser.error(f"result store not found: {args.root}")
+
+    if args.command == "compact":
+        print(json.dumps(compact_results(args.root, args.before, args.min_files), ensure_ascii=False))
+        return
+    query = summarize_results if args.command == "summary" else rule_rates
+    by = [name.strip() for name in args.by.split(",") if name.strip()]
+    for row in query(args.root, by, args.since, args.until, args.region):
+        sys.stdout.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+
+if __name__ == "__main__":
+    main()
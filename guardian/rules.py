@@ -0,0 +1,361 @@
+"""سجل القواعد المنطقية ومحرك القواعد (Demo)"""
+import hashlib
+import math
+import string
+
+from .arabic import normalize_arabic
+from .config import OUTLIER_REFERENCE_PATH
+from .occupations import education_values, job_title_values
+from .telemetry import get_telemetry
+
+# ---------------------------
+# Field Vocabulary (widget options)
+# ---------------------------
+FIELD_OPTIONS = {
+    "Gender": ["ذكر", "انثى"],
+    "Nationality": ["سعودي", "مصري", "اردني", "هندي", "باكستاني", "اخرى"],
+    "Native Language": ["العربية", "الانجليزية", "الاردية", "الهندية", "اخرى"],
+    "Education": ["اقل من ثانوي", "ثانوي", "دبلوم", "بكالوريوس", "ماجستير", "دكتوراه"],
+    "Employment Status": ["موظف حكومي", "موظف قطاع خاص", "اعمال حرة", "غير موظف", "طالب", "متقاعد"],
+    "Marital Status": ["اعزب", "متزوج", "مطلق", "ارمل"],
+    "Region": ["الرياض", "مكة المكرمة", "المدينة المنورة", "الشرقية", "اخرى"],
+    "Sector": ["حكومي", "خاص", "غير ربحي", "لا ينطبق"],
+    "Income Source": ["راتب", "اعمال حرة", "استثمارات", "لا يوجد"],
+}
+
+# ---------------------------
+# Rule Registry
+# ---------------------------
+# كل قاعدة معرفة كبيانات:
+#   fields      الحقول التي تعتمد عليها القاعدة
+#   contains    {حقل: كلمات} يكفي وجود أي كلمة داخل قيمة الحقل
+#   equals      {حقل: قيم} يجب أن تطابق القيمة إحداها
+#   predicate   شرط رقمي على القيم (يعمل على أعداد مفردة أو مصفوفات NumPy)
+#   description / suggestion  قوالب str.format بأسماء القيم
+# المطابقة في contains وequals بعد normalize_arabic للطرفين، فلا حاجة لصيغ الهمزة والتشكيل
+RULESET_VERSION = "rules-v2"
+
+NUMERIC_FIELDS = {
+    "Age": ("age", 30),
+    "Years Experience": ("years_exp", 0),
+    "Monthly Salary": ("salary", 0),
+    "Children": ("children", 0),
+}
+
+
+def to_number(value, default: int) -> int:
+    """قيمة رقمية صحيحة، أو default لغير الرقمي والفارغ (null) كما في محرك الدفعات
+
+    مطابق لـ pd.to_numeric(errors="coerce").fillna(default).astype(int64): "30.7" -> 30.
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return int(number) if math.isfinite(number) else default
+
+
+DERIVED_VALUES = {
+    "working_years": lambda v: v["age"] - 18,
+}
+
+# قيم من حقول نصية عبر فهارس occupations: {حقل: دالة نص -> {اسم: قيمة}}
+# (الفحص الجماعي يستدعيها مرة لكل قيمة فريدة في العمود)
+TEXT_VALUES = {
+    "Education": education_values,
+    "Job Title": job_title_values,
+}
+
+RULES = [
+    {
+        "id": "age_vs_phd",
+        "fields": ("Age", "Education"),
+        "contains": {"Education": ("PhD", "دكتوراه")},
+        "predicate": lambda v: v["age"] < 25,
+        "severity": "high",
+        "field_1": "العمر",
+        "field_2": "المؤهل العلمي",
+        "description": "عمر {age} سنة مع درجة الدكتوراه غير منطقي - الحد الأدنى المعتاد 27 سنة",
+        "suggestion": "راجع تاريخ الميلاد أو المؤهل العلمي",
+    },
+    {
+        "id": "age_vs_experience",
+        "fields": ("Age", "Years Experience"),
+        "predicate": lambda v: v["years_exp"] > v["working_years"],
+        "severity": "high",
+        "field_1": "العمر",
+        "field_2": "سنوات الخبرة",
+        "description": "سنوات الخبرة {years_exp} أكبر من الفترة الممكنة منذ بلوغ سن العمل (عمر {age} - 18 = {working_years} سنة)",
+        "suggestion": "راجع العمر أو سنوات الخبرة",
+    },
+    {
+        "id": "unemployed_vs_salary",
+        "fields": ("Employment Status", "Monthly Salary"),
+        "contains": {"Employment Status": ("غير موظف", "Unemployed")},
+        "predicate": lambda v: v["salary"] > 0,
+        "severity": "medium",
+        "field_1": "الحالة الوظيفية",
+        "field_2": "الراتب الشهري",
+        "description": "الحالة الوظيفية 'غير موظف' لكن الراتب {salary} ريال",
+        "suggestion": "إما تصحيح الحالة الوظيفية أو تعيين الراتب صفر",
+    },
+    {
+        "id": "single_vs_children",
+        "fields": ("Marital Status", "Children"),
+        "contains": {"Marital Status": ("اعزب", "Single")},
+        "predicate": lambda v: v["children"] > 0,
+        "severity": "high",
+        "field_1": "الحالة الاجتماعية",
+        "field_2": "عدد الأطفال",
+        "description": "الحالة الاجتماعية 'أعزب' مع وجود {children} أطفال",
+        "suggestion": "راجع الحالة الاجتماعية أو عدد الأطفال",
+    },
+    {
+        "id": "saudi_vs_english",
+        "fields": ("Nationality", "Native Language"),
+        "contains": {
+            "Nationality": ("سعودي", "Saudi"),
+            "Native Language": ("English", "الانجليزية"),
+        },
+        "severity": "medium",
+        "field_1": "الجنسية",
+        "field_2": "اللغة الأم",
+        "description": "جنسية سعودي مع لغة أم إنجليزية - غير شائع",
+        "suggestion": "تأكد من اللغة الأم للمستجيب",
+    },
+    {
+        "id": "teen_married_children",
+        "fields": ("Age", "Marital Status", "Children"),
+        "equals": {"Marital Status": ("متزوج", "Married")},
+        "predicate": lambda v: (v["age"] < 20) & (v["children"] >= 3),
+        "severity": "high",
+        "field_1": "العمر",
+        "field_2": "الحالة الاجتماعية والأطفال",
+        "description": "عمر {age} سنة مع حالة 'متزوج' و{children} أطفال - غير معتاد",
+        "suggestion": "راجع تاريخ الميلاد والحالة الاجتماعية",
+    },
+    {
+        "id": "job_vs_education",
+        "fields": ("Job Title", "Education"),
+        "predicate": lambda v: v["education_rank"] < v["job_education_rank"],
+        "severity": "medium",
+        "field_1": "المسمى الوظيفي",
+        "field_2": "المؤهل العلمي",
+        "description": "مهنة '{job_name}' تتطلب عادة مؤهل {job_education} على الأقل",
+        "suggestion": "راجع المسمى الوظيفي أو المؤهل العلمي",
+    },
+    {
+        "id": "job_vs_age",
+        "fields": ("Job Title", "Age"),
+        "predicate": lambda v: v["age"] < v["job_min_age"],
+        "severity": "high",
+        "field_1": "المسمى الوظيفي",
+        "field_2": "العمر",
+        "description": "عمر {age} سنة أقل من الحد الأدنى المعتاد لمهنة '{job_name}' ({job_min_age} سنة)",
+        "suggestion": "راجع تاريخ الميلاد أو المسمى الوظيفي",
+    },
+]
+
+
+class CategoryLookup(dict):
+    """جدول قيمة -> نتيجة مطابقة، محسوب مسبقاً لمفردات النموذج ويُكمل عند أول ظهور لقيمة جديدة
+
+    المطابقة بين الصيغ المطبّعة، والمفاتيح القيم كما وردت فيُطبّع كل نص مرة واحدة.
+    """
+
+    def __init__(self, tokens, exact=False, vocabulary=()):
+        super().__init__()
+        self.tokens = tuple(normalize_arabic(token) for token in tokens)
+        self.exact = exact
+        for value in vocabulary:
+            self[value] = self._match(value)
+
+    def _match(self, value: str) -> bool:
+        value = normalize_arabic(value)
+        if self.exact:
+            return value in self.tokens
+        return any(token in value for token in self.tokens)
+
+    def __missing__(self, value: str) -> bool:
+        hit = self[value] = self._match(value)
+        return hit
+
+
+class CompiledRule:
+    __slots__ = ("id", "fields", "severity", "conditions", "predicate", "issue", "params", "_templates")
+
+    def __init__(self, spec: dict):
+        self.id = spec["id"]
+        self.fields = tuple(spec.get("fields", ()))
+        self.severity = spec.get("severity", "medium")
+        self.predicate = spec.get("predicate")
+        self.conditions = []
+        for field, tokens in spec.get("contains", {}).items():
+            self.conditions.append((field, CategoryLookup(tokens, False, FIELD_OPTIONS.get(field, ()))))
+        for field, values in spec.get("equals", {}).items():
+            self.conditions.append((field, CategoryLookup(values, True, FIELD_OPTIONS.get(field, ()))))
+        self.issue = {
+            "severity": self.severity,
+            "field_1": spec["field_1"],
+            "field_2": spec["field_2"],
+        }
+        self._templates = (spec["description"], spec["suggestion"])
+        self.params = tuple(sorted({
+            name
+            for template in self._templates
+            for _, name, _, _ in string.Formatter().parse(template)
+            if name
+        }))
+
+    def build_issue(self, values: dict) -> dict:
+        description, suggestion = self._templates
+        return {
+            **self.issue,
+            "description": description.format(**values),
+            "suggestion": suggestion.format(**values),
+            "rule": self.id,
+        }
+
+    def check(self, values: dict, texts: dict):
+        for field, lookup in self.conditions:
+            if not lookup[texts[field]]:
+                return None
+        if self.predicate is not None and not self.predicate(values):
+            return None
+        return self.build_issue(values)
+
+
+class RuleSet:
+    """مجموعة القواعد بعد الترجمة - يشاركها الفحص الفردي والفحص الجماعي"""
+
+    def __init__(self, specs, version: str = RULESET_VERSION):
+        self.base_version = version
+        self._compile(list(specs))
+
+    def _compile(self, specs) -> None:
+        self._specs = specs
+        self.rules = [CompiledRule(spec) for spec in specs]
+        # الإصدار يتغير تلقائياً عند إضافة قاعدة حتى لا تُستخدم نتائج مخزنة قديمة
+        rule_ids = ",".join(rule.id for rule in self.rules)
+        self.version = f"{self.base_version}+{hashlib.sha1(rule_ids.encode('utf-8')).hexdigest()[:8]}"
+        self.text_fields = sorted({field for rule in self.rules for field, _ in rule.conditions})
+        # حقل -> مواقع القواعد المعتمدة عليه، لإعادة فحص القواعد المتأثرة فقط عند تغير حقل
+        # (قاعدة بلا fields معلنة تُعاد مع أي تغيير)
+        dependents = {}
+        self.unscoped = []
+        for index, rule in enumerate(self.rules):
+            fields = {*rule.fields, *(field for field, _ in rule.conditions)}
+            if not rule.fields:
+                self.unscoped.append(index)
+            for field in fields:
+                dependents.setdefault(field, []).append(index)
+        self.dependents = {field: tuple(indexes) for field, indexes in dependents.items()}
+
+    def affected(self, changed_fields) -> list:
+        """مواقع القواعد التي قد تتغير نتيجتها بتغير هذه الحقول"""
+        indexes = set(self.unscoped)
+        for field in changed_fields:
+            indexes.update(self.dependents.get(field, ()))
+        return sorted(indexes)
+
+    def extract(self, form_data: dict):
+        values = {
+            name: to_number(form_data.get(field, default), default) for field, (name, default) in NUMERIC_FIELDS.items()
+        }
+        for name, derive in DERIVED_VALUES.items():
+            values[name] = derive(values)
+        for field, derive in TEXT_VALUES.items():
+            values.update(derive(str(form_data.get(field) or "")))
+        texts = {field: str(form_data.get(field, "")) for field in self.text_fields}
+        return values, texts
+
+    def evaluate(self, form_data: dict) -> list:
+        values, texts = self.extract(form_data)
+        issues = []
+        for rule in self.rules:
+            issue = rule.check(values, texts)
+            if issue is not None:
+                issues.append(issue)
+        return issues
+
+    def check_rules(self, form_data: dict, indexes) -> dict:
+        """{موقع القاعدة: مشكلة أو None} لمجموعة جزئية من القواعد"""
+        values, texts = self.extract(form_data)
+        return {index: self.rules[index].check(values, texts) for index in indexes}
+
+    def add(self, spec: dict) -> None:
+        self._compile(self._specs + [spec])
+
+
+RULESET = RuleSet(RULES)
+
+
+def register_rule(spec: dict) -> None:
+    """إضافة قاعدة جديدة إلى السجل وإعادة ترجمة المجموعة"""
+    RULES.append(spec)
+    RULESET.add(spec)
+
+# ---------------------------
+# Demo Engine (Fallback)
+# ---------------------------
+def analyze_form_demo(form_data: dict) -> dict:
+    """تحليل تجريبي ذكي بناء على البيانات الفعلية"""
+    with get_telemetry().timer("rules"):
+        return evaluate_form(form_data)
+
+
+def evaluate_form(form_data: dict) -> dict:
+    """القواعد ثم القيم الشاذة إحصائياً إن حُدد مرجع (GUARDIAN_OUTLIER_REFERENCE)"""
+    result = evaluate_rules(form_data)
+    reference = _outlier_reference()
+    if reference is None:
+        return result
+    return merge_issues(result, reference.check(form_data))
+
+
+def _outlier_reference():
+    # guardian.outliers وحدة CLI أيضاً، فلا تُستورد إلا عند تحديد مرجع
+    if OUTLIER_REFERENCE_PATH is None:
+        return None
+    from .outliers import get_outlier_reference
+
+    return get_outlier_reference()
+
+
+def demo_version() -> str:
+    """إصدار نتائج analyze_form_demo لمفاتيح الذاكرة: القواعد ومعها إصدار المرجع الإحصائي"""
+    reference = _outlier_reference()
+    return RULESET.version if reference is None else f"{RULESET.version}+outliers-{reference.version}"
+
+
+def evaluate_rules(form_data: dict) -> dict:
+    """نتيجة القواعد مباشرة (بضع ميكروثوانٍ لكل استمارة)"""
+    issues = RULESET.evaluate(form_data)
+    confidence, status, summary = score_issues(len(issues))
+
+    return {
+        "confidence_score": confidence,
+        "status": status,
+        "issues": issues,
+        "summary": summary
+    }
+
+
+def score_issues(issue_count: int):
+    """حساب درجة الثقة والحالة والملخص من عدد المشكلات"""
+    if issue_count == 0:
+        return 98, "clean", "لم يتم اكتشاف أي تناقضات منطقية - البيانات متسقة وموثوقة"
+    if issue_count == 1:
+        return 65, "warning", "تم اكتشاف تناقض واحد يحتاج مراجعة"
+    if issue_count == 2:
+        return 35, "error", f"تم اكتشاف {issue_count} تناقضات منطقية تتطلب تصحيح فوري"
+    return 15, "error", f"تم اكتشاف {issue_count} تناقضات حرجة - البيانات غير موثوقة"
+
+
+def merge_issues(result: dict, extra) -> dict:
+    """نتيجة جديدة بعد إضافة مشكلات من فحوص أخرى وإعادة حساب الدرجة والحالة"""
+    if not extra:
+        return result
+    issues = list(result.get("issues", [])) + list(extra)
+    confidence, status, summary = score_issues(len(issues))
+    return dict(result, confidence_score=confidence, status=status, issues=issues, summary=summary)
@@ -0,0 +1,353 @@
+"""مخطط نتيجة الفحص، ومحلل JSON متسامح وتدريجي لردود النموذج
+
+- RESULT_SCHEMA هو الصيغة الموثقة في SYSTEM_PROMPT (JSON Schema)، ويُترجم مرة
+  واحدة إلى دالة تحقق تُكمل القيم الناقصة وتوحد الأنواع.
+- loads_lenient يزيل أسوار ``` ويصلح JSON المقطوع (نص غير مغلق، فاصلة زائدة،
+  أقواس ناقصة) بدلاً من رمي الرد كاملاً.
+- IssueStreamParser يستخرج كل مشكلة فور اكتمالها أثناء وصول الرد بالتدفق.
+"""
+import json
+import re
+
+from .rules import score_issues
+
+
+class SchemaError(ValueError):
+    pass
+
+
+# ---------------------------
+# Result Schema
+# ---------------------------
+ISSUE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "severity": {"type": "string", "enum": ["high", "medium", "low"], "default": "medium"},
+        "field_1": {"type": "string"},
+        "field_2": {"type": "string", "default": ""},
+        "description": {"type": "string"},
+        "suggestion": {"type": "string", "default": ""},
+    },
+    "required": ["field_1", "description"],
+}
+
+RESULT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "confidence_score": {"type": "integer", "minimum": 0, "maximum": 100},
+        "status": {"type": "string", "enum": ["clean", "warning", "error"]},
+        "issues": {"type": "array", "items": ISSUE_SCHEMA},
+        "summary": {"type": "string"},
+    },
+    "required": ["issues"],
+}
+
+
+def _compile(schema: dict):
+    """يحول مخطط JSON Schema (المجموعة الجزئية المستخدمة هنا) إلى دالة value -> قيمة موحدة"""
+    kind = schema.get("type")
+
+    if kind == "object":
+        fields = [(name, _compile(sub), sub) for name, sub in schema.get("properties", {}).items()]
+        required = tuple(schema.get("required", ()))
+
+        def check_object(value):
+            if not isinstance(value, dict):
+                raise SchemaError(f"expected object, got {type(value).__name__}")
+            missing = [name for name in required if value.get(name) is None]
+            if missing:
+                raise SchemaError(f"missing {', '.join(missing)}")
+            out = dict(value)
+            for name, check, sub in fields:
+                if out.get(name) is not None:
+                    try:
+                        out[name] = check(out[name])
+                        continue
+                    except SchemaError:
+                        # حقل اختياري مشوه يُعامل كأنه غائب
+                        if name in required:
+                            raise
+                if "default" in sub:
+                    out[name] = sub["default"]
+                else:
+                    out.pop(name, None)
+            return out
+
+        return check_object
+
+    if kind == "array":
+        check_item = _compile(schema.get("items", {}))
+
+        def check_array(value):
+            if not isinstance(value, list):
+                raise SchemaError(f"expected array, got {type(value).__name__}")
+            # عنصر مشوه لا يُسقط بقية المصفوفة
+            items = []
+            for item in value:
+                try:
+                    items.append(check_item(item))
+                except SchemaError:
+                    continue
+            return items
+
+        return check_array
+
+    if kind in ("integer", "number"):
+        low, high = schema.get("minimum"), schema.get("maximum")
+
+        def check_number(value):
+            if isinstance(value, bool):
+                raise SchemaError("expected number, got boolean")
+            try:
+                number = float(str(value).strip().rstrip("%")) if isinstance(value, str) else float(value)
+            except (TypeError, ValueError):
+                raise SchemaError(f"expected number, got {value!r}")
+            if low is not None:
+                number = max(low, number)
+            if high is not None:
+                number = min(high, number)
+            return int(round(number)) if kind == "integer" else number
+
+        return check_number
+
+    if kind == "string":
+        choices = schema.get("enum")
+        default = schema.get("default")
+
+        def check_string(value):
+            if isinstance(value, (dict, list)):
+                raise SchemaError("expected string")
+            text = str(value).strip()
+            if choices is not None and text.lower() not in choices:
+                if default is None:
+                    raise SchemaError(f"{text!r} is not one of {choices}")
+                return default
+            return text.lower() if choices is not None else text
+
+        return check_string
+
+    return lambda value: value
+
+
+_check_result = _compile(RESULT_SCHEMA)
+validate_issue = _compile(ISSUE_SCHEMA)
+
+
+def validate_result(value) -> dict:
+    """نتيجة مطابقة للمخطط؛ الدرجة والحالة والملخص تُحسب من عدد المشكلات إن غابت أو كانت غير صالحة"""
+    result = _check_result(value)
+    confidence, status, summary = score_issues(len(result["issues"]))
+    result.setdefault("confidence_score", confidence)
+    result.setdefault("status", status)
+    result.setdefault("summary", summary)
+    return result
+
+
+def _strict(schema: dict) -> dict:
+    # Structured Outputs يتطلب كل الحقول مطلوبة ولا حقول إضافية ولا default/minimum
+    out = {k: v for k, v in schema.items() if k not in ("default", "minimum", "maximum")}
+    if schema.get("type") == "object":
+        out["properties"] = {name: _strict(sub) for name, sub in schema["properties"].items()}
+        out["required"] = list(schema["properties"])
+        out["additionalProperties"] = False
+    elif schema.get("type") == "array":
+        out["items"] = _strict(schema["items"])
+    return out
+
+
+def response_format(kind: str, batch: bool = False):
+    """قيمة response_format لطلب OpenAI، أو None إذا كان kind=none"""
+    if kind == "json_object":
+        return {"type": "json_object"}
+    if kind != "json_schema":
+        return None
+    schema = _strict(RESULT_SCHEMA)
+    name = "form_validation"
+    if batch:
+        item = dict(schema, properties={"id": {"type": "string"}, **schema["properties"]})
+        item["required"] = ["id"] + schema["required"]
+        schema = {
+            "type": "object",
+            "properties": {"results": {"type": "array", "items": item}},
+            "required": ["results"],
+            "additionalProperties": False,
+        }
+        name = "form_validation_batch"
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+# ---------------------------
+# Lenient JSON
+# ---------------------------
+_TRAILING_COMMA = re.compile(r",\s*([\]}])")
+# كل محاولة تحليل تكلف طول النص كاملاً؛ نكتفي بأقرب نقاط القطع إلى النهاية
+MAX_REPAIR_ATTEMPTS = 32
+
+
+def _scan(text: str):
+    """(داخل نص؟، الأقواس المفتوحة، نقاط قطع آمنة [(موضع، الأقواس المفتوحة عندها)])"""
+    stack = []
+    cuts = []
+    in_string = escape = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+            cuts.append((i + 1, tuple(stack)))
+        elif char in "}]":
+            if stack:
+                stack.pop()
+        elif char == ",":
+            cuts.append((i, tuple(stack)))
+    return in_string, stack, cuts
+
+
+def _closers(stack) -> str:
+    return "".join("}" if opener == "{" else "]" for opener in reversed(stack))
+
+
+def repair_json(text: str):
+    """يحاول استعادة أكبر قدر من JSON مقطوع أو مشوه؛ SchemaError إن تعذر"""
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        raise SchemaError("no JSON value in response")
+    text = text[start:]
+    decoder = json.JSONDecoder()
+    try:
+        # قيمة كاملة يتبعها نص زائد (مثل سور ``` أو شرح)
+        return decoder.raw_decode(text)[0]
+    except ValueError:
+        pass
+
+    in_string, stack, cuts = _scan(text)
+    candidates = [text + ('"' if in_string else "") + _closers(stack)]
+    # التراجع إلى آخر قيمة مكتملة داخل أعمق حاوية
+    candidates += [text[:pos] + _closers(opened) for pos, opened in reversed(cuts[-MAX_REPAIR_ATTEMPTS:])]
+    for candidate in candidates:
+        for attempt in (candidate, _TRAILING_COMMA.sub(r"\1", candidate)):
+            try:
+                return json.loads(attempt)
+            except ValueError:
+                continue
+    raise SchemaError("response is not recoverable JSON")
+
+
+def strip_fences(content) -> str:
+    raw = (content or "").strip()
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[1] if "\n" in raw else ""
+        raw = raw.rsplit("```", 1)[0]
+    return raw.strip()
+
+
+def loads_lenient(content):
+    raw = strip_fences(content)
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return repair_json(raw)
+
+# ---------------------------
+# Incremental (streaming) parsing
+# ---------------------------
+class IssueStreamParser:
+    """يُغذى بأجزاء الرد أثناء وصولها ويعيد كل عنصر مكتمل من مصفوفة issues فوراً
+
+    كل جزء يُفحص مرة واحدة؛ ولا يُحتفظ للفحص إلا بالنص من بداية المفتاح أو
+    المشكلة الجارية، أما الرد كاملاً فأجزاء تُضم عند الطلب فقط.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._tail = ""  # النص غير المكتمل من بداية المفتاح أو المشكلة الجارية
+        self._stack = []  # [(نوع الحاوية، المفتاح الحالي)]
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._expect_key = False
+        self._issues_depth = None
+        self._issue_start = None
+        self.issues = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> list:
+        self._chunks.append(chunk)
+        text = self._tail + chunk
+        found = []
+        for i in range(len(self._tail), len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._expect_key and self._stack and self._stack[-1][0] == "{":
+                        self._stack[-1][1] = text[self._string_start + 1:i]
+                    self._string_start = None
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == "{":
+                if self._issues_depth is not None and len(self._stack) == self._issues_depth:
+                    self._issue_start = i
+                self._stack.append(["{", None])
+                self._expect_key = True
+            elif char == "[":
+                if len(self._stack) == 1 and self._stack[0] == ["{", "issues"]:
+                    self._issues_depth = 2
+                self._stack.append(["[", None])
+                self._expect_key = False
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if char == "}" and self._issue_start is not None and len(self._stack) == self._issues_depth:
+                    issue = self._complete(text[self._issue_start:i + 1])
+                    self._issue_start = None
+                    if issue is not None:
+                        found.append(issue)
+                elif char == "]" and len(self._stack) == 1 and self._issues_depth is not None:
+                    self._issues_depth = None
+                self._expect_key = False
+            elif char == ":":
+                self._expect_key = False
+            elif char == ",":
+                self._expect_key = bool(self._stack) and self._stack[-1][0] == "{"
+        # المواضع التالية نسبية إلى بداية الذيل الجديد
+        keep = min((pos for pos in (self._issue_start, self._string_start) if pos is not None), default=len(text))
+        self._tail = text[keep:]
+        if self._issue_start is not None:
+            self._issue_start -= keep
+        if self._string_start is not None:
+            self._string_start -= keep
+        self.issues.extend(found)
+        return found
+
+    @staticmethod
+    def _complete(fragment: str):
+        try:
+            return validate_issue(json.loads(fragment))
+        except ValueError:
+            return None
+
+    def result(self) -> dict:
+        """النتيجة النهائية بعد انتهاء التدفق (مع الإصلاح إن كان الرد مقطوعاً)"""
+        try:
+            return validate_result(loads_lenient(self.text))
+        except SchemaError:
+            if not self.issues:
+                raise
+            # الرد غير قابل للإصلاح لكن المشكلات المكتملة وصلت بالفعل
+            return validate_result({"issues": list(self.issues)})
@@ -0,0 +1,313 @@
+"""خدمة HTTP خفيفة للفحص بدون Streamlit (asyncio فقط، بلا اعتماديات إضافية)
+
+    python -m guardian.service --port 8080
+
+نقاط الوصول:
+    GET  /healthz
+    GET  /metrics            أزمنة المراحل والعدادات بصيغة Prometheus النصية
+    POST /v1/validate        استمارة واحدة JSON -> {"result": ..., "mode": ...}
+    POST /v1/validate/bulk   NDJSON (استمارة لكل سطر) -> NDJSON {"index", "result", "mode"}
+                             بترتيب الاكتمال وليس بترتيب الإدخال
+
+معاملات الاستعلام: mode=rules|tiered|ai و budget_ms (ميزانية زمن AI لكل استمارة).
+مفتاح OpenAI يُقرأ من OPENAI_API_KEY؛ بدونه تعمل الخدمة بالقواعد فقط، إلا مع
+واجهة local أو classifier (GUARDIAN_AI_BACKEND) التي لا تحتاج مفتاحاً.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from .backends import get_backend
+from .cache import get_result_cache
+from .config import AI_API_KEY, AI_CONCURRENCY, PRELOAD_ENABLED, SERVICE_HOST, SERVICE_PORT
+from .metrics import get_metrics_store
+from .pipeline import PIPELINE_MODES, analyze_form_async
+from .results import get_result_sink
+from .telemetry import get_telemetry
+from .triage import get_triage_stats
+
+MAX_BODY_BYTES = 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ValidationService:
+    def __init__(self, api_key: str = AI_API_KEY, mode: str = "tiered", concurrency: int = AI_CONCURRENCY, cache=None):
+        self.api_key = api_key
+        self.mode = mode
+        self.concurrency = max(1, int(concurrency))
+        self.cache = get_result_cache() if cache is None else cache
+        self.stats = get_triage_stats()
+        self.metrics = get_metrics_store()
+        self.results = get_result_sink()
+        self.telemetry = get_telemetry()
+
+    # ---------------------------
+    # HTTP plumbing
+    # ---------------------------
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+                    return
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                url = urlsplit(target)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+                try:
+                    reusable = await self._dispatch(method, url.path, query, headers, reader, writer, keep_alive)
+                except HTTPError as e:
+                    # جسم الطلب قد لا يكون مقروءاً بالكامل - لا يمكن إعادة استخدام الاتصال
+                    await self._respond(writer, e.status, {"error": e.message}, keep_alive=False)
+                    return
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                if not (keep_alive and reusable):
+                    return
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, query, headers, reader, writer, keep_alive) -> bool:
+        """يعيد False إذا لم يعد الاتصال صالحاً لطلب آخر"""
+        if path == "/healthz":
+            backend = get_backend()
+            health = {"status": "ok", "backend": backend.name, "ai": backend.available(self.api_key)}
+            await self._respond(writer, 200, health, keep_alive)
+            return True
+        if path == "/metrics":
+            body = get_telemetry().render_prometheus().encode("utf-8")
+            await self._respond(writer, 200, body, keep_alive, PROMETHEUS_CONTENT_TYPE)
+            return True
+        if path not in ("/v1/validate", "/v1/validate/bulk"):
+            raise HTTPError(404, f"unknown path {path}")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+
+        mode = query.get("mode", self.mode)
+        if mode not in PIPELINE_MODES:
+            raise HTTPError(400, f"mode must be one of {', '.join(PIPELINE_MODES)}")
+        try:
+            budget_ms = float(query["budget_ms"]) if "budget_ms" in query else None
+        except ValueError:
+            raise HTTPError(400, "budget_ms must be a number")
+
+        if path == "/v1/validate":
+            body = await self._read_body(reader, headers)
+            try:
+                form_data = json.loads(body)
+            except ValueError:
+                raise HTTPError(400, "body must be a JSON object")
+            if not isinstance(form_data, dict):
+                raise HTTPError(400, "body must be a JSON object")
+            try:
+                result, result_mode = await self._validate(form_data, mode, budget_ms)
+            except Exception as e:
+                # المدخلات غير الصالحة رُفضت أعلاه بـ 400؛ هنا خطأ داخلي، ورد JSON بدلاً من إسقاط الاتصال
+                await self._respond(writer, 500, {"error": f"internal error: {e}"}, keep_alive)
+                return True
+            await self._respond(writer, 200, {"result": result, "mode": result_mode}, keep_alive)
+            return True
+        return await self._bulk(reader, writer, headers, mode, budget_ms, keep_alive)
+
+    async def _iter_body(self, reader: asyncio.StreamReader, headers: dict):
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await reader.readline()
+                try:
+                    size = int(size_line.split(b";", 1)[0].strip(), 16)
+                except ValueError:
+                    raise HTTPError(400, "malformed chunked body")
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                yield await reader.readexactly(size)
+                await reader.readexactly(2)
+        else:
+            try:
+                remaining = int(headers.get("content-length", "0"))
+            except ValueError:
+                raise HTTPError(400, "invalid Content-Length")
+            while remaining > 0:
+                chunk = await reader.read(min(READ_CHUNK_BYTES, remaining))
+                if not chunk:
+                    raise HTTPError(400, "body shorter than Content-Length")
+                remaining -= len(chunk)
+                yield chunk
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: dict) -> bytes:
+        parts = []
+        size = 0
+        async for chunk in self._iter_body(reader, headers):
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, f"body larger than {MAX_BODY_BYTES} bytes; use /v1/validate/bulk")
+            parts.append(chunk)
+        return b"".join(parts)
+
+    async def _iter_lines(self, reader: asyncio.StreamReader, headers: dict):
+        buffer = b""
+        async for chunk in self._iter_body(reader, headers):
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield line
+            if len(buffer) > MAX_BODY_BYTES:
+                raise HTTPError(413, "NDJSON line too long")
+        if buffer:
+            yield buffer
+
+    async def _respond(
+        self, writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool = True,
+        content_type: str = "application/json; charset=utf-8",
+    ) -> None:
+        """payload قاموس يُرسل JSON، أو bytes جاهزة بنوع content_type"""
+        body = payload if isinstance(payload, bytes) else _dumps(payload)
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+    # ---------------------------
+    # Validation
+    # ---------------------------
+    async def _validate(self, form_data: dict, mode: str, budget_ms):
+        started = time.perf_counter()
+        result, result_mode = await analyze_form_async(
+            self.api_key, form_data, mode, self.cache, stats=self.stats, budget_ms=budget_ms
+        )
+        latency = time.perf_counter() - started
+        if self.telemetry.enabled:
+            self.telemetry.observe("pipeline", latency)
+            self.telemetry.inc("checks_total", mode=result_mode)
+        self.metrics.record(result, result_mode, form_data.get("Region"))
+        self.results.record(form_data, result, result_mode, latency)
+        return result, result_mode
+
+    async def _bulk_item(self, index: int, line: bytes, mode: str, budget_ms) -> bytes:
+        try:
+            form_data = json.loads(line)
+            if not isinstance(form_data, dict):
+                raise ValueError("not an object")
+        except ValueError:
+            return _dumps({"index": index, "error": "line is not a JSON object"}) + b"\n"
+        try:
+            result, result_mode = await self._validate(form_data, mode, budget_ms)
+        except Exception as e:
+            return _dumps({"index": index, "error": str(e)}) + b"\n"
+        return _dumps({"index": index, "result": result, "mode": result_mode}) + b"\n"
+
+    async def _bulk(self, reader, writer, headers, mode, budget_ms, keep_alive) -> bool:
+        writer.write(
+            (
+                "HTTP/1.1 200 OK\r\n"
+                "Content-Type: application/x-ndjson; charset=utf-8\r\n"
+                "Transfer-Encoding: chunked\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("latin-1")
+        )
+
+        async def flush(done) -> None:
+            chunk = b"".join(task.result() for task in done)
+            writer.write(f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n")
+            await writer.drain()
+
+        pending = set()
+        index = 0
+        error = None
+        try:
+            async for line in self._iter_lines(reader, headers):
+                if not line.strip():
+                    continue
+                pending.add(asyncio.ensure_future(self._bulk_item(index, line, mode, budget_ms)))
+                index += 1
+                if len(pending) >= self.concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    await flush(done)
+        except HTTPError as e:
+            # الرأس أُرسل بالفعل: يُبلّغ عن الخطأ كسطر أخير ثم يُغلق الاتصال
+            error = e
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            await flush(done)
+        if error is not None:
+            chunk = _dumps({"error": error.message}) + b"\n"
+            writer.write(f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n")
+
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return error is None
+
+    async def serve(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT):
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Smart Semantic Guardian validation service")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--mode", choices=PIPELINE_MODES, default="tiered")
+    parser.add_argument("--concurrency", type=int, default=AI_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    async def run():
+        service = ValidationService(mode=args.mode, concurrency=args.concurrency)
+        server = await service.serve(args.host, args.port)
+        print(f"guardian service listening on http://{args.host}:{args.port}")
+        if PRELOAD_ENABLED:
+            # الخدمة تقبل الطلبات فوراً؛ مكتبة النموذج تُحمّل في الخلفية بدلاً من أول طلب
+            asyncio.get_running_loop().run_in_executor(None, get_backend().warm_up)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""فحص ملفات المسح (CSV / NDJSON / Parquet) بالتدفق وبذاكرة ثابتة مهما كان حجم الملف
+
+    python -m guardian.stream extract.csv.gz -o results.ndjson --chunk-size 50000
+
+تُقرأ السجلات على دفعات، وتُطابق عناوين الأعمدة العربية والإنجليزية مع مفاتيح
+form_data، وتُكتب النتائج تدريجياً (NDJSON أو CSV حسب امتداد ملف الإخراج).
+مع --households تُضاف فحوص ما بين السجلات (الأسرة والتكرار) داخل كل دفعة، ولا
+تُقسم سجلات الأسرة المتتالية بين دفعتين. ويُضاف فحص القيم الشاذة مقابل مرجع
+guardian.outliers المحدد بـ --outliers أو GUARDIAN_OUTLIER_REFERENCE.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+
+from .household import HouseholdChunker, check_households, merge_cross_issues
+from .results import get_result_sink
+from .rules import NUMERIC_FIELDS, _outlier_reference, evaluate_rules, merge_issues
+
+DEFAULT_CHUNK_SIZE = 10000
+
+RECORD_ID = "Record ID"
+
+# عناوين الأعمدة المقبولة لكل مفتاح في form_data (بعد التطبيع: أحرف صغيرة ومسافات موحدة)
+HEADER_ALIASES = {
+    RECORD_ID: ["record id", "record_id", "id", "form id", "رقم الاستمارة", "رقم السجل", "المعرف"],
+    "Household ID": ["household id", "household", "رقم الاسرة", "رقم الأسرة", "معرف الاسرة"],
+    "Relationship": ["relationship", "relation to head", "صلة القرابة", "العلاقة برب الاسرة", "صلة القرابة برب الأسرة"],
+    "Age": ["age", "العمر", "السن"],
+    "Gender": ["gender", "sex", "الجنس", "النوع"],
+    "Nationality": ["nationality", "الجنسية"],
+    "Native Language": ["native language", "language", "اللغة الام", "اللغة الأم"],
+    "Education": ["education", "education level", "المؤهل العلمي", "المؤهل", "المستوى التعليمي"],
+    "Employment Status": ["employment status", "employment", "الحالة الوظيفية", "الحالة العملية"],
+    "Job Title": ["job title", "occupation", "المسمى الوظيفي", "المهنة"],
+    "Years Experience": ["years experience", "years of experience", "experience", "سنوات الخبرة"],
+    "Monthly Salary": ["monthly salary", "salary", "الراتب الشهري", "الراتب الشهري ريال", "الراتب"],
+    "Marital Status": ["marital status", "الحالة الاجتماعية"],
+    "Family Members": ["family members", "household size", "عدد افراد الاسرة", "عدد أفراد الأسرة"],
+    "Children": ["children", "number of children", "عدد الاطفال", "عدد الأطفال"],
+    "Region": ["region", "المنطقة"],
+    "Sector": ["sector", "القطاع"],
+    "Income Source": ["income source", "مصدر الدخل"],
+}
+
+NUMERIC_KEYS = set(NUMERIC_FIELDS) | {"Family Members"}
+
+
+def _normalize_header(header: str) -> str:
+    text = str(header).strip().lstrip("﻿").lower().replace("_", " ").replace("-", " ")
+    return " ".join(text.split())
+
+
+_HEADER_LOOKUP = {
+    _normalize_header(alias): key
+    for key, aliases in HEADER_ALIASES.items()
+    for alias in [key] + aliases
+}
+
+
+def map_headers(headers) -> dict:
+    """{عنوان العمود في الملف: مفتاح form_data}؛ الأعمدة غير المعروفة تبقى بأسمائها"""
+    return {header: _HEADER_LOOKUP.get(_normalize_header(header), str(header).strip()) for header in headers}
+
+
+def _coerce_number(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    text = str(value).strip().replace(",", "")
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def _to_form(row: dict, mapping: dict) -> dict:
+    form_data = {}
+    for column, value in row.items():
+        key = mapping.get(column)
+        if key is None:
+            key = mapping[column] = _HEADER_LOOKUP.get(_normalize_header(column), str(column).strip())
+        if key in NUMERIC_KEYS:
+            value = _coerce_number(value)
+        if value is None or value == "":
+            continue
+        form_data[key] = value
+    return form_data
+
+
+def detect_format(name: str) -> str:
+    name = name.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if name.endswith(".parquet") or name.endswith(".pq"):
+        return "parquet"
+    if name.endswith(".ndjson") or name.endswith(".jsonl"):
+        return "ndjson"
+    return "csv"
+
+
+def _open_binary(source):
+    """يعيد (ملف ثنائي للقراءة، الملف الأصلي إن كان يجب إغلاقه)"""
+    owned = None
+    raw = source
+    if not hasattr(source, "read"):
+        raw = owned = open(source, "rb")
+    if str(getattr(source, "name", source)).lower().endswith(".gz"):
+        return gzip.GzipFile(fileobj=raw), owned
+    return raw, owned
+
+
+def read_records(source, fmt=None, encoding: str = "utf-8-sig", batch_size: int = DEFAULT_CHUNK_SIZE):
+    """يولّد form_data لكل صف من مسار أو ملف ثنائي مفتوح دون تحميل الملف كاملاً"""
+    fmt = fmt or detect_format(getattr(source, "name", str(source)))
+
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow is required to read Parquet files.")
+        parquet = pq.ParquetFile(source)
+        mapping = map_headers(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=batch_size):
+            for row in batch.to_pylist():
+                yield _to_form(row, mapping)
+        return
+
+    handle, owned = _open_binary(source)
+    try:
+        text = io.TextIOWrapper(handle, encoding=encoding, newline="")
+        if fmt == "ndjson":
+            mapping = {}
+            for line in text:
+                if line.strip():
+                    yield _to_form(json.loads(line), mapping)
+        else:
+            reader = csv.DictReader(text)
+            mapping = map_headers(reader.fieldnames or [])
+            for row in reader:
+                yield _to_form(row, mapping)
+        text.detach()
+    finally:
+        if owned is not None:
+            owned.close()
+
+
+def validate_chunk(chunk, households: bool = False, outliers=None) -> list:
+    """outliers (اختياري): مسار ملف المرجع الإحصائي (يُحمّل مرة واحدة لكل عملية)،
+    وإلا فمرجع GUARDIAN_OUTLIER_REFERENCE إن كان مبنياً، كما في analyze_form_demo"""
+    if outliers is None:
+        reference = _outlier_reference()
+    else:
+        # guardian.outliers وحدة CLI أيضاً، فلا تُستورد إلا عند تحديد مرجع
+        from .outliers import load_reference
+
+        reference = load_reference(outliers)
+    results = [evaluate_rules(form_data) for form_data in chunk]
+    if reference is not None:
+        results = [merge_issues(result, reference.check(form_data)) for result, form_data in zip(results, chunk)]
+    if households:
+        results = merge_cross_issues(results, check_households(chunk))
+    return results
+
+
+OUTPUT_COLUMNS = ["row", "record_id", "confidence_score", "status", "issue_count", "rules", "issues"]
+
+SUMMARY_KEYS = ("rows", "issues", "clean", "warning", "error")
+
+
+def format_results(fmt: str, first_row: int, chunk, results) -> str:
+    """نص نتائج الدفعة كما يُكتب في ملف الإخراج (NDJSON أو صفوف CSV بدون العنوان)"""
+    rows = []
+    for offset, (form_data, result) in enumerate(zip(chunk, results)):
+        issues = result.get("issues", [])
+        rows.append({
+            "row": first_row + offset,
+            "record_id": form_data.get(RECORD_ID, ""),
+            "confidence_score": result.get("confidence_score"),
+            "status": result.get("status"),
+            "issue_count": len(issues),
+            "rules": ";".join(issue.get("rule", "") for issue in issues),
+            "issues": issues,
+        })
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [row[c] if c != "issues" else json.dumps(row[c], ensure_ascii=False) for c in OUTPUT_COLUMNS]
+            for row in rows
+        )
+        return buffer.getvalue()
+    return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+
+def process_chunk(start: int, chunk, fmt: str, households: bool = False, outliers=None, keep_results: bool = False):
+    """فحص دفعة وتنسيقها وتلخيصها - تعمل في العملية الرئيسية أو في عمال ParallelExecutor
+
+    keep_results يعيد أيضاً (رقم الاستمارة، المنطقة، النتيجة) لكل صف ليُكتب في مخزن النتائج
+    من العملية الرئيسية (عمال المجمّع لا ينفذون atexit فلا يُفرغون مخزناً خاصاً بهم).
+    """
+    results = validate_chunk(chunk, households, outliers)
+    counts = dict.fromkeys(SUMMARY_KEYS, 0)
+    counts["rows"] = len(chunk)
+    for result in results:
+        counts["issues"] += len(result.get("issues", []))
+        status = result.get("status")
+        if status in counts:
+            counts[status] += 1
+    rows = None
+    if keep_results:
+        rows = [(form_data.get(RECORD_ID), form_data.get("Region"), result) for form_data, result in zip(chunk, results)]
+    return format_results(fmt, start + 1, chunk, results), counts, rows
+
+
+class ResultWriter:
+    """يكتب نتيجة لكل صف فور توفرها (NDJSON أو CSV)"""
+
+    def __init__(self, target, fmt=None):
+        name = getattr(target, "name", str(target))
+        self.fmt = fmt or ("csv" if name.lower().endswith(".csv") else "ndjson")
+        if hasattr(target, "write"):
+            self._handle, self._owned = target, False
+        else:
+            self._handle, self._owned = open(target, "w", encoding="utf-8", newline=""), True
+        if self.fmt == "csv":
+            csv.writer(self._handle).writerow(OUTPUT_COLUMNS)
+
+    def write(self, text: str) -> None:
+        self._handle.write(text)
+
+    def write_chunk(self, first_row: int, chunk, results) -> None:
+        self.write(format_results(self.fmt, first_row, chunk, results))
+
+    def close(self) -> None:
+        self._handle.flush()
+        if self._owned:
+            self._handle.close()
+
+
+def validate_stream(
+    records, writer: ResultWriter, chunk_size=None, progress=None, workers: int = 1, households: bool = False,
+    outliers=None, sink=None,
+) -> dict:
+    """فحص السجلات دفعة بعد دفعة وكتابة النتائج فوراً
+
+    workers > 1 يوزع الدفعات على عدة عمليات مع الحفاظ على ترتيب الإخراج؛
+    حينها chunk_size=None يعني حجم دفعة متكيف. progress (اختياري) يُستدعى بعد
+    كل دفعة بقاموس الملخص الجاري. households يضيف فحوص الأسرة والتكرار داخل
+    كل دفعة (السجلات المكررة في دفعتين مختلفتين لا تُكتشف) بحجم دفعة ثابت
+    (DEFAULT_CHUNK_SIZE افتراضياً) حتى مع workers > 1. outliers مسار مرجع
+    القيم الشاذة (guardian.outliers؛ افتراضياً GUARDIAN_OUTLIER_REFERENCE).
+    sink مخزن النتائج (افتراضياً get_result_sink()) تُضاف إليه نتيجة كل صف
+    بالوضع "rules".
+    """
+    started = time.perf_counter()
+    summary = dict.fromkeys(SUMMARY_KEYS, 0)
+    sink = get_result_sink() if sink is None else sink
+    keep_results = sink.root is not None
+
+    def consume(text: str, counts: dict, rows) -> None:
+        writer.write(text)
+        if rows:
+            ts = time.time()
+            for record_id, region, result in rows:
+                sink.record({RECORD_ID: record_id, "Region": region}, result, "rules", ts=ts)
+        for key, value in counts.items():
+            summary[key] += value
+        elapsed = time.perf_counter() - started
+        summary["elapsed_s"] = elapsed
+        summary["rows_per_sec"] = summary["rows"] / elapsed if elapsed > 0 else 0.0
+        if progress is not None:
+            progress(dict(summary))
+
+    if households:
+        # فحوص الأسرة والتكرار داخل الدفعة فقط، فحدود الدفعات جزء من النتيجة:
+        # حجم ثابت في المسارين (بلا تكيف) ليبقى إخراج workers > 1 مطابقاً للمتسلسل
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+
+    if workers > 1:
+        from .parallel import ParallelExecutor
+
+        with ParallelExecutor(workers, chunk_size) as executor:
+            chunks = executor.map_chunks(
+                process_chunk, records, writer.fmt, households, outliers, keep_results, households=households
+            )
+            for _, _, payload in chunks:
+                consume(*payload)
+    else:
+        start = 0
+        for chunk in HouseholdChunker(records, households).chunks(max(1, int(chunk_size or DEFAULT_CHUNK_SIZE))):
+            consume(*process_chunk(start, chunk, writer.fmt, households, outliers, keep_results))
+            start += len(chunk)
+
+    summary.setdefault("elapsed_s", time.perf_counter() - started)
+    summary.setdefault("rows_per_sec", 0.0)
+    return summary
+
+
+def validate_file(
+    source, output, fmt=None, out_fmt=None, chunk_size=None, progress=None, workers: int = 1, households: bool = False,
+    outliers=None, sink=None,
+) -> dict:
+    writer = ResultWriter(output, out_fmt)
+    try:
+        records = read_records(source, fmt, batch_size=chunk_size or DEFAULT_CHUNK_SIZE)
+        return validate_stream(records, writer, chunk_size, progress, workers, households, outliers, sink)
+    finally:
+        writer.close()
+
+
+def _print_progress(summary: dict) -> None:
+    print(
+        f"\r{summary['rows']:,} rows | {summary['rows_per_sec']:,.0f} rows/s | "
+        f"{summary['error']:,} error | {summary['warning']:,} warning",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Stream-validate a survey extract (CSV / NDJSON / Parquet)")
+    parser.add_argument("input", help="input file (.csv, .ndjson/.jsonl, .parquet; optionally .gz)")
+    parser.add_argument("-o", "--output", required=True, help="results file (.ndjson or .csv)")
+    parser.add_argument("--format", choices=["csv", "ndjson", "parquet"], help="input format (default: from extension)")
+    parser.add_argument(
+        "--chunk-size", type=int, default=None,
+        help=f"rows per chunk (default: {DEFAULT_CHUNK_SIZE}, or adaptive with --workers unless --households)",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0 = all cores)")
+    parser.add_argument(
+        "--households", action="store_true",
+        help="also run cross-record checks (household consistency, duplicate respondents) within each chunk",
+    )
+    parser.add_argument("--outliers", metavar="REFERENCE", help="also flag statistical outliers against this reference file")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"input file not found: {args.input}")
+    if args.outliers and not os.path.exists(args.outliers):
+        parser.error(f"outlier reference not found: {args.outliers}")
+
+    workers = args.workers
+    if workers == 0:
+        from .parallel import default_workers
+
+        workers = default_workers()
+
+    summary = validate_file(
+        args.input, args.output, args.format, chunk_size=args.chunk_size,
+        progress=None if args.quiet else _print_progress, workers=workers, households=args.households,
+        outliers=args.outliers,
+    )
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
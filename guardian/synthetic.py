@@ -0,0 +1,272 @@
+"""مولد استمارات مسح سوق العمل الاصطناعية (قابل للتكرار بالبذرة) لقياس الأداء والاختبار
+
+    python -m guardian.synthetic -n 100000 -o forms.csv.gz --contradiction-rate 0.2 --seed 7
+
+الاستمارة السليمة لا تطلق أي قاعدة. بنسبة contradiction_rate يُحقن فيها تناقض
+واحد (أو أكثر) من CONTRADICTIONS، ويمكن تحديد نسبة كل نوع عبر weights.
+"""
+import argparse
+import csv
+import gzip
+import json
+import random
+
+from .occupations import education_rank, match_job_title
+from .rules import FIELD_OPTIONS
+
+# ---------------------------
+# Base distributions
+# ---------------------------
+NATIONALITY_WEIGHTS = {"سعودي": 60, "مصري": 10, "اردني": 5, "هندي": 10, "باكستاني": 10, "اخرى": 5}
+
+NATIVE_LANGUAGES = {
+    "سعودي": [("العربية", 1)],
+    "مصري": [("العربية", 1)],
+    "اردني": [("العربية", 1)],
+    "هندي": [("الهندية", 8), ("الانجليزية", 2)],
+    "باكستاني": [("الاردية", 9), ("الانجليزية", 1)],
+    "اخرى": [("اخرى", 6), ("الانجليزية", 4)],
+}
+
+EDUCATION_WEIGHTS = {"اقل من ثانوي": 10, "ثانوي": 30, "دبلوم": 15, "بكالوريوس": 32, "ماجستير": 10, "دكتوراه": 3}
+
+EMPLOYMENT_WEIGHTS = {"موظف حكومي": 30, "موظف قطاع خاص": 35, "اعمال حرة": 10, "غير موظف": 12, "طالب": 6, "متقاعد": 7}
+
+JOB_TITLES = {
+    "موظف حكومي": ["معلم", "موظف إداري", "مهندس مدني", "طبيب", "ممرض", "محاسب", "حارس أمن"],
+    "موظف قطاع خاص": ["مهندس برمجيات", "محاسب", "مندوب مبيعات", "سائق شاحنة", "فني صيانة", "طبيب"],
+    "اعمال حرة": ["تاجر", "مستشار", "مصمم", "سائق"],
+}
+
+SALARY_RANGES = {"موظف حكومي": (6000, 30000), "موظف قطاع خاص": (4000, 40000), "اعمال حرة": (3000, 50000)}
+
+# الراتب لوغاريتمي طبيعي حول وسيط حسب المؤهل (× معامل الحالة الوظيفية) ثم يُقص إلى SALARY_RANGES
+SALARY_MEDIANS = {"اقل من ثانوي": 4500, "ثانوي": 6500, "دبلوم": 9000, "بكالوريوس": 14000, "ماجستير": 19000, "دكتوراه": 26000}
+SALARY_FACTORS = {"موظف حكومي": 1.1, "موظف قطاع خاص": 1.0, "اعمال حرة": 1.2}
+SALARY_SIGMA = 0.35
+
+SECTORS = {
+    "موظف حكومي": [("حكومي", 1)],
+    "موظف قطاع خاص": [("خاص", 9), ("غير ربحي", 1)],
+    "اعمال حرة": [("خاص", 1)],
+}
+
+INCOME_SOURCES = {
+    "موظف حكومي": [("راتب", 1)],
+    "موظف قطاع خاص": [("راتب", 1)],
+    "اعمال حرة": [("اعمال حرة", 1)],
+    "غير موظف": [("لا يوجد", 1)],
+    "طالب": [("لا يوجد", 1)],
+    "متقاعد": [("استثمارات", 3), ("لا يوجد", 7)],
+}
+
+REGION_WEIGHTS = {"الرياض": 30, "مكة المكرمة": 25, "المدينة المنورة": 8, "الشرقية": 17, "اخرى": 20}
+
+
+def _pick(rng: random.Random, weighted) -> str:
+    items = list(weighted.items()) if isinstance(weighted, dict) else weighted
+    return rng.choices([value for value, _ in items], weights=[weight for _, weight in items])[0]
+
+
+def _job_title(rng: random.Random, employment: str, education: str, age: int) -> str:
+    """مسمى من JOB_TITLES يناسب المؤهل والعمر حتى لا تُطلق قواعد المهنة"""
+    rank = education_rank(education)
+    titles = [
+        title for title in JOB_TITLES.get(employment, ())
+        if (occupation := match_job_title(title)) is None
+        or (occupation.education_rank <= rank and occupation.min_age <= age)
+    ]
+    return rng.choice(titles) if titles else ""
+
+
+def clean_form(rng: random.Random) -> dict:
+    """استمارة متسقة لا تطلق أي قاعدة"""
+    nationality = _pick(rng, NATIONALITY_WEIGHTS)
+    education = _pick(rng, EDUCATION_WEIGHTS)
+    age = rng.randint(27 if education == "دكتوراه" else 22, 64)
+
+    employment = _pick(rng, EMPLOYMENT_WEIGHTS)
+    if employment == "متقاعد" and age < 50:
+        age = rng.randint(50, 70)
+    if employment == "طالب":
+        age = min(age, 30)
+        education = education if education != "دكتوراه" else "ماجستير"
+
+    working_years = age - 18
+    if employment in SALARY_RANGES:
+        years_exp = rng.randint(0, working_years)
+        low, high = SALARY_RANGES[employment]
+        salary = SALARY_MEDIANS[education] * SALARY_FACTORS[employment] * rng.lognormvariate(0, SALARY_SIGMA)
+        salary = min(high, max(low, int(salary / 500) * 500))
+    else:
+        years_exp = rng.randint(0, min(working_years, 40)) if employment == "متقاعد" else 0
+        salary = 0
+
+    marital = "اعزب" if age < 25 and rng.random() < 0.8 else _pick(rng, {"اعزب": 20, "متزوج": 65, "مطلق": 10, "ارمل": 5})
+    children = 0 if marital == "اعزب" else rng.randint(0, 6 if marital == "متزوج" else 4)
+
+    return {
+        "Age": age,
+        "Gender": rng.choice(FIELD_OPTIONS["Gender"]),
+        "Nationality": nationality,
+        "Native Language": _pick(rng, NATIVE_LANGUAGES[nationality]),
+        "Education": education,
+        "Employment Status": employment,
+        "Job Title": _job_title(rng, employment, education, age),
+        "Years Experience": years_exp,
+        "Monthly Salary": salary,
+        "Marital Status": marital,
+        "Family Members": 1 + (marital == "متزوج") + children,
+        "Children": children,
+        "Region": _pick(rng, REGION_WEIGHTS),
+        "Sector": _pick(rng, SECTORS[employment]) if employment in SECTORS else "لا ينطبق",
+        "Income Source": _pick(rng, INCOME_SOURCES[employment]),
+    }
+
+# ---------------------------
+# Contradictions
+# ---------------------------
+# المفاتيح تطابق معرفات RULES حيث توجد قاعدة، والتركيبات النادرة تطابق TRIAGE_POLICY
+def _refit_job_title(rng, form):
+    # بعد خفض العمر أو المؤهل، حتى لا تُطلق قواعد المهنة مع التناقض المحقون
+    form["Job Title"] = _job_title(rng, form["Employment Status"], form["Education"], form["Age"])
+
+
+def _age_vs_phd(rng, form):
+    form.update({"Age": rng.randint(20, 24), "Education": "دكتوراه"})
+    form["Years Experience"] = min(form["Years Experience"], form["Age"] - 18)
+    _refit_job_title(rng, form)
+
+
+def _age_vs_experience(rng, form):
+    form["Years Experience"] = form["Age"] - 18 + rng.randint(1, 15)
+
+
+def _unemployed_vs_salary(rng, form):
+    form.update({"Employment Status": "غير موظف", "Job Title": "", "Monthly Salary": rng.randrange(2000, 20000, 500)})
+
+
+def _single_vs_children(rng, form):
+    form.update({"Marital Status": "اعزب", "Children": rng.randint(1, 5)})
+    form["Family Members"] = 1 + form["Children"]
+
+
+def _saudi_vs_english(rng, form):
+    form.update({"Nationality": "سعودي", "Native Language": "الانجليزية"})
+
+
+def _teen_married_children(rng, form):
+    form.update({"Age": rng.randint(18, 19), "Marital Status": "متزوج", "Children": rng.randint(3, 5)})
+    form["Years Experience"] = min(form["Years Experience"], form["Age"] - 18)
+    if form["Education"] == "دكتوراه":
+        form["Education"] = "ثانوي"
+    form["Family Members"] = 2 + form["Children"]
+    _refit_job_title(rng, form)
+
+
+def _job_vs_education(rng, form):
+    title = rng.choice(("طبيب", "مهندس مدني", "صيدلي", "محامي"))
+    form.update({"Job Title": title, "Education": rng.choice(("اقل من ثانوي", "ثانوي"))})
+    form["Age"] = max(form["Age"], match_job_title(title).min_age)
+
+
+def _job_vs_age(rng, form):
+    title = rng.choice(("طبيب", "صيدلي", "محامي"))
+    # 20 سنة فأكثر حتى لا تُطلق قاعدة teen_married_children
+    form.update({"Job Title": title, "Education": "بكالوريوس", "Age": rng.randint(20, match_job_title(title).min_age - 1)})
+    form["Years Experience"] = min(form["Years Experience"], form["Age"] - 18)
+
+
+def _student_with_salary(rng, form):
+    form.update({"Employment Status": "طالب", "Job Title": "", "Income Source": "راتب", "Monthly Salary": 0})
+
+
+def _government_private_sector(rng, form):
+    form.update({"Employment Status": "موظف حكومي", "Sector": "خاص"})
+
+
+CONTRADICTIONS = {
+    "age_vs_phd": _age_vs_phd,
+    "age_vs_experience": _age_vs_experience,
+    "unemployed_vs_salary": _unemployed_vs_salary,
+    "single_vs_children": _single_vs_children,
+    "saudi_vs_english": _saudi_vs_english,
+    "teen_married_children": _teen_married_children,
+    "job_vs_education": _job_vs_education,
+    "job_vs_age": _job_vs_age,
+    "student_with_salary": _student_with_salary,
+    "government_private_sector": _government_private_sector,
+}
+
+
+def generate_labeled(n: int, seed: int = 0, contradiction_rate: float = 0.2, weights=None, max_per_form: int = 1):
+    """يولّد (form_data, [أنواع التناقضات المحقونة]) لعدد n من الاستمارات
+
+    weights: {نوع تناقض: وزن} لتحديد نسبة كل نوع (الافتراضي أوزان متساوية لكل CONTRADICTIONS).
+    """
+    rng = random.Random(seed)
+    weights = dict.fromkeys(CONTRADICTIONS, 1) if weights is None else weights
+    unknown = set(weights) - set(CONTRADICTIONS)
+    if unknown:
+        raise ValueError(f"unknown contradiction types: {', '.join(sorted(unknown))}")
+    kinds = [kind for kind, weight in weights.items() if weight > 0]
+    kind_weights = [weights[kind] for kind in kinds]
+
+    for i in range(n):
+        form = {"Record ID": f"F{seed:03d}-{i + 1:07d}"}
+        form.update(clean_form(rng))
+        injected = []
+        if kinds and rng.random() < contradiction_rate:
+            count = rng.randint(1, max(1, max_per_form))
+            for kind in rng.choices(kinds, weights=kind_weights, k=count):
+                if kind not in injected:
+                    CONTRADICTIONS[kind](rng, form)
+                    injected.append(kind)
+        yield form, injected
+
+
+def generate_forms(n: int, seed: int = 0, contradiction_rate: float = 0.2, weights=None, max_per_form: int = 1):
+    """مثل generate_labeled لكن يولّد form_data فقط"""
+    for form, _ in generate_labeled(n, seed, contradiction_rate, weights, max_per_form):
+        yield form
+
+
+def write_forms(path: str, forms) -> int:
+    """كتابة الاستمارات CSV أو NDJSON حسب الامتداد (مع .gz اختياري)؛ يعيد عدد الصفوف"""
+    opener = gzip.open if path.endswith(".gz") else open
+    name = path[:-3] if path.endswith(".gz") else path
+    count = 0
+    with opener(path, "wt", encoding="utf-8", newline="") as handle:
+        if name.endswith((".ndjson", ".jsonl")):
+            for form in forms:
+                handle.write(json.dumps(form, ensure_ascii=False) + "\n")
+                count += 1
+            return count
+        writer = None
+        for form in forms:
+            if writer is None:
+                writer = csv.DictWriter(handle, fieldnames=list(form))
+                writer.writeheader()
+            writer.writerow(form)
+            count += 1
+    return count
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic labour-market survey forms")
+    parser.add_argument("-n", "--records", type=int, default=10000)
+    parser.add_argument("-o", "--output", required=True, help="output file (.csv or .ndjson, optionally .gz)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--contradiction-rate", type=float, default=0.2)
+    parser.add_argument(
+        "--weights", type=json.loads, default=None,
+        help='per-type weights as JSON, e.g. \'{"age_vs_phd": 2, "saudi_vs_english": 1}\'',
+    )
+    args = parser.parse_args(argv)
+
+    count = write_forms(args.output, generate_forms(args.records, args.seed, args.contradiction_rate, args.weights))
+    print(json.dumps({"records": count, "output": args.output, "seed": args.seed}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""قياس زمن مراحل الفحص وعداداته بتكلفة شبه معدومة عند الإيقاف
+
+    with get_telemetry().timer("api"):
+        ...
+    get_telemetry().inc("fallback_total", reason="quota")
+
+المراحل تُجمع في مدرجات تراكمية (histogram) بحدود ثابتة، وتُصدّر بصيغة Prometheus
+النصية عبر /metrics في خدمة HTTP أو في ملف (GUARDIAN_TELEMETRY_FILE) لمجمّع
+textfile، وتُعرض في تبويب "الأداء".
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from .config import TELEMETRY_ENABLED, TELEMETRY_FILE, TELEMETRY_FILE_INTERVAL_SECONDS
+
+# حدود المدرج بالثواني: من قواعد بالميكروثانية إلى طلبات AI بعشرات الثواني
+STAGE_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# وصف المراحل المعروفة (يظهر في تبويب الأداء)
+STAGES = {
+    "pipeline": "الفحص كاملاً (AI مع Fallback)",
+    "triage": "الفرز بالقواعد",
+    "rules": "محرك القواعد",
+    "live_rules": "الفحص الفوري للحقول المتغيرة",
+    "queue_wait": "انتظار حصة AI (محدد المعدل)",
+    "api": "زمن استجابة OpenAI",
+    "parse": "تحليل JSON والتحقق من المخطط",
+    "classifier": "المصنف المحلي",
+    "stream": "الرد بالتدفق كاملاً",
+    "first_issue": "أول مشكلة في الرد بالتدفق",
+    "ui_render": "تنفيذ واجهة Streamlit",
+    "app_import": "استيراد وحدات الواجهة (أول تشغيل)",
+    "first_paint": "أول عرض للواجهة",
+    "preload": "تحميل المكتبات الثقيلة في الخلفية",
+    "results_write": "كتابة دفعة الأحكام إلى Parquet",
+}
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("telemetry", "stage", "started")
+
+    def __init__(self, telemetry, stage: str):
+        self.telemetry = telemetry
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.telemetry.observe(self.stage, time.perf_counter() - self.started)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(STAGE_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def quantile(self, q: float) -> float:
+        """تقدير من حدود المدرج (استيفاء خطي داخل الخانة)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = STAGE_BUCKETS[i - 1] if i > 0 else 0.0
+                high = STAGE_BUCKETS[i] if i < len(STAGE_BUCKETS) else STAGE_BUCKETS[-1]
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return STAGE_BUCKETS[-1]
+
+
+def _label_text(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels) + "}"
+
+
+class Telemetry:
+    def __init__(self, enabled: bool = TELEMETRY_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self.started_at = time.time()
+
+    def timer(self, stage: str):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = _Histogram()
+            histogram.counts[bisect_left(STAGE_BUCKETS, seconds)] += 1
+            histogram.total += seconds
+            histogram.count += 1
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def stats(self) -> dict:
+        """{"stages": {مرحلة: {count, mean_ms, p50_ms, p95_ms, p99_ms, total_s}}, "counters": {اسم: {labels: قيمة}}}"""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": h.count,
+                    "mean_ms": h.total / h.count * 1000 if h.count else 0.0,
+                    "p50_ms": h.quantile(0.50) * 1000,
+                    "p95_ms": h.quantile(0.95) * 1000,
+                    "p99_ms": h.quantile(0.99) * 1000,
+                    "total_s": h.total,
+                }
+                for stage, h in self._stages.items()
+            }
+            counters = {}
+            for (name, labels), value in self._counters.items():
+                counters.setdefault(name, {})[",".join(f"{k}={v}" for k, v in labels)] = value
+        return {"enabled": self.enabled, "since": self.started_at, "stages": stages, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        """صيغة Prometheus النصية (text/plain; version=0.0.4)"""
+        lines = [
+            "# HELP guardian_stage_seconds Time spent per validation stage.",
+            "# TYPE guardian_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, h in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, n in zip(STAGE_BUCKETS, h.counts):
+                    cumulative += n
+                    lines.append(f'guardian_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'guardian_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'guardian_stage_seconds_sum{{stage="{stage}"}} {h.total:.6f}')
+                lines.append(f'guardian_stage_seconds_count{{stage="{stage}"}} {h.count}')
+            names = sorted({name for name, _ in self._counters})
+            for name in names:
+                lines.append(f"# TYPE guardian_{name} counter")
+                for (counter, labels), value in sorted(self._counters.items()):
+                    if counter == name:
+                        lines.append(f"guardian_{name}{_label_text(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """كتابة ذرية (ملف مؤقت ثم إعادة تسمية) لمجمّع textfile في node_exporter"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            handle.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+
+def _export_loop(telemetry: Telemetry, path: str, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            telemetry.write_textfile(path)
+        except OSError:
+            pass
+
+
+_TELEMETRY = Telemetry()
+
+if TELEMETRY_FILE:
+    threading.Thread(
+        target=_export_loop,
+        args=(_TELEMETRY, TELEMETRY_FILE, TELEMETRY_FILE_INTERVAL_SECONDS),
+        name="guardian-telemetry-export",
+        daemon=True,
+    ).start()
+
+
+def get_telemetry() -> Telemetry:
+    """عدادات وأزمنة المراحل المشتركة على مستوى العملية"""
+    return _TELEMETRY
@@ -0,0 +1,134 @@
+"""الفرز بالقواعد أولاً: تصعيد الاستمارات الغامضة فقط إلى AI"""
+import threading
+from collections import Counter, namedtuple
+
+from .arabic import normalize_arabic
+from .occupations import education_rank
+from .rules import FIELD_OPTIONS, evaluate_form
+
+TRIAGE_POLICY = {
+    # أي قاعدة عالية الخطورة حكم واضح لا يحتاج النموذج
+    "decide_on_high": True,
+    # نتيجة بقواعد متوسطة الخطورة فقط قد تكون مقبولة - يحكم فيها النموذج
+    "escalate_medium_only": True,
+    # حقول نصية حرة لا تغطيها القواعد كاملة: المسمى المعروف تفحص القواعد مؤهله وعمره
+    # فقط، أما اتساقه مع الجنس أو القطاع أو مصدر الدخل فيحكم فيه النموذج
+    "free_text_fields": ("Job Title",),
+    # القيم المعروفة في VALUE_INDEXES تفحصها القواعد كاملة فلا تُعد فئة مجهولة
+    "trust_indexed_values": True,
+    # قيمة خارج مفردات النموذج حتى بعد التطبيع
+    "escalate_unknown_categories": True,
+    # تركيبات نادرة: {حقل: قيم} يجب أن تتحقق كلها
+    "rare_combinations": [
+        {"Employment Status": ("غير موظف", "طالب"), "Income Source": ("راتب",)},
+        {"Employment Status": ("موظف حكومي",), "Sector": ("خاص", "غير ربحي")},
+    ],
+}
+
+TriageDecision = namedtuple("TriageDecision", "result escalate reason")
+
+# فهارس تتعرف على القيم الحرة: {حقل: دالة نص -> None إن لم تُعرف}
+# فقط للحقول التي تغطي القواعد كل استعمالاتها؛ Job Title ليس منها
+VALUE_INDEXES = {
+    "Education": education_rank,
+}
+
+_OPTIONS = {field: {normalize_arabic(option) for option in options} for field, options in FIELD_OPTIONS.items()}
+
+
+def _indexed(field: str, value: str, policy) -> bool:
+    index = VALUE_INDEXES.get(field)
+    return index is not None and policy.get("trust_indexed_values", True) and index(value) is not None
+
+
+# قوائم rare_combinations بقيم مطبّعة، مفهرسة بهوية القائمة (السياسة المنسوخة بـ dict تشاركها)
+_COMBINATIONS = {}
+
+
+def _rare_combinations(policy) -> list:
+    """التركيبات النادرة بعد normalize_arabic لقيمها، مرة واحدة لكل قائمة كما في _OPTIONS"""
+    combinations = policy.get("rare_combinations", ())
+    cached = _COMBINATIONS.get(id(combinations))
+    if cached is None or cached[0] is not combinations:
+        if len(_COMBINATIONS) >= 32:
+            _COMBINATIONS.clear()
+        normalized = [
+            {field: frozenset(normalize_arabic(value) for value in values) for field, values in combination.items()}
+            for combination in combinations
+        ]
+        cached = _COMBINATIONS[id(combinations)] = (combinations, normalized)
+    return cached[1]
+
+
+def _matches(form_data: dict, combination: dict) -> bool:
+    # مقارنة بعد التطبيع في الطرفين كفحص الفئات: "غير موظّف" = "غير موظف"
+    for field, values in combination.items():
+        value = form_data.get(field)
+        if value in (None, "") or normalize_arabic(value) not in values:
+            return False
+    return True
+
+
+def triage_form(form_data: dict, policy=None) -> TriageDecision:
+    """تشغيل القواعد أولاً وتحديد ما إذا كانت الاستمارة تحتاج النموذج"""
+    policy = TRIAGE_POLICY if policy is None else policy
+    result = evaluate_form(form_data)
+    severities = {issue["severity"] for issue in result["issues"]}
+
+    if policy.get("decide_on_high", True) and "high" in severities:
+        return TriageDecision(result, False, "high_severity")
+
+    for field in policy.get("free_text_fields", ()):
+        value = str(form_data.get(field) or "").strip()
+        if value and not _indexed(field, value, policy):
+            return TriageDecision(result, True, f"free_text:{field}")
+
+    if policy.get("escalate_unknown_categories", True):
+        for field, options in _OPTIONS.items():
+            value = form_data.get(field)
+            if value in (None, "") or normalize_arabic(value) in options or _indexed(field, str(value), policy):
+                continue
+            return TriageDecision(result, True, f"unknown_category:{field}")
+
+    for combination in _rare_combinations(policy):
+        if _matches(form_data, combination):
+            return TriageDecision(result, True, "rare_combination")
+
+    if severities and policy.get("escalate_medium_only", True):
+        return TriageDecision(result, True, "medium_only")
+
+    return TriageDecision(result, False, "issues" if severities else "clean")
+
+
+class TriageStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.local = 0
+        self.escalated = 0
+        self.reasons = Counter()
+
+    def record(self, decision: TriageDecision) -> None:
+        with self._lock:
+            if decision.escalate:
+                self.escalated += 1
+            else:
+                self.local += 1
+            self.reasons[decision.reason] += 1
+
+    def stats(self) -> dict:
+        total = self.local + self.escalated
+        return {
+            "total": total,
+            "local": self.local,
+            "escalated": self.escalated,
+            "escalation_rate": self.escalated / total if total else 0.0,
+            "reasons": dict(self.reasons),
+        }
+
+
+_TRIAGE_STATS = TriageStats()
+
+
+def get_triage_stats() -> TriageStats:
+    """عدادات الفرز المشتركة على مستوى العملية"""
+    return _TRIAGE_STATS
@@ -0,0 +1,79 @@
+"""فحص AI المتزامن: حد الطلبات الجارية، والأخطاء لكل سجل، وإلغاء المهام عند التوقف المبكر"""
+import asyncio
+
+import pytest
+
+from guardian import ai
+
+
+class FakeAI:
+    """بديل analyze_form_ai_async: السجلات في hang لا تكتمل حتى تُلغى"""
+
+    def __init__(self, hang=(), fail=()):
+        self.hang, self.fail = set(hang), set(fail)
+        self.inflight = self.peak = self.cancelled = 0
+
+    async def __call__(self, api_key, form_data, base_url=None, max_wait=None, model=None):
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        try:
+            await asyncio.sleep(0.001)
+            if form_data["i"] in self.hang:
+                await asyncio.Event().wait()
+            if form_data["i"] in self.fail:
+                raise ValueError("bad response")
+            return {"status": "clean", "i": form_data["i"]}
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.inflight -= 1
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    def install(**kwargs):
+        fake_ai = FakeAI(**kwargs)
+        monkeypatch.setattr(ai, "analyze_form_ai_async", fake_ai)
+        return fake_ai
+    return install
+
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+
+def test_bounded_concurrency_and_per_record_errors(fake):
+    fake_ai = fake(fail={3})
+    records = [{"i": i} for i in range(20)]
+    results = dict(asyncio.run(_collect(ai.analyze_forms_ai_async(records, "key", concurrency=4))))
+    assert sorted(results) == list(range(20))
+    assert fake_ai.peak == 4
+    assert isinstance(results[3], ValueError)
+    assert results[7] == {"status": "clean", "i": 7}
+
+
+def test_early_stop_cancels_pending_requests(fake):
+    fake_ai = fake(hang={1, 2})
+
+    async def first_only():
+        stream = ai.analyze_forms_ai_async([{"i": i} for i in range(10)], "key", concurrency=3)
+        async for item in stream:
+            break
+        await stream.aclose()
+        # قبل أن يلغي asyncio.run ما تبقى من مهام عند انتهائه
+        assert fake_ai.cancelled == 2 and fake_ai.inflight == 0
+        return item
+
+    assert asyncio.run(first_only())[0] == 0
+
+
+def test_event_loop_iter_forms_stops_early(fake):
+    fake_ai = fake(hang={1, 2})
+    loop = ai.AIEventLoop()
+    stream = loop.iter_forms([{"i": i} for i in range(10)], "key", concurrency=3)
+    assert next(stream)[0] == 0
+    stream.close()
+    loop.submit(asyncio.sleep(0.05)).result()
+    # pump يسبق المستهلك بطلب أو أكثر، وكلها تُلغى
+    assert fake_ai.cancelled >= 2 and fake_ai.inflight == 0
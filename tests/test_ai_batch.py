@@ -0,0 +1,100 @@
+"""الدفعات المصغرة: تقسيم السجلات التي أغفلها النموذج وإعادة إرسالها"""
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from guardian import ai
+
+
+def _verdict():
+    return {"confidence_score": 98, "status": "clean", "issues": [], "summary": "ok"}
+
+
+def _response(payload) -> SimpleNamespace:
+    content = payload if isinstance(payload, str) else json.dumps(payload)
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+class FakeModel:
+    """بديل create_completion_async يسجل حجم كل طلب ويغفل سجلات محددة في ردود الدفعات"""
+
+    def __init__(self, omit=(), truncate=False, error=None):
+        self.omit, self.truncate, self.error = set(omit), truncate, error
+        self.sizes = []
+
+    async def __call__(self, client, max_wait=None, **request):
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        messages = request["messages"]
+        if messages[0]["content"] != ai.BATCH_SYSTEM_PROMPT:
+            self.sizes.append(1)
+            return _response(_verdict())
+        ids = re.findall(r"^\[(r\d+)\]$", messages[1]["content"], re.M)
+        self.sizes.append(len(ids))
+        results = [{"id": record_id, **_verdict()} for record_id in ids if int(record_id[1:]) not in self.omit]
+        text = json.dumps({"results": results})
+        # رد مقطوع في منتصف السجل الأخير: تُقبل السجلات المكتملة قبله فقط
+        return _response(text[: text.rindex('{"id"') + 12] if self.truncate else text)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    def install(**kwargs):
+        fake = FakeModel(**kwargs)
+        monkeypatch.setattr(ai, "get_async_openai_client", lambda api_key, base_url=None: object())
+        monkeypatch.setattr(ai, "create_completion_async", fake)
+        return fake
+    return install
+
+
+def _run(records, **kwargs):
+    async def collect():
+        return [item async for item in ai.analyze_forms_ai_batched_async(records, "key", **kwargs)]
+    return dict(asyncio.run(collect()))
+
+
+def test_every_record_answered_in_one_request(model):
+    fake = model()
+    results = _run([{"Age": i} for i in range(8)], batch_size=8, concurrency=1)
+    assert sorted(results) == list(range(8)) and fake.sizes == [8]
+
+
+def test_omitted_records_are_split_and_retried(model):
+    fake = model(omit={2, 5, 6})
+    usage = {}
+    results = _run([{"Age": i} for i in range(8)], batch_size=8, concurrency=1, usage=usage)
+    assert sorted(results) == list(range(8))
+    assert all(result["status"] == "clean" for result in results.values())
+    # الناقص [2, 5, 6] يُقسم إلى [2, 5] ثم [6] الذي يُرسل بالصيغة العادية
+    assert fake.sizes[0] == 8 and fake.sizes[1:] == [2, 1, 1, 1]
+    assert usage["requests"] == len(fake.sizes)
+
+
+def test_truncated_batch_keeps_complete_records(model):
+    fake = model(truncate=True)
+    results = _run([{"Age": i} for i in range(4)], batch_size=4, concurrency=1)
+    assert sorted(results) == list(range(4))
+    assert all(isinstance(result, dict) for result in results.values())
+    assert fake.sizes[0] == 4 and sum(fake.sizes[1:]) == 1
+
+
+def test_request_error_is_returned_per_record(model):
+    model(error=ValueError("boom"))
+    results = _run([{"Age": i} for i in range(3)], batch_size=2, concurrency=2)
+    assert sorted(results) == [0, 1, 2]
+    assert all(isinstance(result, ValueError) for result in results.values())
+
+
+def test_cancelled_worker_does_not_hang_consumer(model):
+    model(error=asyncio.CancelledError())
+
+    async def collect():
+        stream = ai.analyze_forms_ai_batched_async([{"Age": 1}, {"Age": 2}], "key", batch_size=2, concurrency=1)
+        return [item async for item in stream]
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(asyncio.wait_for(collect(), 2))
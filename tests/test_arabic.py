@@ -0,0 +1,28 @@
+"""تطبيع النص العربي، وفهرس العبارات، ومطابقة المسميات والمؤهلات"""
+from guardian.arabic import PhraseIndex, normalize_arabic, phrase_words
+from guardian.occupations import education_rank, match_job_title
+from guardian.rules import analyze_form_demo
+
+
+def test_spelling_variants_normalize_alike():
+    assert normalize_arabic("الإنجليزيّة") == normalize_arabic("الانجليزية")
+    assert normalize_arabic(" أعزب ") == normalize_arabic("اعزب")
+    assert normalize_arabic("مكة  المكرمة") == "مكه المكرمه"
+    assert normalize_arabic("٣٠ Years") == "30 years"
+    assert phrase_words("المهندسة المدنية") == phrase_words("مهندس مدني")
+
+
+def test_phrase_index_longest_match():
+    index = PhraseIndex([("مهندس", "eng"), ("مهندس برمجيات", "software")])
+    assert index.match("مهندس برمجيات أول") == "software"
+    assert index.match("المهندسة المدنية") == "eng"
+    assert index.match("محاسب") is None
+
+
+def test_job_titles_and_education_are_indexed():
+    assert match_job_title("طبيبة أسنان") is not None
+    assert match_job_title("مهنة غير معروفة xyz") is None
+    assert education_rank("بكالوريوس") < education_rank("دكتوراة")
+    # المؤهل المكتوب بصيغة أخرى يحرك القاعدة نفسها
+    variant = analyze_form_demo({"Age": 19, "Education": "دكتوراة"})
+    assert "age_vs_phd" in [issue["rule"] for issue in variant["issues"]]
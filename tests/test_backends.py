@@ -0,0 +1,52 @@
+"""اختيار واجهة النموذج لكل نشر، وتوفر المصنف المحلي وإصداره"""
+import pytest
+
+from guardian import backends
+from guardian.ai import OPENAI_AVAILABLE
+from guardian.backends import ChatBackend, ClassifierBackend, create_backend
+
+
+def test_backend_selection():
+    openai, local = create_backend("openai"), create_backend("local")
+    assert isinstance(openai, ChatBackend) and (openai.name, openai.require_key) == ("openai", True)
+    assert (local.name, local.require_key) == ("local", False)
+    assert openai.available("") is False
+    assert local.available("") is OPENAI_AVAILABLE
+    assert isinstance(create_backend("classifier"), ClassifierBackend)
+    with pytest.raises(ValueError, match="unknown AI backend"):
+        create_backend("gpt")
+
+
+def test_classifier_needs_model_file_and_numpy(tmp_path, monkeypatch):
+    assert not ClassifierBackend(path=None).available("")
+    assert not ClassifierBackend(path=str(tmp_path / "missing.json")).available("")
+    with pytest.raises(RuntimeError):
+        ClassifierBackend(path=None).version
+
+    path = tmp_path / "model.json"
+    path.write_text("{}", "utf-8")
+    assert ClassifierBackend(path=str(path)).available("") is backends.NUMPY_AVAILABLE
+    monkeypatch.setattr(backends, "NUMPY_AVAILABLE", False)
+    assert not ClassifierBackend(path=str(path)).available("")
+
+
+def test_classifier_model_and_version_are_cached(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    from guardian import classifier
+    from guardian.classifier import IssueClassifier, training_pairs
+
+    path = str(tmp_path / "model.json")
+    IssueClassifier.train(training_pairs(synthetic=300, seed=1), epochs=20).save(path)
+    loads = []
+    real_load = classifier.load_classifier
+    monkeypatch.setattr(classifier, "load_classifier", lambda p: loads.append(p) or real_load(p))
+
+    backend = ClassifierBackend(path=path, threshold=0.5)
+    assert backend.available("")
+    version = backend.version
+    assert version.startswith("clf:") and version.endswith(":0.5")
+    assert backend.version == version and backend.analyze("", {"Age": 30})["status"] in ("clean", "warning", "error")
+    assert loads == [path]
+
+    backend.threshold = 0.7
+    assert backend.version.endswith(":0.7")
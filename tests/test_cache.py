@@ -0,0 +1,68 @@
+"""ذاكرة النتائج: المفتاح الموحد، وLRU مع TTL، وطبقة SQLite"""
+import pytest
+
+from guardian import cache as cache_module
+from guardian.cache import ResultCache, form_cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def test_key_ignores_order_blanks_and_number_format():
+    key = form_cache_key({"Age": 30, "Gender": "ذكر", "Notes": ""}, "v1")
+    assert form_cache_key({"Gender": " ذكر ", "Age": "30.0"}, "v1") == key
+    assert form_cache_key({"Age": 31, "Gender": "ذكر"}, "v1") != key
+    assert form_cache_key({"Age": 30, "Gender": "ذكر"}, "v2") != key
+
+
+def test_key_ignores_arabic_spelling_variants():
+    key = form_cache_key({"Marital Status": "أعزب", "Region": "مكة المكرمة"}, "v1")
+    assert form_cache_key({"Marital Status": "اعزب", "Region": "مكه  المكرمه"}, "v1") == key
+    assert form_cache_key({"Marital Status": "متزوج", "Region": "مكة المكرمة"}, "v1") != key
+
+
+def test_memory_hit_ttl_and_lru(clock):
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", {"status": "clean"})
+    assert cache.get("a") == {"status": "clean"}
+    assert cache.get("missing") is None
+
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    # b الأقدم استخداماً يُزال أولاً
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+    clock.now += 61
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_sqlite_tier_survives_restart_and_expires(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    ResultCache(ttl_seconds=60, db_path=path).set("k", {"status": "warning", "issues": [{"rule": "r"}]})
+
+    restarted = ResultCache(ttl_seconds=60, db_path=path)
+    assert restarted.get("k") == {"status": "warning", "issues": [{"rule": "r"}]}
+    assert restarted.get("k") is not None
+    stats = restarted.stats()
+    assert (stats["hits_disk"], stats["hits_memory"]) == (1, 1)
+
+    clock.now += 61
+    expired = ResultCache(ttl_seconds=60, db_path=path)
+    assert expired.get("k") is None
+    expired.purge_expired()
+    assert expired._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
@@ -0,0 +1,44 @@
+"""سجل الجلسة: المخزن الدائري والمجاميع التراكمية وتحديث الحكم المتأخر"""
+from guardian.history import SessionHistory
+
+
+def _result(score: int, status: str, *rules) -> dict:
+    return {"confidence_score": score, "status": status, "issues": [{"rule": rule} for rule in rules]}
+
+
+def test_ring_buffer_keeps_window_and_session_totals():
+    history = SessionHistory(capacity=3)
+    for i in range(5):
+        history.record(_result(98 if i % 2 else 65, "clean" if i % 2 else "warning", *([] if i % 2 else ["r1"])), "rules")
+    assert len(history) == 3
+    assert history.window()["score"] == [65, 98, 65]
+    assert history.window(2)["status"] == ["clean", "warning"]
+    # المجاميع تغطي الجلسة كاملة وليس المخزن فقط
+    assert (history.total_forms, history.errors_found, history.clean_forms) == (5, 3, 2)
+    assert history.rule_counts["r1"] == 3
+    assert sum(history.histogram().values()) == 5
+    assert history.histogram()["90-100"] == 2
+
+
+def test_update_replaces_verdict_and_aggregates():
+    history = SessionHistory(capacity=4)
+    first = history.record(_result(98, "clean"), "rules")
+    history.record(_result(65, "warning", "r1"), "rules")
+
+    assert history.update(first, _result(35, "error", "ai", "ai"), "ai (late)")
+    assert (history.total_forms, history.errors_found, history.clean_forms) == (2, 3, 0)
+    assert history.status_counts == [0, 1, 1]
+    assert dict(history.mode_counts) == {"rules": 1, "ai (late)": 1}
+    assert history.rule_counts["ai"] == 2
+    assert history.window()["mode"] == ["ai (late)", "rules"]
+    assert history.histogram()["90-100"] == 0
+
+
+def test_update_of_evicted_verdict_is_ignored():
+    history = SessionHistory(capacity=2)
+    old = history.record(_result(98, "clean"), "rules")
+    history.record(_result(98, "clean"), "rules")
+    history.record(_result(98, "clean"), "rules")
+    assert not history.update(old, _result(15, "error", "a", "b", "c"), "ai (late)")
+    assert not history.update(history.total_forms, _result(15, "error"), "ai (late)")
+    assert history.errors_found == 0 and history.clean_forms == 3
@@ -0,0 +1,45 @@
+"""فحوص ما بين السجلات، ودفعات لا تقسم الأسرة الواحدة"""
+from guardian.household import HouseholdChunker, check_households, evaluate_records
+
+
+def test_household_checks():
+    records = [
+        {"Record ID": "1", "Household ID": "A", "Relationship": "رب الاسرة", "Age": 40, "Family Members": 3},
+        {"Record ID": "2", "Household ID": "A", "Relationship": "ابن/ابنة", "Age": 35, "Family Members": 3},
+        {"Record ID": "3", "Household ID": "B", "Relationship": "ابن/ابنة", "Age": 10},
+        {"Record ID": "4", "Household ID": "B", "Relationship": "ابن/ابنة", "Age": 10},
+    ]
+    rules = [{issue["rule"] for issue in issues} for issues in check_households(records)]
+    assert rules[0] == {"household_size_mismatch"}
+    assert rules[1] == {"household_size_mismatch", "child_older_than_parent"}
+    assert rules[2] == {"household_head_count"}
+    # نفس البيانات برقم استمارة مختلف
+    assert rules[3] == {"household_head_count", "duplicate_respondent"}
+
+    # قواعد الاستمارة الواحدة تبقى ومعها مشكلات ما بين السجلات، والدرجة تُعاد حسابها
+    for result, cross in zip(evaluate_records(records), rules):
+        assert cross <= {issue["rule"] for issue in result["issues"]}
+        assert result["status"] != "clean"
+
+
+def test_consistent_household_has_no_cross_issues():
+    records = [
+        {"Record ID": "1", "Household ID": "A", "Relationship": "رب الاسرة", "Age": 40, "Family Members": 2},
+        {"Record ID": "2", "Household ID": "A", "Relationship": "ابن/ابنة", "Age": 12, "Family Members": 2},
+        {"Record ID": "3", "Age": 30},
+    ]
+    assert check_households(records) == [[], [], []]
+
+
+def test_chunks_do_not_split_households():
+    ids = ["A", "A", "A", "B", "B", "", "", "C", "C", "C", "C"]
+    records = [{"Record ID": str(i), "Household ID": household} for i, household in enumerate(ids)]
+
+    chunks = list(HouseholdChunker(records).chunks(2))
+    assert [[form["Household ID"] for form in chunk] for chunk in chunks] == [
+        ["A", "A", "A"], ["B", "B"], ["", ""], ["C", "C", "C", "C"],
+    ]
+    assert [form for chunk in chunks for form in chunk] == records
+
+    fixed = list(HouseholdChunker(records, enabled=False).chunks(4))
+    assert [len(chunk) for chunk in fixed] == [4, 4, 3]
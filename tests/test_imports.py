@@ -0,0 +1,26 @@
+"""استيراد guardian خفيف: المكتبات الثقيلة لا تُحمّل إلا عند أول استخدام"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "numpy", "openai", "pyarrow", "guardian.batch", "guardian.outliers", "guardian.classifier")
+
+
+def _loaded_after(statement: str) -> dict:
+    code = f"import json, sys; {statement}; print(json.dumps({{m: m in sys.modules for m in {HEAVY!r}}}))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize("statement", [
+    "import guardian",
+    "import guardian.stream",
+    "from guardian import analyze_form_demo, get_backend, triage_form; analyze_form_demo({'Age': 19}); get_backend()",
+])
+def test_import_does_not_load_heavy_modules(statement):
+    assert _loaded_after(statement) == dict.fromkeys(HEAVY, False)
+
@@ -0,0 +1,56 @@
+"""الفحص التزايدي: إعادة القواعد المتأثرة بالحقول المتغيرة فقط، وبنفس حكم الفحص الكامل"""
+from guardian.incremental import IncrementalValidator
+from guardian.rules import RULES, RuleSet, evaluate_rules
+from guardian.synthetic import generate_forms
+
+
+def _rules(issues) -> list:
+    return [issue["rule"] for issue in issues]
+
+
+def test_only_dependent_rules_are_rechecked():
+    ruleset = RuleSet(RULES)
+    validator = IncrementalValidator(ruleset)
+    form = {"Age": 40, "Education": "دكتوراه", "Years Experience": 10}
+    assert sorted(validator.update(form)) == sorted(form)
+    assert validator.evaluated == len(ruleset.rules)
+
+    form = dict(form, Age=19)
+    assert validator.update(form) == ["Age"]
+    assert validator.evaluated == len(ruleset.affected(["Age"])) < len(ruleset.rules)
+    assert "age_vs_phd" in _rules(validator.field_issues("Age"))
+    assert "age_vs_phd" in _rules(validator.field_issues("Education"))
+    assert _rules(validator.field_issues("Marital Status")) == []
+
+    assert validator.update(dict(form)) == [] and validator.evaluated == 0
+    # حذف حقل تغيير أيضاً
+    del form["Education"]
+    assert validator.update(form) == ["Education"]
+    assert "age_vs_phd" not in _rules(validator.issues)
+
+
+def test_incremental_matches_full_evaluation():
+    validator = IncrementalValidator()
+    previous = {}
+    for form in generate_forms(300, seed=7, contradiction_rate=0.5):
+        # كل استمارة تعديل جزئي على السابقة كما في الإدخال الحي
+        current = dict(previous, **{k: v for i, (k, v) in enumerate(form.items()) if i % 3 == len(previous) % 3})
+        validator.update(current)
+        expected = evaluate_rules(current)
+        assert validator.issues == expected["issues"]
+        assert validator.result()["status"] == expected["status"]
+        previous = current
+
+
+def test_new_rule_forces_full_recheck():
+    ruleset = RuleSet(RULES)
+    validator = IncrementalValidator(ruleset)
+    validator.update({"Age": 40})
+    ruleset.add({
+        "id": "age_over_100", "fields": ("Age",), "predicate": lambda v: v["age"] > 100, "severity": "low",
+        "field_1": "العمر", "field_2": "", "description": "عمر {age}", "suggestion": "",
+    })
+    validator.update({"Age": 40})
+    assert validator.evaluated == len(ruleset.rules)
+    validator.update({"Age": 120})
+    assert "age_over_100" in _rules(validator.issues)
@@ -0,0 +1,51 @@
+"""مخزن المقاييس المشترك: التجميعات الزمنية وسحب الحكم المتأخر (weight=-1)"""
+import time
+
+from guardian.metrics import UNKNOWN_REGION, MetricsStore
+
+
+def _result(score: int, status: str, *rules) -> dict:
+    return {"confidence_score": score, "status": status, "issues": [{"rule": rule} for rule in rules]}
+
+
+def _store(tmp_path=None) -> MetricsStore:
+    # الخيط الخلفي لا يتدخل؛ القراءة تُفرغ الطابور بنفسها
+    return MetricsStore(str(tmp_path / "metrics.db") if tmp_path else None, flush_seconds=3600)
+
+
+def test_rollups_by_time_region_mode_and_rule():
+    store = _store()
+    hour = int(time.time() // 3600) * 3600
+    store.record(_result(98, "clean"), "rules", "الرياض", hour + 10)
+    store.record(_result(65, "warning", "r1"), "rules", "الرياض", hour + 70)
+    store.record(_result(35, "error", "r1", "r2"), "ai", None, hour + 75)
+
+    totals = store.totals()
+    assert (totals["forms"], totals["clean"], totals["warning"], totals["error"], totals["issues"]) == (3, 1, 1, 1, 3)
+    assert totals["avg_score"] == (98 + 65 + 35) / 3
+    assert [(row["bucket"], row["forms"]) for row in store.series("minute")] == [(hour, 1), (hour + 60, 2)]
+    assert store.by_region()["الرياض"]["forms"] == 2 and store.by_region()[UNKNOWN_REGION]["error"] == 1
+    assert store.by_mode() == {"rules": 2, "ai": 1}
+    assert store.by_rule() == {"r1": 2, "r2": 1}
+    assert store.totals(region="الرياض")["issues"] == 1
+
+
+def test_late_verdict_supersedes_with_negative_weight():
+    store = _store()
+    ts = time.time()
+    initial = _result(65, "warning", "r1")
+    store.record(initial, "rules", "الشرقية", ts)
+    store.record(initial, "rules", "الشرقية", ts, weight=-1)
+    store.record(_result(35, "error", "ai", "ai"), "ai (late)", "الشرقية", ts)
+
+    totals = store.totals()
+    assert (totals["forms"], totals["warning"], totals["error"], totals["issues"]) == (1, 0, 1, 2)
+    assert store.by_mode() == {"ai (late)": 1}
+    assert store.by_rule() == {"ai": 2}
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    writer = _store(tmp_path)
+    writer.record(_result(98, "clean"), "rules", "الرياض")
+    assert writer.flush() == 1
+    assert _store(tmp_path).totals()["forms"] == 1
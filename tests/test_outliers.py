@@ -0,0 +1,82 @@
+"""القيم الشاذة: الشرائح من الأدق إلى الأعم، ودرجة z، والحفظ والتحميل، والمرجع الافتراضي"""
+import pytest
+
+from guardian import outliers, rules
+from guardian.outliers import ReferenceDistributions, age_band, load_reference, segment_keys
+from guardian.stream import validate_chunk
+from guardian.synthetic import generate_forms
+
+
+@pytest.fixture(scope="module")
+def reference():
+    built = ReferenceDistributions(min_count=30)
+    assert built.update(generate_forms(3000, seed=11, contradiction_rate=0)) == 3000
+    return built
+
+
+def _form(**fields) -> dict:
+    form = {"Education": "بكالوريوس", "Sector": "حكومي", "Region": "الرياض", "Age": 30}
+    form.update(fields)
+    return form
+
+
+def test_segments_from_specific_to_general():
+    assert (age_band(24), age_band("40"), age_band(70), age_band("?")) == ("<25", "35-44", "65+", "")
+    assert segment_keys(_form()) == [
+        "0|بكالوريوس|حكومي|الرياض|25-34", "1|بكالوريوس|حكومي|25-34", "2|بكالوريوس|25-34", "3|بكالوريوس", "4|",
+    ]
+    # صيغ الكتابة المتكافئة في شريحة واحدة
+    assert segment_keys(_form(Region="مكة المكرمة")) == segment_keys(_form(Region=" مكه المكرمه"))
+
+
+def test_scores_and_issues(reference):
+    typical = reference.scores(_form(**{"Monthly Salary": 14000}))["salary"]
+    assert abs(typical[1]) < 2
+
+    # شريحة غير معروفة ترجع إلى أعم مستوى
+    _, _, level, _ = reference.scores(_form(Education="غير معروف", **{"Monthly Salary": 14000}))["salary"]
+    assert level == len(outliers.LEVELS) - 1
+
+    issues = reference.check(_form(**{"Monthly Salary": 450000, "Years Experience": 2}))
+    assert [issue["rule"] for issue in issues] == ["salary_outlier"]
+    assert issues[0]["severity"] == "medium" and "أعلى" in issues[0]["description"]
+    assert reference.check(_form()) == [] and ReferenceDistributions().check(_form(**{"Monthly Salary": 1})) == []
+
+
+def test_save_and_load_keep_the_table(reference, tmp_path):
+    path = str(tmp_path / "reference.gor")
+    reference.save(path)
+    loaded = ReferenceDistributions.load(path)
+    assert (loaded.version, loaded.table, loaded.forms) == (reference.version, reference.table, reference.forms)
+    assert load_reference(path) is load_reference(path)
+
+
+def test_format_1_files_are_migrated_to_normalized_segments(tmp_path, monkeypatch):
+    built = ReferenceDistributions(min_count=1)
+    built.update([_form(Region="مكة المكرمة", **{"Monthly Salary": 9000})])
+    # ملف الإصدار 1 خزّن قيمتين بصيغتين مختلفتين لنفس الشريحة
+    key = "salary|0|بكالوريوس|حكومي|مكة المكرمة|25-34"
+    built.histograms[key.replace("مكة المكرمة", "مكه المكرمه")] = built.histograms.pop(
+        "salary|0|بكالوريوس|حكومي|مكه المكرمه|25-34"
+    )
+    built.histograms[key] = built.histograms[key.replace("مكة المكرمة", "مكه المكرمه")][:]
+    path = str(tmp_path / "v1.gor")
+    monkeypatch.setattr(outliers, "FORMAT_VERSION", 1)
+    built.save(path)
+    monkeypatch.undo()
+
+    loaded = ReferenceDistributions.load(path)
+    assert loaded.table["salary|0|بكالوريوس|حكومي|مكه المكرمه|25-34"][0] == 2
+    assert key not in loaded.table
+
+
+def test_stream_chunks_use_the_configured_reference(reference, tmp_path, monkeypatch):
+    path = str(tmp_path / "configured.gor")
+    reference.save(path)
+    chunk = [_form(**{"Monthly Salary": 450000})]
+    assert validate_chunk(chunk)[0]["issues"] == []
+
+    monkeypatch.setattr(rules, "OUTLIER_REFERENCE_PATH", path)
+    monkeypatch.setattr(outliers, "OUTLIER_REFERENCE_PATH", path)
+    assert [issue["rule"] for issue in validate_chunk(chunk)[0]["issues"]] == ["salary_outlier"]
+    assert rules.demo_version().endswith(f"+outliers-{reference.version}")
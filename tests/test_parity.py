@@ -0,0 +1,85 @@
+"""تطابق المحركات: الدفعات مقابل الاستمارة الواحدة، والتنفيذ المتوازي مقابل المتسلسل
+
+    python -m pytest tests
+"""
+import io
+
+import pytest
+
+from guardian.rules import analyze_form_demo
+from guardian.stream import ResultWriter, validate_stream
+from guardian.synthetic import generate_forms
+
+
+def _forms(n: int, seed: int = 0) -> list:
+    forms = list(generate_forms(n, seed=seed, contradiction_rate=0.4, max_per_form=2))
+    for i, form_data in enumerate(forms):
+        form_data["Record ID"] = f"R{i}"
+    return forms
+
+
+def _household_forms(n: int) -> list:
+    """أسر من 4 سجلات متتالية مع مستجيبين مكررين تفصلهم حدود الدفعات المتكيفة"""
+    forms = _forms(n, seed=3)
+    for i, form_data in enumerate(forms):
+        form_data["Household ID"] = f"H{i // 4}"
+        form_data["Relationship"] = "رب الاسرة" if i % 4 == 0 else "ابن/ابنة"
+    for i in range(2500, n, 700):
+        forms[i] = dict(forms[i - 2100], **{"Record ID": f"R{i}"})
+    return forms
+
+
+def _run_stream(forms, workers: int, households: bool = False, chunk_size=None):
+    output = io.StringIO()
+    summary = validate_stream(
+        iter(forms), ResultWriter(output, "ndjson"), chunk_size, workers=workers, households=households
+    )
+    return output.getvalue(), {key: summary[key] for key in ("rows", "issues", "clean", "warning", "error")}
+
+# ---------------------------
+# Batch vs single form
+# ---------------------------
+@pytest.mark.parametrize("with_reference", [False, True])
+def test_batch_matches_single_form(tmp_path, monkeypatch, with_reference):
+    pd = pytest.importorskip("pandas")
+    from guardian import outliers, rules
+    from guardian.batch import analyze_forms_batch
+
+    forms = _forms(500)
+    if with_reference:
+        # المرجع المحدد في GUARDIAN_OUTLIER_REFERENCE يُطبق في المحركين دون تمريره
+        path = str(tmp_path / "reference.gor")
+        reference = outliers.ReferenceDistributions(min_count=20)
+        reference.update(_forms(2000, seed=9))
+        reference.save(path)
+        monkeypatch.setattr(rules, "OUTLIER_REFERENCE_PATH", path)
+        monkeypatch.setattr(outliers, "OUTLIER_REFERENCE_PATH", path)
+        forms += [dict(forms[0], **{"Monthly Salary": 400000}), dict(forms[1], **{"Years Experience": 55, "Age": 30})]
+    # قيم ناقصة وغير رقمية يعاملها المحركان بالقيمة الافتراضية نفسها
+    forms += [{"Age": None, "Children": "2.7"}, {"Age": "abc", "Education": "دكتوراه"}, {}]
+    batch = analyze_forms_batch(pd.DataFrame(forms))
+    for form_data, (_, row) in zip(forms, batch.iterrows()):
+        expected = analyze_form_demo(form_data)
+        assert row["issues"] == expected["issues"]
+        assert (row["confidence_score"], row["status"], row["summary"]) == (
+            expected["confidence_score"], expected["status"], expected["summary"]
+        )
+    outlier_rules = {issue["rule"] for row in batch["issues"] for issue in row if issue["rule"].endswith("_outlier")}
+    assert bool(outlier_rules) == with_reference
+
+# ---------------------------
+# Parallel vs serial stream
+# ---------------------------
+def test_parallel_stream_matches_serial():
+    forms = _forms(6000)
+    assert _run_stream(forms, workers=3) == _run_stream(forms, workers=1)
+
+
+def test_parallel_stream_matches_serial_with_households():
+    forms = _household_forms(9000)
+    serial = _run_stream(forms, workers=1, households=True)
+    assert "duplicate_respondent" in serial[0]
+    assert _run_stream(forms, workers=3, households=True) == serial
+    assert _run_stream(forms, workers=4, households=True, chunk_size=1500) == _run_stream(
+        forms, workers=1, households=True, chunk_size=1500
+    )
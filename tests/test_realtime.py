@@ -0,0 +1,76 @@
+"""الوضع اللحظي: حكم القواعد فوراً وحكم AI إذا وصل خلال الميزانية، وإلا لاحقاً"""
+import asyncio
+
+import pytest
+
+from guardian import pipeline
+from guardian.ai import AIEventLoop
+from guardian.cache import ResultCache, form_cache_key
+from guardian.triage import TRIAGE_POLICY
+
+AI_VERDICT = {"confidence_score": 40, "status": "error", "issues": [], "summary": "ai"}
+FORM = {"Region": "تبوك", "Age": 35}
+
+
+class FakeBackend:
+    name = "fake"
+    version = "fake-v1"
+    teaches = False
+
+    def __init__(self, delay: float = 0.0, error=None):
+        self.delay, self.error = delay, error
+        self.calls = 0
+
+    def available(self, api_key):
+        return True
+
+    async def analyze_async(self, api_key, form_data, max_wait=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return dict(AI_VERDICT)
+
+
+@pytest.fixture(scope="module")
+def ai_loop():
+    return AIEventLoop()
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    def install(**kwargs):
+        fake = FakeBackend(**kwargs)
+        monkeypatch.setattr(pipeline, "get_backend", lambda: fake)
+        return fake
+    return install
+
+
+def test_ai_verdict_within_budget(backend, ai_loop):
+    backend(delay=0.01)
+    verdict = pipeline.analyze_form_realtime("key", FORM, budget_ms=2000, ai_loop=ai_loop)
+    assert (verdict.result, verdict.mode, verdict.pending) == (AI_VERDICT, "ai", None)
+
+
+def test_late_verdict_arrives_after_budget_and_is_cached(backend, ai_loop):
+    fake = backend(delay=0.3)
+    cache = ResultCache()
+    verdict = pipeline.analyze_form_realtime("key", FORM, budget_ms=20, cache=cache, ai_loop=ai_loop)
+    assert verdict.mode == "rules" and verdict.result["status"] == "clean"
+    assert verdict.pending.result(timeout=5) == AI_VERDICT
+
+    # الحكم المتأخر في الذاكرة فيعود الطلب التالي به فوراً دون طلب جديد
+    key = form_cache_key(FORM, fake.version)
+    assert cache.get(key) == AI_VERDICT
+    again = pipeline.analyze_form_realtime("key", FORM, budget_ms=20, cache=cache, ai_loop=ai_loop)
+    assert (again.mode, again.pending, fake.calls) == ("ai", None, 1)
+
+
+def test_failure_and_triage_fall_back_to_rules(backend, ai_loop):
+    backend(error=ValueError("bad response"))
+    verdict = pipeline.analyze_form_realtime("key", FORM, budget_ms=2000, ai_loop=ai_loop)
+    assert (verdict.mode, verdict.pending) == ("demo", None)
+
+    fake = backend()
+    decided = pipeline.analyze_form_realtime("key", {"Age": 35}, policy=TRIAGE_POLICY, ai_loop=ai_loop)
+    assert (decided.mode, decided.pending, fake.calls) == ("rules", None, 0)
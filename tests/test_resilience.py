@@ -0,0 +1,83 @@
+"""قاطع الدائرة ومحدد المعدل، وحماية create_completion من الإلغاء"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from guardian import ai
+from guardian.resilience import CircuitBreaker, CircuitOpenError, RateLimiter, RateLimitWaitError
+
+
+def test_circuit_breaker_transitions():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=0)
+    breaker.before()
+    assert breaker.failure(ValueError("bad json")) == "other"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.failure(TimeoutError())
+    breaker.failure(RuntimeError("Error code: 429"))
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 1
+
+    # بعد التهدئة طلب تجريبي واحد فقط
+    breaker.before()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    # فشل الطلب التجريبي يعيد فتح القاطع
+    breaker.failure(TimeoutError())
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 2
+
+    breaker.before()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_half_open_probe_with_unrelated_failure_closes():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0)
+    breaker.failure(TimeoutError())
+    breaker.before()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.failure(ValueError("bad json")) == "other"
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    breaker.before()
+    breaker.before()
+
+
+def _client(create):
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(with_raw_response=SimpleNamespace(create=create))))
+
+
+def test_cancelled_probe_is_released_not_counted(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0)
+    monkeypatch.setattr(ai, "get_circuit_breaker", lambda: breaker)
+    monkeypatch.setattr(ai, "get_rate_limiter", lambda: RateLimiter(1000, 1_000_000))
+    breaker.failure(TimeoutError())
+
+    async def hang(**request):
+        await asyncio.sleep(10)
+
+    async def main():
+        task = asyncio.ensure_future(ai.create_completion_async(_client(hang), messages=[]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.failures == 1 and breaker.last_failure == "timeout"
+    # الإلغاء لم يستهلك الطلب التجريبي
+    breaker.before()
+
+
+def test_rate_limiter_refuses_long_waits_and_reads_headers():
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1000)
+    limiter.acquire(100, max_wait=0)
+    limiter.acquire(100, max_wait=0)
+    with pytest.raises(RateLimitWaitError):
+        limiter.acquire(100, max_wait=0)
+    assert (limiter.granted, limiter.refused) == (2, 1)
+
+    limiter.settle(200, 50)
+    limiter.observe({"x-ratelimit-limit-requests": "60", "x-ratelimit-remaining-tokens": "10"})
+    stats = limiter.stats()
+    assert stats["rpm_limit"] == 60 and stats["tokens_available"] == 10 and stats["limits_source"] == "headers"
@@ -0,0 +1,118 @@
+"""مخزن النتائج Parquet: الأقسام، وسحب الأحكام المتأخرة، والدمج، وإصدار القواعد، وإعادة الكتابة"""
+import logging
+import os
+from types import SimpleNamespace
+from urllib.parse import quote
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from guardian import results  # noqa: E402
+from guardian.results import ResultSink, compact_results, rule_rates, scan_results, summarize_results  # noqa: E402
+
+DAY_1 = 1791331200.0  # 2026-10-07 00:00 UTC
+DAY_2 = DAY_1 + 86400
+
+
+def _result(score: int, status: str, *rules) -> dict:
+    return {"confidence_score": score, "status": status, "issues": [{"rule": rule, "severity": "high"} for rule in rules]}
+
+
+def _sink(root) -> ResultSink:
+    # الخيط الخلفي لا يكتب أثناء الاختبار؛ flush صريحة
+    return ResultSink(str(root), flush_seconds=3600)
+
+
+def _column(root, name: str) -> list:
+    return [value for batch in scan_results(str(root), [name]) for value in batch.column(name).to_pylist()]
+
+
+def test_partitions_and_queries(tmp_path):
+    sink = _sink(tmp_path)
+    sink.record({"Record ID": "1", "Region": "الرياض"}, _result(98, "clean"), "rules", 0.002, DAY_1 + 60)
+    sink.record({"Record ID": "2", "Region": "الرياض"}, _result(35, "error", "r1", "r2"), "ai", 1.5, DAY_1 + 120)
+    sink.record({"Record ID": "3"}, _result(65, "warning", "r1"), "rules", None, DAY_2 + 60)
+    assert sink.flush() == 3 and sink.flush() == 0
+
+    assert os.path.isdir(tmp_path / "date=2026-10-07" / f"region={quote('الرياض', safe='')}")
+    assert os.path.isdir(tmp_path / "date=2026-10-08" / f"region={quote(results.UNKNOWN_REGION, safe='')}")
+
+    by_region = {row["region"]: row for row in summarize_results(str(tmp_path))}
+    assert (by_region["الرياض"]["forms"], by_region["الرياض"]["error"], by_region["الرياض"]["issues"]) == (2, 1, 2)
+    assert by_region["الرياض"]["avg_latency_ms"] == pytest.approx(751)
+    assert [row["forms"] for row in summarize_results(str(tmp_path), by=("date",), since="2026-10-08")] == [1]
+
+    rates = {(row["region"], row["rule"]): row["rate"] for row in rule_rates(str(tmp_path))}
+    assert rates[("الرياض", "r1")] == 0.5 and rates[(results.UNKNOWN_REGION, "r1")] == 1.0
+
+
+def test_supersede_replaces_the_initial_verdict(tmp_path):
+    sink = _sink(tmp_path)
+    form = {"Record ID": "7", "Region": "الشرقية"}
+    initial = _result(98, "clean")
+    sink.record(form, initial, "rules", 0.001, DAY_1)
+    sink.supersede(form, initial, "rules", _result(35, "error", "ai", "ai"), "ai (late)", DAY_1)
+    sink.flush()
+
+    [total] = summarize_results(str(tmp_path), by=())
+    assert (total["forms"], total["clean"], total["error"], total["issues"]) == (1, 0, 1, 2)
+    by_mode = {row["mode"]: row["forms"] for row in summarize_results(str(tmp_path), by=("mode",))}
+    assert by_mode == {"rules": 0, "ai (late)": 1}
+    assert [row["hits"] for row in rule_rates(str(tmp_path))] == [2]
+
+
+def test_ruleset_is_captured_when_recorded(tmp_path, monkeypatch):
+    sink = _sink(tmp_path)
+    monkeypatch.setattr(results, "RULESET", SimpleNamespace(version="rules-a"))
+    sink.record({"Region": "الرياض"}, _result(98, "clean"), "rules", ts=DAY_1)
+    # قاعدة أُضيفت بعد الحكم وقبل الكتابة
+    monkeypatch.setattr(results, "RULESET", SimpleNamespace(version="rules-b"))
+    sink.record({"Region": "الرياض"}, _result(98, "clean"), "rules", ts=DAY_1)
+    sink.flush()
+    assert sorted(_column(tmp_path, "ruleset")) == ["rules-a", "rules-b"]
+
+
+def test_failed_writes_are_retried_then_dropped_with_a_log(tmp_path, monkeypatch, caplog):
+    sink = _sink(tmp_path)
+    real_write = results._write_atomic
+    failures = []
+
+    def flaky(pq, table, directory, name):
+        if len(failures) < results.WRITE_ATTEMPTS:
+            failures.append(directory)
+            raise OSError("disk full")
+        return real_write(pq, table, directory, name)
+
+    monkeypatch.setattr(results, "_write_atomic", flaky)
+    sink.record({"Region": "الرياض"}, _result(98, "clean"), "rules", ts=DAY_1)
+    assert sink.flush() == 0 and len(sink._pending) == 1
+    sink.record({"Region": "الرياض"}, _result(65, "warning", "r1"), "rules", ts=DAY_1)
+    for _ in range(results.WRITE_ATTEMPTS - 1):
+        with caplog.at_level(logging.ERROR, logger="guardian.results"):
+            assert sink.flush() == 0
+    # الصف الأول استنفد محاولاته؛ الثاني ما زال في الطابور
+    assert "dropped 1 result rows" in caplog.text
+    assert len(sink._pending) == 1
+    assert sink.flush() == 1
+    assert _column(tmp_path, "status") == ["warning"]
+
+
+def test_compaction_merges_legacy_files_without_weight(tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _sink(tmp_path)
+    for i in range(3):
+        sink.record({"Region": "الرياض"}, _result(35, "error", "r1", "r2"), "rules", ts=DAY_1 + i)
+        sink.flush()
+    directory = tmp_path / "date=2026-10-07" / f"region={quote('الرياض', safe='')}"
+    # ملف من إصدار سابق بلا عمود weight
+    legacy = pa.table({"ts": pa.array([int(DAY_1 * 1000)], pa.timestamp("ms", tz="UTC")), "status": ["clean"]})
+    pq.write_table(legacy, str(directory / "part-0-legacy.parquet"))
+
+    stats = compact_results(str(tmp_path), before="2026-10-08")
+    assert (stats["partitions"], stats["files_in"], stats["rows"]) == (1, 4, 4)
+    assert [name for name in os.listdir(directory) if name.endswith(".parquet")][0].startswith("compact-")
+    [total] = summarize_results(str(tmp_path), by=())
+    assert (total["forms"], total["clean"], total["error"]) == (4, 1, 3)
@@ -0,0 +1,33 @@
+"""سجل القواعد المترجم"""
+from guardian.rules import RULES, RuleSet, evaluate_rules, to_number
+
+
+def test_issue_carries_rule_id():
+    result = evaluate_rules({"Age": 19, "Education": "دكتوراه"})
+    assert "age_vs_phd" in [issue["rule"] for issue in result["issues"]]
+    assert result["status"] != "clean"
+
+
+def test_numeric_values_are_coerced():
+    assert to_number("30.7", 30) == 30
+    assert to_number(None, 30) == 30
+    assert to_number("abc", 0) == 0
+    assert to_number(float("nan"), 5) == 5
+    assert evaluate_rules({"Age": None, "Education": "دكتوراه"})["issues"] == []
+
+
+def test_added_rule_changes_version():
+    ruleset = RuleSet(RULES)
+    version = ruleset.version
+    ruleset.add({
+        "id": "test_rule",
+        "fields": ("Children",),
+        "predicate": lambda v: v["children"] > 10,
+        "field_1": "عدد الأطفال",
+        "field_2": "",
+        "description": "{children} أطفال",
+        "suggestion": "",
+    })
+    assert ruleset.version != version
+    assert [issue["rule"] for issue in ruleset.evaluate({"Children": 12})] == ["test_rule"]
+    assert ruleset.affected(["Children"])[-1] == len(ruleset.rules) - 1
@@ -0,0 +1,77 @@
+"""مخطط النتيجة، وإصلاح JSON المقطوع، واستخراج المشكلات أثناء التدفق"""
+import json
+
+import pytest
+
+from guardian import schema
+from guardian.schema import IssueStreamParser, SchemaError, loads_lenient, validate_result
+
+ISSUES = [
+    {"severity": "high", "field_1": "العمر", "field_2": "المؤهل", "description": "عمر \"صغير\" {جداً}", "suggestion": ""},
+    {"severity": "medium", "field_1": "الراتب", "field_2": "", "description": "[مرتفع]", "suggestion": "راجع"},
+]
+
+
+def test_missing_or_invalid_score_and_status_are_derived():
+    derived = validate_result({"issues": ISSUES})
+    assert (derived["confidence_score"], derived["status"]) == (35, "error")
+
+    bad = validate_result({"issues": ISSUES, "status": "ok", "confidence_score": "high", "summary": "x"})
+    assert (bad["confidence_score"], bad["status"], bad["summary"]) == (35, "error", "x")
+
+    kept = validate_result({"issues": [], "status": "Error", "confidence_score": "150%"})
+    assert (kept["confidence_score"], kept["status"]) == (100, "error")
+
+    with pytest.raises(SchemaError):
+        validate_result({"issues": "none"})
+
+
+def test_truncated_json_is_repaired():
+    text = json.dumps({"issues": ISSUES, "summary": "x"}, ensure_ascii=False)
+    assert loads_lenient("```json\n" + text + "\n```") == {"issues": ISSUES, "summary": "x"}
+    assert loads_lenient(text[: text.index("الراتب") + 3])["issues"][0] == ISSUES[0]
+
+
+def test_repair_attempts_are_capped(monkeypatch):
+    attempts = []
+    real_loads = json.loads
+    monkeypatch.setattr(schema.json, "loads", lambda text: attempts.append(text) or real_loads(text))
+    with pytest.raises(SchemaError):
+        schema.repair_json("[" + "x," * 500)
+    # محاولتان (مع إزالة الفاصلة الزائدة وبدونها) لكل مرشح
+    assert len(attempts) <= 2 * (schema.MAX_REPAIR_ATTEMPTS + 1)
+
+
+def test_stream_parser_emits_issues_from_partial_chunks():
+    text = json.dumps({"issues": ISSUES, "summary": "x"}, ensure_ascii=False)
+    parser = IssueStreamParser()
+    emitted = []
+    for i in range(0, len(text), 7):
+        emitted.extend(parser.feed(text[i:i + 7]))
+    assert [issue["field_1"] for issue in emitted] == ["العمر", "الراتب"]
+    assert parser.text == text
+    assert parser.result()["issues"] == emitted
+
+
+def test_stream_parser_keeps_only_the_open_fragment():
+    issues = [dict(ISSUES[1], field_1=f"f{i}") for i in range(200)]
+    text = json.dumps({"issues": issues}, ensure_ascii=False)
+    parser = IssueStreamParser()
+    emitted = []
+    for i in range(0, len(text), 5):
+        emitted.extend(parser.feed(text[i:i + 5]))
+        assert len(parser._tail) < 200
+    assert [issue["field_1"] for issue in emitted] == [f"f{i}" for i in range(200)]
+
+
+def test_stream_parser_truncated_and_invalid():
+    text = json.dumps({"issues": ISSUES}, ensure_ascii=False)
+    parser = IssueStreamParser()
+    parser.feed(text[: text.index("الراتب")])
+    assert [issue["field_1"] for issue in parser.issues] == ["العمر"]
+    assert len(parser.result()["issues"]) >= 1
+
+    parser = IssueStreamParser()
+    assert parser.feed("not json {{") == []
+    with pytest.raises(SchemaError):
+        parser.result()
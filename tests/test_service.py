@@ -0,0 +1,102 @@
+"""خدمة HTTP: /v1/validate و/v1/validate/bulk و/metrics عبر اتصال حقيقي"""
+import asyncio
+import json
+
+from guardian.cache import ResultCache
+from guardian.service import ValidationService
+
+
+async def _request(port: int, method: str, path: str, body: bytes = b"") -> tuple:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    if headers.get("Transfer-Encoding") == "chunked":
+        chunks = []
+        while True:
+            size_line, _, payload = payload.partition(b"\r\n")
+            size = int(size_line, 16)
+            if not size:
+                break
+            chunks.append(payload[:size])
+            payload = payload[size + 2:]
+        payload = b"".join(chunks)
+    return int(lines[0].split()[1]), headers, payload
+
+
+def _run(scenario, service=None):
+    service = service or ValidationService(api_key="", mode="rules", cache=ResultCache())
+
+    async def main():
+        server = await service.serve("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(port)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(main())
+
+
+def _form(**fields) -> bytes:
+    return json.dumps(fields, ensure_ascii=False).encode("utf-8")
+
+
+def test_validate_returns_rule_verdict():
+    status, _, body = _run(lambda port: _request(port, "POST", "/v1/validate", _form(Age=19, Education="دكتوراه")))
+    payload = json.loads(body)
+    assert status == 200 and payload["mode"] == "rules"
+    assert "age_vs_phd" in [issue["rule"] for issue in payload["result"]["issues"]]
+
+
+def test_bad_input_is_400_and_null_values_are_accepted():
+    async def scenario(port):
+        return [
+            await _request(port, "POST", "/v1/validate", b"not json"),
+            await _request(port, "POST", "/v1/validate", b"[1, 2]"),
+            await _request(port, "POST", "/v1/validate?mode=fast", _form(Age=30)),
+            await _request(port, "GET", "/v1/validate"),
+            await _request(port, "POST", "/v1/validate", _form(Age=None, Children="abc")),
+        ]
+
+    statuses = [status for status, _, _ in _run(scenario)]
+    assert statuses == [400, 400, 400, 405, 200]
+
+
+def test_internal_error_is_500_with_json_body():
+    service = ValidationService(api_key="", mode="rules", cache=ResultCache())
+
+    async def broken(form_data, mode, budget_ms):
+        raise RuntimeError("engine exploded")
+
+    service._validate = broken
+    status, _, body = _run(lambda port: _request(port, "POST", "/v1/validate", _form(Age=30)), service)
+    assert status == 500 and "engine exploded" in json.loads(body)["error"]
+
+
+def test_bulk_returns_one_line_per_form():
+    lines = b"\n".join([_form(Age=19, Education="دكتوراه"), b"{broken", _form(Age=40)])
+    status, _, body = _run(lambda port: _request(port, "POST", "/v1/validate/bulk?mode=rules", lines))
+    rows = {row["index"]: row for row in map(json.loads, body.splitlines())}
+    assert status == 200 and sorted(rows) == [0, 1, 2]
+    assert rows[0]["result"]["status"] != "clean" and "error" in rows[1] and rows[2]["result"]["status"] == "clean"
+
+
+def test_metrics_endpoint_renders_prometheus():
+    async def scenario(port):
+        await _request(port, "POST", "/v1/validate", _form(Age=30))
+        return await _request(port, "GET", "/metrics")
+
+    status, headers, body = _run(scenario)
+    assert status == 200 and headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = body.decode("utf-8")
+    assert "# TYPE guardian_stage_seconds histogram" in text
+    assert 'guardian_checks_total{mode="rules"}' in text
@@ -0,0 +1,59 @@
+"""فحص الملفات بالتدفق: مطابقة العناوين، وتحويل الأرقام، والقراءة والكتابة دفعة بعد دفعة"""
+import csv
+import gzip
+import io
+import json
+
+from guardian.stream import ResultWriter, map_headers, read_records, validate_file, validate_stream
+
+
+def test_header_mapping_arabic_english_and_unknown():
+    mapping = map_headers(["﻿Record_ID", " العمر ", "Years-of-Experience", "المؤهل العلمي", "AGE", "Notes"])
+    assert mapping == {
+        "﻿Record_ID": "Record ID",
+        " العمر ": "Age",
+        "Years-of-Experience": "Years Experience",
+        "المؤهل العلمي": "Education",
+        "AGE": "Age",
+        "Notes": "Notes",
+    }
+
+
+def test_csv_rows_become_forms_with_numbers(tmp_path):
+    path = tmp_path / "extract.csv.gz"
+    with gzip.open(path, "wt", encoding="utf-8-sig", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["رقم الاستمارة", "العمر", "الراتب الشهري", "عدد الأطفال", "المنطقة"])
+        writer.writerow(["A1", "34", "12,500", "", "الرياض"])
+        writer.writerow(["A2", "n/a", "7000.5", "2", ""])
+    forms = list(read_records(str(path)))
+    assert forms == [
+        {"Record ID": "A1", "Age": 34, "Monthly Salary": 12500, "Region": "الرياض"},
+        {"Record ID": "A2", "Monthly Salary": 7000.5, "Children": 2},
+    ]
+
+
+def test_ndjson_stream_in_small_chunks():
+    lines = [{"record_id": f"N{i}", "age": 19 if i % 3 == 0 else 40, "education": "دكتوراه"} for i in range(10)]
+    source = io.BytesIO("".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines).encode("utf-8"))
+    source.name = "extract.ndjson"
+    summaries = []
+    output = io.StringIO()
+    summary = validate_stream(read_records(source), ResultWriter(output, "ndjson"), 3, progress=summaries.append)
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [row["row"] for row in rows] == list(range(1, 11))
+    assert [row["record_id"] for row in rows] == [f"N{i}" for i in range(10)]
+    assert [row["status"] != "clean" for row in rows] == [i % 3 == 0 for i in range(10)]
+    assert [s["rows"] for s in summaries] == [3, 6, 9, 10]
+    assert (summary["rows"], summary["clean"]) == (10, 6)
+
+
+def test_validate_file_writes_csv(tmp_path):
+    source = tmp_path / "in.ndjson"
+    source.write_text(json.dumps({"ID": "X", "Age": 19, "Education": "دكتوراه"}, ensure_ascii=False) + "\n", "utf-8")
+    output = tmp_path / "out.csv"
+    summary = validate_file(str(source), str(output))
+    with open(output, encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert summary["rows"] == 1 and rows[0]["record_id"] == "X"
+    assert "age_vs_phd" in rows[0]["rules"].split(";")
@@ -0,0 +1,74 @@
+"""المولد التركيبي وخادم المحاكاة: بيانات قابلة للتكرار وأحكام مطابقة لمحرك القواعد"""
+import json
+import urllib.request
+
+import pytest
+
+from guardian.ai import BATCH_SYSTEM_PROMPT, build_batch_message, build_messages, parse_batch_response
+from guardian.mockserver import mock_verdict, start_mock_server
+from guardian.rules import analyze_form_demo
+from guardian.stream import read_records
+from guardian.synthetic import CONTRADICTIONS, generate_forms, generate_labeled, write_forms
+
+# تركيبات نادرة للفرز وليست قواعد محلية
+TRIAGE_ONLY = {"student_with_salary", "government_private_sector"}
+
+
+def _rules(form: dict) -> set:
+    return {issue["rule"] for issue in analyze_form_demo(form)["issues"]}
+
+
+def test_generation_is_seeded():
+    assert list(generate_forms(50, seed=3)) == list(generate_forms(50, seed=3))
+    assert list(generate_forms(50, seed=3)) != list(generate_forms(50, seed=4))
+    with pytest.raises(ValueError):
+        list(generate_labeled(1, weights={"no_such_rule": 1}))
+
+
+def test_labels_match_the_rule_engine():
+    labeled = list(generate_labeled(1000, seed=1, contradiction_rate=0.5))
+    assert any(kinds for _, kinds in labeled) and any(not kinds for _, kinds in labeled)
+    for form, kinds in labeled:
+        if not kinds:
+            assert _rules(form) == set()
+        assert set(kinds) - TRIAGE_ONLY <= _rules(form)
+
+
+def test_weights_select_contradiction_types():
+    kinds = {kind for _, injected in generate_labeled(300, contradiction_rate=1, weights={"age_vs_phd": 1}) for kind in injected}
+    assert kinds == {"age_vs_phd"} and "age_vs_phd" in CONTRADICTIONS
+
+
+@pytest.mark.parametrize("name", ["forms.csv.gz", "forms.ndjson"])
+def test_written_forms_read_back(tmp_path, name):
+    forms = list(generate_forms(20, seed=2))
+    path = str(tmp_path / name)
+    assert write_forms(path, forms) == 20
+    assert [form["Record ID"] for form in read_records(path)] == [form["Record ID"] for form in forms]
+
+
+def test_mock_verdicts_single_and_batch():
+    forms = list(generate_forms(3, seed=5, contradiction_rate=1))
+    single = json.loads(mock_verdict(build_messages(forms[0])))
+    assert single["status"] == analyze_form_demo(forms[0])["status"]
+
+    items = [(f"r{i}", form) for i, form in enumerate(forms)]
+    messages = [{"role": "system", "content": BATCH_SYSTEM_PROMPT}, {"role": "user", "content": build_batch_message(items)}]
+    results = parse_batch_response(mock_verdict(messages))
+    assert sorted(results) == ["r0", "r1", "r2"]
+
+
+def test_mock_server_answers_chat_completions():
+    server = start_mock_server(latency_ms=0)
+    try:
+        host, port = server.server_address
+        body = json.dumps({"model": "mock", "messages": build_messages({"Age": 19, "Education": "دكتوراه"})}).encode()
+        request = urllib.request.Request(f"http://{host}:{port}/v1/chat/completions", body, {"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            payload = json.loads(response.read())
+            assert response.headers["x-ratelimit-limit-requests"]
+    finally:
+        server.shutdown()
+        server.server_close()
+    verdict = json.loads(payload["choices"][0]["message"]["content"])
+    assert verdict["status"] != "clean" and payload["usage"]["total_tokens"] > 0
@@ -0,0 +1,48 @@
+"""قياس المراحل والعدادات: المدرجات التراكمية وصيغة Prometheus والإيقاف"""
+from guardian.telemetry import STAGE_BUCKETS, Telemetry
+
+
+def test_stage_histogram_and_quantiles():
+    telemetry = Telemetry(enabled=True)
+    for _ in range(90):
+        telemetry.observe("rules", 0.0004)
+    for _ in range(10):
+        telemetry.observe("rules", 0.2)
+    with telemetry.timer("api"):
+        pass
+
+    stages = telemetry.stats()["stages"]
+    assert stages["rules"]["count"] == 100 and stages["api"]["count"] == 1
+    assert stages["rules"]["p50_ms"] <= 0.5 < stages["rules"]["p99_ms"] <= 250
+    assert abs(stages["rules"]["total_s"] - (90 * 0.0004 + 10 * 0.2)) < 1e-9
+
+
+def test_counters_and_prometheus_text(tmp_path):
+    telemetry = Telemetry(enabled=True)
+    telemetry.observe("rules", 0.003)
+    telemetry.inc("fallback_total", reason="quota")
+    telemetry.inc("fallback_total", 2, reason="quota")
+    telemetry.inc("checks_total", mode="rules")
+    assert telemetry.stats()["counters"]["fallback_total"] == {"reason=quota": 3}
+
+    text = telemetry.render_prometheus()
+    assert 'guardian_stage_seconds_bucket{stage="rules",le="0.001"} 0' in text
+    assert 'guardian_stage_seconds_bucket{stage="rules",le="0.005"} 1' in text
+    assert f'guardian_stage_seconds_bucket{{stage="rules",le="{STAGE_BUCKETS[-1]}"}} 1' in text
+    assert 'guardian_stage_seconds_count{stage="rules"} 1' in text
+    assert "# TYPE guardian_fallback_total counter" in text
+    assert 'guardian_fallback_total{reason="quota"} 3' in text
+
+    path = tmp_path / "guardian.prom"
+    telemetry.write_textfile(str(path))
+    assert path.read_text("utf-8") == text and list(tmp_path.iterdir()) == [path]
+
+
+def test_disabled_telemetry_records_nothing():
+    telemetry = Telemetry(enabled=False)
+    with telemetry.timer("rules"):
+        pass
+    telemetry.observe("api", 1.0)
+    telemetry.inc("checks_total", mode="ai")
+    stats = telemetry.stats()
+    assert (stats["enabled"], stats["stages"], stats["counters"]) == (False, {}, {})
@@ -0,0 +1,48 @@
+"""الفرز بالقواعد أولاً: متى تُحسم الاستمارة محلياً ومتى تُصعّد إلى النموذج"""
+from guardian.triage import TRIAGE_POLICY, TriageStats, triage_form
+
+
+def _decision(form_data, **policy):
+    decision = triage_form(form_data, dict(TRIAGE_POLICY, **policy) if policy else None)
+    return decision.escalate, decision.reason
+
+
+def test_clean_and_high_severity_are_decided_locally():
+    assert _decision({"Age": 35, "Gender": "ذكر"}) == (False, "clean")
+    assert _decision({"Age": 19, "Education": "دكتوراه", "Job Title": "xyz"}) == (False, "high_severity")
+
+
+def test_ambiguous_forms_are_escalated():
+    assert _decision({"Job Title": "مهنة غير معروفة xyz"}) == (True, "free_text:Job Title")
+    assert _decision({"Region": "تبوك"}) == (True, "unknown_category:Region")
+    assert _decision({"Employment Status": "غير موظف", "Monthly Salary": 5000}) == (True, "medium_only")
+    assert _decision({"Employment Status": "غير موظف", "Monthly Salary": 5000}, escalate_medium_only=False) == (
+        False, "issues"
+    )
+
+
+def test_job_titles_escalate_but_indexed_education_is_trusted():
+    # المسمى المعروف تفحص القواعد مؤهله وعمره فقط، لا اتساقه مع الجنس
+    assert _decision({"Job Title": "ممرضة", "Gender": "ذكر", "Age": 30}) == (True, "free_text:Job Title")
+    assert _decision({"Education": "بكالوريوس هندسة", "Age": 45}) == (False, "clean")
+    assert _decision({"Education": "بكالوريوس هندسة", "Age": 45}, trust_indexed_values=False) == (
+        True, "unknown_category:Education"
+    )
+
+
+def test_rare_combinations_match_spelling_variants():
+    assert _decision({"Employment Status": "طالب", "Income Source": "راتب"}) == (True, "rare_combination")
+    assert _decision({"Employment Status": " غير  موظّف", "Income Source": "راتب"}) == (True, "rare_combination")
+    assert _decision({"Employment Status": "طالب", "Income Source": "استثمارات"}) == (False, "clean")
+    # سياسة مخصصة بقائمة جديدة تُطبّع هي أيضاً
+    custom = [{"Region": ("مكه المكرمه",), "Sector": ("خاص",)}]
+    assert _decision({"Region": "مكة المكرمة", "Sector": "خاص"}, rare_combinations=custom) == (True, "rare_combination")
+
+
+def test_stats_count_decisions():
+    stats = TriageStats()
+    for form_data in ({}, {"Region": "تبوك"}, {"Region": "تبوك"}):
+        stats.record(triage_form(form_data))
+    summary = stats.stats()
+    assert (summary["local"], summary["escalated"]) == (1, 2)
+    assert summary["reasons"]["unknown_category:Region"] == 2